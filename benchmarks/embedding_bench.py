@@ -0,0 +1,66 @@
+"""
+Bandingkan backend embedding dense: throughput embedding dokumen (chunk/detik)
+dan latency embedding query. Backend gemini butuh GOOGLE_API_KEY; backend
+fastembed mengunduh model ONNX sekali lalu berjalan lokal.
+
+    python -m benchmarks.embedding_bench --backends gemini fastembed --chunks 256 --queries 50
+"""
+import argparse
+import time
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.embeddings import create_dense_embedder
+
+SAMPLE_CHUNK = (
+    "Laporan Realisasi APBDes\n"
+    "Dana desa tahun anggaran berjalan digunakan untuk pembangunan jalan lingkungan, "
+    "perbaikan saluran irigasi, kegiatan posyandu, dan pelatihan usaha mikro warga."
+)
+SAMPLE_QUERY = "Berapa anggaran perbaikan saluran irigasi tahun ini?"
+
+
+def run(backend: str, args) -> dict:
+    started_at = time.perf_counter()
+    embedder = create_dense_embedder(backend)
+    load_seconds = time.perf_counter() - started_at
+
+    texts = [f"{SAMPLE_CHUNK} ({i})" for i in range(args.chunks)]
+    started_at = time.perf_counter()
+    embedder.embed_documents(texts)
+    document_seconds = time.perf_counter() - started_at
+
+    latencies = []
+    for i in range(args.queries):
+        started_at = time.perf_counter()
+        embedder.embed_query(f"{SAMPLE_QUERY} {i}")
+        latencies.append(time.perf_counter() - started_at)
+    latencies.sort()
+
+    return {
+        "backend": backend,
+        "vector": f"{embedder.vector_name} ({embedder.size})",
+        "load": load_seconds,
+        "chunks_per_second": args.chunks / document_seconds,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend embedding dense")
+    parser.add_argument("--backends", nargs="+", default=["gemini", "fastembed"])
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        result = run(backend, args)
+        print(
+            f"{result['backend']:>10}: {result['vector']}  load={result['load']:.1f}s  "
+            f"{result['chunks_per_second']:.1f} chunks/s  "
+            f"query p50={result['p50'] * 1000:.1f}ms p95={result['p95'] * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Load test time-to-first-token dan throughput chat di bawah konkurensi.
+
+Mode lokal (tanpa server, memakai LLMGateway + StubGenerativeModel):
+    python -m benchmarks.llm_gateway_bench --requests 200 --concurrency 50
+
+Mode HTTP (server dijalankan dengan LLM_BACKEND=stub atau Gemini asli):
+    python -m benchmarks.llm_gateway_bench --url http://localhost:8000 --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.llm_gateway import LLMGateway, LLMOverloadedError
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_local(args):
+    gateway = LLMGateway(
+        model_name="stub",
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        queue_timeout=args.queue_timeout,
+        backend="stub",
+        stub_options={"ttft": args.stub_ttft_ms / 1000, "token_interval": args.stub_token_ms / 1000, "tokens": args.stub_tokens}
+    )
+
+    async def one_request():
+        started_at = time.perf_counter()
+        try:
+            lease = await gateway.acquire()
+        except LLMOverloadedError:
+            return None, None, "rejected"
+        try:
+            ttft = None
+            async for _ in gateway.stream("benchmark"):
+                if ttft is None:
+                    ttft = time.perf_counter() - started_at
+            return ttft, time.perf_counter() - started_at, "ok"
+        finally:
+            lease.release()
+
+    return await run_clients(one_request, args)
+
+
+async def run_http(args):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+        async def one_request():
+            started_at = time.perf_counter()
+            async with client.stream("GET", "/api/chat/stream", params={"query": args.query}) as response:
+                if response.status_code == 429:
+                    return None, None, "rejected"
+                if response.status_code != 200:
+                    return None, None, "error"
+                ttft = None
+                async for _ in response.aiter_text():
+                    if ttft is None:
+                        ttft = time.perf_counter() - started_at
+                return ttft, time.perf_counter() - started_at, "ok"
+
+        return await run_clients(one_request, args)
+
+
+async def run_clients(one_request, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await one_request()
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*[limited() for _ in range(args.requests)])
+    return results, time.perf_counter() - started_at
+
+
+def report(results, elapsed):
+    ok = [r for r in results if r[2] == "ok"]
+    ttfts = [r[0] for r in ok if r[0] is not None]
+    totals = [r[1] for r in ok]
+    print(f"requests: {len(results)}  ok: {len(ok)}  rejected(429): {sum(r[2] == 'rejected' for r in results)}  errors: {sum(r[2] == 'error' for r in results)}")
+    print(f"throughput: {len(ok) / elapsed:.2f} req/s over {elapsed:.2f}s")
+    if ttfts:
+        print(f"ttft   p50={percentile(ttfts, 50):.3f}s p95={percentile(ttfts, 95):.3f}s mean={statistics.mean(ttfts):.3f}s")
+        print(f"total  p50={percentile(totals, 50):.3f}s p95={percentile(totals, 95):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test LLM gateway / chat stream")
+    parser.add_argument("--url", help="Base URL server API; tanpa ini benchmark memakai gateway lokal")
+    parser.add_argument("--query", default="Apa isi peraturan desa tentang keamanan?")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="Jumlah client paralel")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Batas slot gateway (mode lokal)")
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=10.0)
+    parser.add_argument("--stub-ttft-ms", type=float, default=300)
+    parser.add_argument("--stub-token-ms", type=float, default=20)
+    parser.add_argument("--stub-tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    results, elapsed = asyncio.run(run_http(args) if args.url else run_local(args))
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
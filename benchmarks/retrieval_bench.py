@@ -0,0 +1,119 @@
+"""
+Ukur tradeoff memori dan latency pencarian dense pada koleksi Qdrant yang aktif.
+Setiap query dijalankan dalam beberapa mode: exact (ground truth), HNSW dengan
+vektor float asli, dan (jika koleksi dikuantisasi) HNSW terkuantisasi dengan
+dan tanpa rescore. Recall@k dihitung terhadap hasil exact. Memori vektor dense
+diperkirakan dari jumlah point, dimensi, dan tipe kuantisasi.
+
+    QDRANT_QUANTIZATION=scalar python migrate.py qdrant
+    QDRANT_QUANTIZATION=scalar python -m benchmarks.retrieval_bench --limit 10 --repeat 5
+"""
+import argparse
+import statistics
+import time
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from qdrant_client.http.models import NamedVector
+from service.qdrant_client import QdrantClientService
+from settings import (
+    VECTOR_DB_URL,
+    VECTOR_COLLECTION_NAME,
+    QDRANT_QUANTIZATION,
+    QDRANT_HNSW_M
+)
+
+DEFAULT_QUERIES = [
+    "Apa isi peraturan desa tentang pengelolaan sampah?",
+    "Berapa anggaran perbaikan saluran irigasi tahun ini?",
+    "Siapa yang bertanggung jawab atas program posyandu?",
+    "Bagaimana prosedur pengajuan surat keterangan usaha?",
+    "Apa saja program pemberdayaan ekonomi warga?",
+    "Kapan musyawarah desa terakhir dilaksanakan?",
+    "Bagaimana pembagian dana desa untuk infrastruktur?",
+    "Apa tugas badan permusyawaratan desa?"
+]
+# Byte per dimensi untuk vektor asli dan hasil kuantisasi
+BYTES_PER_DIMENSION = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+
+def estimate_memory(points: int, size: int, quantization: str) -> dict:
+    # Link graf HNSW: rata-rata ~2*m tetangga di layer 0, 4 byte per ID
+    hnsw_links = points * QDRANT_HNSW_M * 2 * 4
+    original = points * size * BYTES_PER_DIMENSION["none"]
+    quantized = points * size * BYTES_PER_DIMENSION[quantization] if quantization != "none" else 0
+    return {"original": original, "quantized": quantized, "hnsw": hnsw_links}
+
+
+def search(client: QdrantClientService, vector, limit: int, search_params) -> list:
+    return client._client.search(
+        collection_name=VECTOR_COLLECTION_NAME,
+        query_vector=NamedVector(name=client.dense_embedder.vector_name, vector=vector),
+        search_params=search_params,
+        limit=limit
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memori dan latency pencarian dense")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--queries-file", help="Satu query per baris; default memakai query contoh")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file) as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    client = QdrantClientService(host=VECTOR_DB_URL, https=False)
+    if not client.connect():
+        raise SystemExit(f"Failed to connect to Qdrant at {VECTOR_DB_URL}")
+
+    info = client._client.get_collection(collection_name=VECTOR_COLLECTION_NAME)
+    size = client.dense_embedder.size
+    memory = estimate_memory(info.points_count or 0, size, QDRANT_QUANTIZATION)
+    mib = 1024 * 1024
+    print(
+        f"Collection '{VECTOR_COLLECTION_NAME}': {info.points_count} points, dense size {size}, "
+        f"quantization={QDRANT_QUANTIZATION}"
+    )
+    print(
+        f"  est. dense memory: original={memory['original'] / mib:.1f} MiB  "
+        f"quantized={memory['quantized'] / mib:.1f} MiB  hnsw links={memory['hnsw'] / mib:.1f} MiB"
+    )
+
+    vectors = [client.dense_embedder.embed_query(query) for query in queries]
+    modes = {
+        "exact": client.dense_search_params(exact=True, ignore_quantization=True),
+        "hnsw_float": client.dense_search_params(ignore_quantization=True)
+    }
+    if QDRANT_QUANTIZATION != "none":
+        modes["quantized"] = client.dense_search_params(rescore=False)
+        modes["quantized_rescore"] = client.dense_search_params(rescore=True)
+
+    ground_truth = [
+        {hit.id for hit in search(client, vector, args.limit, modes["exact"])}
+        for vector in vectors
+    ]
+    for mode, search_params in modes.items():
+        latencies = []
+        recalls = []
+        for _ in range(args.repeat):
+            for vector, expected in zip(vectors, ground_truth):
+                started_at = time.perf_counter()
+                hits = search(client, vector, args.limit, search_params)
+                latencies.append(time.perf_counter() - started_at)
+                if expected:
+                    recalls.append(len({hit.id for hit in hits} & expected) / len(expected))
+        latencies.sort()
+        print(
+            f"{mode:>18}: p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+            f"p95={latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000:.1f}ms  "
+            f"recall@{args.limit}={statistics.mean(recalls) if recalls else float('nan'):.3f}"
+        )
+
+    client.disconnect()
+
+
+if __name__ == "__main__":
+    main()
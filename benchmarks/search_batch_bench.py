@@ -0,0 +1,53 @@
+"""
+Bandingkan throughput hybrid_search per query dengan hybrid_search_batch pada
+koleksi Qdrant yang aktif untuk beberapa ukuran batch. Query contoh diulang
+sampai jumlahnya sama dengan ukuran batch.
+
+    python -m benchmarks.search_batch_bench --sizes 1 4 16 64 --limit 10
+"""
+import argparse
+import time
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.retrieval_bench import DEFAULT_QUERIES
+from service.qdrant_client import QdrantClientService
+from settings import VECTOR_DB_URL
+
+
+def make_queries(size: int) -> list:
+    return [f"{DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]} ({i})" for i in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid search per query vs batch")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    client = QdrantClientService(host=VECTOR_DB_URL, https=False)
+    if not client.connect():
+        raise SystemExit(f"Failed to connect to Qdrant at {VECTOR_DB_URL}")
+
+    # Pemanasan: muat model embedding sebelum diukur
+    client.hybrid_search_batch(make_queries(2), limit=args.limit)
+
+    for size in args.sizes:
+        queries = make_queries(size)
+        started_at = time.perf_counter()
+        for query in queries:
+            client.hybrid_search(query, limit=args.limit)
+        sequential = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        client.hybrid_search_batch(queries, limit=args.limit)
+        batched = time.perf_counter() - started_at
+        print(
+            f"batch={size:>4}: sequential {size / sequential:7.1f} q/s  "
+            f"batched {size / batched:7.1f} q/s  (x{sequential / batched:.1f})"
+        )
+
+    client.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from core.database import create_sync_engine
+from models.ChunkText import ChunkText
+from settings import (
+    DATABASE_URL,
+    CHUNK_TEXT_STORE,
+    CHUNK_TEXT_COMPRESSION_LEVEL
+)
+import hashlib
+import logging
+import threading
+import zlib
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Statement Core langsung pada tabel: tanpa overhead ORM untuk baca/tulis massal
+chunk_texts = ChunkText.__table__
+
+
+def text_key(text: str) -> str:
+    """Key berbasis isi: chunk identik (mis. di koleksi lama dan baru saat re-index) berbagi satu baris."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text: str, level: int = CHUNK_TEXT_COMPRESSION_LEVEL) -> bytes:
+    return zlib.compress(text.encode("utf-8"), level)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+class ChunkTextStore:
+    """
+    Menyimpan teks chunk di tabel Postgres `chunk_texts` (terkompresi zlib) agar
+    payload Qdrant hanya berisi field kecil. Ingestion dan pencarian memanggilnya
+    dari thread sync, jadi dipakai engine psycopg2 terpisah dari engine async API.
+    """
+
+    def __init__(self, database_url: str, compression_level: int = CHUNK_TEXT_COMPRESSION_LEVEL) -> None:
+        self._database_url = database_url
+        self._compression_level = compression_level
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _get_engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = create_sync_engine(self._database_url)
+        return self._engine
+
+    def put_many(self, texts: Dict[str, str]) -> None:
+        """Simpan {key: teks}; key yang sudah ada dilewati."""
+        if not texts:
+            return
+        rows = [
+            {"key": key, "data": compress_text(text, self._compression_level)}
+            for key, text in texts.items()
+        ]
+        statement = insert(chunk_texts).on_conflict_do_nothing(index_elements=["key"])
+        with self._get_engine().begin() as connection:
+            connection.execute(statement, rows)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Ambil banyak teks dalam satu query; key yang tidak ditemukan tidak ada di hasil."""
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        with self._get_engine().connect() as connection:
+            rows = connection.execute(
+                select(chunk_texts.c.key, chunk_texts.c.data).where(chunk_texts.c.key.in_(keys))
+            )
+            return {key: decompress_text(data) for key, data in rows}
+
+    def dispose(self) -> None:
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+
+def create_chunk_store(backend: str = CHUNK_TEXT_STORE) -> Optional[ChunkTextStore]:
+    """None berarti teks chunk tetap disimpan di payload Qdrant (`document`)."""
+    if backend == "postgres":
+        if not DATABASE_URL:
+            raise ValueError("CHUNK_TEXT_STORE=postgres requires DATABASE_URL.")
+        return ChunkTextStore(DATABASE_URL)
+    if backend == "qdrant":
+        return None
+    raise ValueError(f"Unknown chunk text store: {backend}")
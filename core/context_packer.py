@@ -0,0 +1,138 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from .utils import estimate_tokens
+import logging
+import os
+import re
+import threading
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def similarity(first: str, second: str) -> float:
+    """Jaccard similarity atas shingle 3 kata; 1.0 berarti isi identik."""
+    a, b = _shingles(first), _shingles(second)
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a & b) / len(a | b)
+
+
+def strip_overlap(existing: str, incoming: str) -> str:
+    """
+    Buang bagian `incoming` yang sudah ada di `existing`: baris heading hasil
+    contextualize yang berulang di awal chunk, lalu teks di awal chunk yang
+    sama dengan akhir chunk sebelumnya.
+    """
+    existing_lines = {line.strip() for line in existing.splitlines() if line.strip()}
+    lines = incoming.splitlines()
+    while lines and (not lines[0].strip() or lines[0].strip() in existing_lines):
+        lines.pop(0)
+    remainder = "\n".join(lines).strip()
+
+    existing_words = existing.split()
+    remainder_words = remainder.split()
+    for size in range(min(len(existing_words), len(remainder_words)), 0, -1):
+        if existing_words[-size:] == remainder_words[:size]:
+            return " ".join(remainder_words[size:])
+    return remainder
+
+
+class ContextPacker:
+    """
+    Menyusun konteks dokumen untuk prompt dalam anggaran token. Dokumen diproses
+    sesuai urutan relevansi: chunk yang hampir identik dengan chunk yang sudah
+    dipilih dibuang, chunk dari file dan halaman yang sama digabung tanpa
+    pengulangan heading/overlap, dan chunk yang tidak muat di sisa anggaran dilewati.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        dedup_threshold: float = 0.9,
+        count_tokens: Callable[[str], int] = None,
+        tokenizer_path: str = None
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self._count_tokens = count_tokens
+        self._tokenizer_path = tokenizer_path
+        self._lock = threading.Lock()
+
+    def count_tokens(self, text: str) -> int:
+        if self._count_tokens is None:
+            with self._lock:
+                if self._count_tokens is None:
+                    self._count_tokens = self._load_tokenizer()
+        return self._count_tokens(text)
+
+    def _load_tokenizer(self) -> Callable[[str], int]:
+        # Tokenizer yang sama dengan chunker ingestion; disimpan ke lokal oleh DocumentProcessor
+        try:
+            from transformers import AutoTokenizer
+            from settings import MODEL_ID
+            path = self._tokenizer_path if self._tokenizer_path and os.path.exists(self._tokenizer_path) else MODEL_ID
+            tokenizer = AutoTokenizer.from_pretrained(path)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False)) if text else 0
+        except Exception as e:
+            logging.warning(f"Failed to load tokenizer, falling back to estimated token counts: {e}")
+            return estimate_tokens
+
+    def _header(self, doc: Dict[str, any]) -> str:
+        return f"[{doc.get('filename')} - Page {doc.get('page_number')}]"
+
+    def pack(self, documents: List[Dict[str, any]]) -> Tuple[str, Dict[str, int]]:
+        """
+        Mengembalikan (konteks, statistik). Statistik berisi jumlah chunk yang
+        dipakai, dibuang sebagai duplikat, digabung, dilewati karena anggaran,
+        dan jumlah token konteks.
+        """
+        stats = {"input": len(documents), "used": 0, "duplicate": 0, "merged": 0, "over_budget": 0, "tokens": 0}
+        groups: Dict[Tuple[Optional[str], Optional[int]], List[str]] = {}
+        kept_texts: List[str] = []
+        used_tokens = 0
+
+        for doc in documents:
+            text = (doc.get("document") or "").strip()
+            if not text:
+                continue
+            if any(similarity(text, kept) >= self.dedup_threshold for kept in kept_texts):
+                stats["duplicate"] += 1
+                continue
+
+            key = (doc.get("filename"), doc.get("page_number"))
+            if key in groups:
+                addition = strip_overlap("\n".join(groups[key]), text)
+                if not addition:
+                    stats["duplicate"] += 1
+                    continue
+            else:
+                addition = f"{self._header(doc)}\n{text}"
+
+            addition_tokens = self.count_tokens(addition)
+            if used_tokens + addition_tokens > self.max_tokens:
+                stats["over_budget"] += 1
+                continue
+
+            if key in groups:
+                groups[key].append(addition)
+                stats["merged"] += 1
+            else:
+                groups[key] = [addition]
+            kept_texts.append(text)
+            used_tokens += addition_tokens
+            stats["used"] += 1
+
+        stats["tokens"] = used_tokens
+        context = "\n\n".join("\n".join(parts) for parts in groups.values())
+        return context, stats
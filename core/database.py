@@ -0,0 +1,65 @@
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import NullPool
+from settings import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS
+)
+
+
+def _statement_timeout_connect_args(database_url: str) -> dict:
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    url = make_url(database_url)
+    if not url.drivername.startswith("postgresql"):
+        return {}
+    if "asyncpg" in url.drivername:
+        return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+
+def create_db_engine(database_url: str = DATABASE_URL, **kwargs) -> AsyncEngine:
+    """
+    Engine async dengan pool yang dikonfigurasi dari settings. API membuat satu
+    engine di lifespan dan memakainya untuk semua request; jangan membuat engine
+    per request karena setiap engine membuka pool koneksinya sendiri.
+    """
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": _statement_timeout_connect_args(database_url)
+    }
+    if kwargs.get("poolclass") is not NullPool:
+        options.update({
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": DB_POOL_RECYCLE_SECONDS
+        })
+    options.update(kwargs)
+    return create_async_engine(database_url, **options)
+
+
+def create_sync_engine(database_url: str = DATABASE_URL, **kwargs) -> Engine:
+    """
+    Engine sync (psycopg2) untuk kode yang berjalan di thread atau proses worker
+    tanpa event loop: Celery worker, re-index, dan pencarian di thread pool.
+    """
+    url = make_url(database_url)
+    if url.drivername.startswith("postgresql"):
+        url = url.set(drivername="postgresql+psycopg2")
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": _statement_timeout_connect_args(url.render_as_string(hide_password=False))
+    }
+    options.update(kwargs)
+    return create_engine(url, **options)
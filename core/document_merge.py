@@ -0,0 +1,57 @@
+from typing import List, Optional
+from docling_core.types.doc import ContentLayer, DocItem, DoclingDocument
+
+ALL_CONTENT_LAYERS = {layer for layer in ContentLayer}
+
+
+def _doc_items(doc: DoclingDocument):
+    for item, _ in doc.iterate_items(traverse_pictures=True, included_content_layers=ALL_CONTENT_LAYERS):
+        if isinstance(item, DocItem):
+            yield item
+
+
+def offset_pages(doc: DoclingDocument, offset: int) -> DoclingDocument:
+    """
+    Geser nomor halaman hasil konversi satu bagian PDF (dimulai dari 1) menjadi
+    nomor halaman di dokumen asli, baik di `pages` maupun di provenance item.
+    """
+    if not offset:
+        return doc
+    for item in _doc_items(doc):
+        for prov in item.prov:
+            prov.page_no += offset
+    pages = {}
+    for page in doc.pages.values():
+        page.page_no += offset
+        pages[page.page_no] = page
+    doc.pages = pages
+    return doc
+
+
+def merge_documents(docs: List[DoclingDocument]) -> Optional[DoclingDocument]:
+    """
+    Gabungkan dokumen per rentang halaman (urut, nomor halaman sudah absolut)
+    menjadi satu dokumen: teks, tabel, gambar, dan struktur body semua bagian ikut.
+    """
+    docs = [doc for doc in docs if doc is not None]
+    if not docs:
+        return None
+    if len(docs) == 1:
+        return docs[0]
+
+    merged = DoclingDocument.concatenate(docs)
+
+    # concatenate menomori ulang halaman agar berurutan tanpa celah; kembalikan ke
+    # nomor asli supaya halaman yang gagal dikonversi tidak menggeser sumber jawaban
+    original_pages = sorted(page_no for doc in docs for page_no in doc.pages)
+    page_map = dict(zip(sorted(merged.pages), original_pages))
+    for item in _doc_items(merged):
+        for prov in item.prov:
+            prov.page_no = page_map.get(prov.page_no, prov.page_no)
+    pages = {}
+    for page in merged.pages.values():
+        page.page_no = page_map.get(page.page_no, page.page_no)
+        pages[page.page_no] = page
+    merged.pages = pages
+    merged.name = docs[0].name
+    return merged
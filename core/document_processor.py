@@ -1,11 +1,16 @@
-from typing import List
+from typing import List, Tuple
 import google.generativeai as genai
 from docling.datamodel.pipeline_options import PipelineOptions
-from docling.datamodel.base_models import InputFormat
+from docling.datamodel.base_models import InputFormat, ConversionStatus
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling_core.transforms.chunker.tokenizer.huggingface import HuggingFaceTokenizer
 from core.minio import FileProcessor
+from service.job_tracker import IngestionJob, NullIngestionJob
+from core.metrics import EMBEDDING_LATENCY
+from core.embeddings import create_dense_embedder
+from core.page_planner import estimate_page_cost, plan_page_ranges, split_page_range, page_runs
+from core.document_merge import merge_documents, offset_pages
 from docling_core.types.doc import (
     DoclingDocument
 )
@@ -15,9 +20,18 @@ from transformers import AutoTokenizer
 from docling.datamodel.accelerator_options import AcceleratorOptions, AcceleratorDevice
 from settings import (
     LOCAL_STORAGE_PATH,
-    GOOGLE_API_KEY
+    GOOGLE_API_KEY,
+    DOCLING_ARTIFACT_CACHE_ENABLED,
+    PAGE_PART_MAX_COST,
+    PAGE_PART_MAX_PAGES,
+    DOCLING_PART_TIMEOUT_SECONDS
 )
+from importlib import metadata
+from typing import Optional
 import fitz
+import gzip
+import hashlib
+import json
 import os
 import logging
 
@@ -36,6 +50,11 @@ pipeline_options.do_table_structure = False
 pipeline_options.table_structure_options.do_cell_matching = False
 pipeline_options.document_timeout
 
+# Opsi yang benar-benar dipakai converter: default docling ditambah batas waktu
+# per bagian. Bagian yang melewatinya berstatus PARTIAL_SUCCESS dan dicoba ulang
+# dalam rentang yang lebih kecil.
+conversion_pipeline_options = PdfPipelineOptions(document_timeout=DOCLING_PART_TIMEOUT_SECONDS or None)
+
 GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
 MODEL_ID = "nomic-ai/nomic-embed-text-v2-moe"
 MODEL_NAME = "nomic-embed-text-v2-moe"
@@ -43,10 +62,49 @@ LOCAL_TOKENIZER_PATH = f"{LOCAL_STORAGE_PATH}/tokenizer/{MODEL_NAME}"
 
 genai.configure(api_key=GOOGLE_API_KEY)
 
+
+def _converter_version() -> str:
+    """
+    Hash versi docling dan opsi pipeline yang memengaruhi hasil konversi.
+    Artefak lama otomatis diabaikan jika salah satunya berubah.
+    """
+    def package_version(name):
+        try:
+            return metadata.version(name)
+        except metadata.PackageNotFoundError:
+            return None
+
+    fingerprint = {
+        "docling": package_version("docling"),
+        "docling_core": package_version("docling-core"),
+        "do_ocr": conversion_pipeline_options.do_ocr,
+        "do_table_structure": conversion_pipeline_options.do_table_structure,
+        "do_cell_matching": conversion_pipeline_options.table_structure_options.do_cell_matching,
+        # v1 hanya menggabungkan `pages`; artefaknya berisi rentang halaman pertama saja
+        "merge": "concatenate-v2"
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:12]
+
+
+CONVERTER_VERSION = _converter_version()
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_object_name(content_sha256: str) -> str:
+    return f"artifacts/docling/{content_sha256}-{CONVERTER_VERSION}.json.gz"
+
 class DocumentProcessor:
     def __init__(self):
         self._converter = DocumentConverter(format_options={
             InputFormat.PDF: PdfFormatOption(
+                pipeline_options=conversion_pipeline_options,
                 accelerator_options=accelerator_options
             )
         })
@@ -73,7 +131,7 @@ class DocumentProcessor:
 
     def _initialize_models(self):
         try:
-            self._gemini_embbeding_model = genai
+            self._dense_embedding_model = create_dense_embedder()
             self._bm25_embbeding_model = SparseTextEmbedding(model_name="Qdrant/bm25",cache_dir=f"./{LOCAL_STORAGE_PATH}/models/bm25")
             self._late_interaction_embedding_model = LateInteractionTextEmbedding(model_name="colbert-ir/colbertv2.0", cache_dir=f"./{LOCAL_STORAGE_PATH}/models/colbert")
             logging.info(f"All models initialized successfully.")
@@ -81,94 +139,208 @@ class DocumentProcessor:
             logging.error(f"Failed to initialize Gemini model: {e}")
             raise e
 
-    def _split_pdf_to_temp_files(self, file_path: str, filename: str, page_size: int = 10):
-        doc = fitz.open(file_path)
-        temp_files = []
-        page_offsets = []  # simpan offset per part
-        total_pages = doc.page_count
-
+    def _extract_page_range(self, file_path: str, filename: str, start_page: int, end_page: int) -> str:
+        """
+        Simpan halaman [start_page, end_page) ke file PDF sementara.
+        Nama file memuat rentang halaman agar subtask paralel untuk dokumen
+        yang sama tidak saling menimpa.
+        """
         if not os.path.exists(f"{LOCAL_STORAGE_PATH}/temp"):
             os.makedirs(f"{LOCAL_STORAGE_PATH}/temp")
 
-        for i in range(0, total_pages, page_size):
-            end_page = min(i + page_size, total_pages)
+        doc = fitz.open(file_path)
+        new_pdf = fitz.open()
+        new_pdf.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
 
-            new_pdf = fitz.open()
-            new_pdf.insert_pdf(doc, from_page=i, to_page=end_page - 1)
+        temp_file_path = f"{LOCAL_STORAGE_PATH}/temp/pages_{start_page}_{end_page}_{filename}"
+        new_pdf.save(temp_file_path)
+        new_pdf.close()
+        doc.close()
+        return temp_file_path
 
-            temp_file_path = f"{LOCAL_STORAGE_PATH}/temp/part_{i // page_size + 1}_{filename}"
-            new_pdf.save(temp_file_path)
-            new_pdf.close()
-            temp_files.append(temp_file_path)
+    def get_page_count(self, file_path: str) -> int:
+        with fitz.open(file_path) as doc:
+            return doc.page_count
 
-            page_offsets.append(i)  # simpan halaman awal dari part ini
+    def page_costs(self, file_path: str, start_page: int = 0, end_page: int = None) -> List[float]:
+        """Perkiraan biaya konversi halaman [start_page, end_page) dari jumlah gambar dan teks."""
+        with fitz.open(file_path) as doc:
+            end_page = doc.page_count if end_page is None else end_page
+            return [
+                estimate_page_cost(len(doc[i].get_images()), len(doc[i].get_text()))
+                for i in range(start_page, end_page)
+            ]
 
-        doc.close()
-        return temp_files, page_offsets
-    
-    def download_file_to_local(self, file_name: str):
+    def plan_page_ranges(self, file_path: str, start_page: int = 0, end_page: int = None) -> List[Tuple[int, int]]:
+        try:
+            costs = self.page_costs(file_path, start_page, end_page)
+        except Exception as e:
+            # Tanpa perkiraan biaya, anggap semua halaman setara
+            logging.warning(f"Could not estimate page costs of {file_path}: {e}")
+            end_page = self.get_page_count(file_path) if end_page is None else end_page
+            costs = [1.0] * (end_page - start_page)
+        return plan_page_ranges(costs, PAGE_PART_MAX_COST, PAGE_PART_MAX_PAGES, offset=start_page)
+
+    def download_file_to_local(self, file_name: str, local_path: str = None):
         try:
             file_processor = FileProcessor()
-            file = file_processor.download_from_minio_to_local(file_name)
+            file = file_processor.download_from_minio_to_local(file_name, local_path=local_path)
 
             return file['local_path']
         except Exception as e:
             logging.error(f"Failed to download file from MinIO: {e}")
             raise e
 
-    def process(self, file_path: str, filename: str):
-        temp_files, page_offsets  = self._split_pdf_to_temp_files(file_path, filename)
-        total_pages = fitz.open(file_path).page_count
-        full_doc = None
-        for idx, temp_file in enumerate(temp_files):
+    def _convert_part(self, temp_file: str, start_page: int, end_page: int) -> Tuple[DoclingDocument, List[int]]:
+        """
+        Konversi satu file bagian berisi halaman [start_page, end_page). Mengembalikan
+        dokumen dengan nomor halaman asli dan halaman (mulai dari 0) yang tidak ada di
+        hasil. Timeout docling menghasilkan PARTIAL_SUCCESS: halaman yang sudah
+        dikonversi tetap dipakai, hanya halaman yang hilang yang dilaporkan.
+        """
+        result = self._converter.convert(source=temp_file, raises_on_error=False)
+        if result.status not in (ConversionStatus.SUCCESS, ConversionStatus.PARTIAL_SUCCESS):
+            raise RuntimeError(f"Conversion of {temp_file} ended with status {result.status}")
+        # Nomor halaman (pages dan provenance item) disesuaikan dengan dokumen asli
+        doc = offset_pages(result.document, start_page)
+        missing_pages = [page for page in range(start_page, end_page) if page + 1 not in doc.pages]
+        return doc, missing_pages
+
+    def merge_documents(self, docs: List[DoclingDocument]) -> Optional[DoclingDocument]:
+        return merge_documents(docs)
+
+    def _convert_single_range(self, file_path: str, filename: str, start_page: int, end_page: int, job: IngestionJob) -> Tuple[DoclingDocument, List[int]]:
+        with job.stage("split"):
+            temp_file = self._extract_page_range(file_path, filename, start_page, end_page)
+        try:
+            logging.info(f"Processing pages {start_page}-{end_page - 1} of {filename}")
+            with job.stage("convert"):
+                return self._convert_part(temp_file, start_page, end_page)
+        finally:
             try:
-                logging.info(f"Processing temporary file: {temp_file}")
-                doc = self._converter.convert(source=temp_file).document
-                
-                offset = page_offsets[idx]
-                updated_pages = {}
-                for page in doc.pages.values():
-                    page.page_no += offset # Update nomor halaman
-                    updated_pages[page.page_no] = page # Simpan dengan key (nomor halaman) yang baru
-                
-                # Ganti dictionary pages di objek doc saat ini dengan yang sudah dikoreksi
-                doc.pages = updated_pages
-
-                # 2. Logika penggabungan yang baru
-                if full_doc is None:
-                    # Jika ini adalah dokumen pertama yang berhasil diproses,
-                    # jadikan ia sebagai dokumen utama.
-                    full_doc = doc
-                else:
-                    # Untuk dokumen-dokumen berikutnya, gabungkan kamus 'pages' mereka
-                    # ke dalam dokumen utama.
-                    full_doc.pages.update(doc.pages)
+                os.remove(temp_file)
+            except OSError:
+                pass
 
+    def convert_ranges(self, file_path: str, filename: str, ranges: List[Tuple[int, int]], job: IngestionJob = None) -> Tuple[List[DoclingDocument], List[int]]:
+        """
+        Konversi rentang-rentang halaman. Rentang yang gagal dibagi dua dan dicoba
+        ulang sampai tersisa satu halaman; dari rentang yang timeout sebagian, hanya
+        halaman yang hilang yang dicoba ulang. Mengembalikan dokumen per rentang
+        (urut halaman) dan nomor halaman (mulai dari 0) yang tetap gagal dikonversi.
+        """
+        job = job or NullIngestionJob()
+        converted = []
+        failed_pages = []
+        pending = list(reversed(ranges))
+        while pending:
+            start_page, end_page = pending.pop()
+            try:
+                doc, missing_pages = self._convert_single_range(file_path, filename, start_page, end_page, job)
             except Exception as e:
-                logging.error(f"Failed to convert temporary file {temp_file}: {e}")
+                logging.warning(f"Failed to convert pages {start_page}-{end_page - 1} of {filename}: {e}")
+                doc, missing_pages = None, list(range(start_page, end_page))
+
+            converted_pages = end_page - start_page - len(missing_pages)
+            if doc is not None and converted_pages:
+                converted.append((start_page, doc))
+                job.increment("pages_converted", converted_pages)
+                job.increment("parts_converted")
+            if not missing_pages:
                 continue
-            finally:
-                try:
-                    os.remove(temp_file)
-                except OSError:
-                    pass
 
-       
+            if end_page - start_page > 1:
+                # Tidak ada halaman yang jadi: bagi dua. Sebagian jadi: ulangi halaman yang hilang saja.
+                retry_ranges = split_page_range(start_page, end_page) if not converted_pages else page_runs(missing_pages)
+                logging.warning(f"Retrying pages {missing_pages} of {filename} in {len(retry_ranges)} smaller parts.")
+                job.increment("parts_retried")
+                pending.extend(reversed(retry_ranges))
+            else:
+                logging.error(f"Failed to convert page {start_page} of {filename}.")
+                job.increment("pages_failed")
+                failed_pages.append(start_page)
+        converted.sort(key=lambda item: item[0])
+        return [doc for _, doc in converted], sorted(failed_pages)
+
+    def convert_page_range(self, file_path: str, filename: str, start_page: int, end_page: int, job: IngestionJob = None) -> Tuple[Optional[DoclingDocument], List[int]]:
+        """
+        Konversi satu rentang halaman [start_page, end_page) dengan nomor halaman
+        yang sudah disesuaikan ke posisi aslinya di dokumen penuh. Rentang dibagi lagi
+        menurut biaya halaman; mengembalikan dokumen gabungan dan halaman yang gagal.
+        """
+        job = job or NullIngestionJob()
+        ranges = self.plan_page_ranges(file_path, start_page, end_page)
+        docs, failed_pages = self.convert_ranges(file_path, filename, ranges, job=job)
+        return self.merge_documents(docs), failed_pages
+
+    def load_artifact(self, content_sha256: str) -> Optional[DoclingDocument]:
+        """DoclingDocument hasil konversi sebelumnya untuk konten dan versi converter yang sama."""
+        if not DOCLING_ARTIFACT_CACHE_ENABLED:
+            return None
+        try:
+            data = FileProcessor().get_artifact(artifact_object_name(content_sha256))
+            if data is None:
+                return None
+            return DoclingDocument.model_validate(json.loads(gzip.decompress(data)))
+        except Exception as e:
+            logging.warning(f"Failed to load docling artifact for {content_sha256}: {e}")
+            return None
+
+    def save_artifact(self, content_sha256: str, doc: DoclingDocument) -> None:
+        if not DOCLING_ARTIFACT_CACHE_ENABLED or doc is None:
+            return
+        try:
+            data = gzip.compress(json.dumps(doc.export_to_dict(), separators=(",", ":")).encode("utf-8"))
+            FileProcessor().save_artifact(artifact_object_name(content_sha256), data)
+        except Exception as e:
+            # Artefak hanya cache; kegagalan menyimpan tidak boleh menggagalkan ingestion
+            logging.warning(f"Failed to save docling artifact for {content_sha256}: {e}")
+
+    def process(self, file_path: str, filename: str, job: IngestionJob = None, content_sha256: str = None):
+        job = job or NullIngestionJob()
+        content_sha256 = content_sha256 or file_sha256(file_path)
+        full_doc = self.load_artifact(content_sha256)
+        if full_doc is not None:
+            logging.info(f"Loaded converted document for {filename} from artifact cache.")
+            job.update(artifact="hit")
+            return self.embed_document(full_doc, filename, job=job)
+        job.update(artifact="miss")
+
+        total_pages = self.get_page_count(file_path)
+        with job.stage("split"):
+            ranges = self.plan_page_ranges(file_path)
+        job.set_progress(pages_total=total_pages, parts_total=len(ranges))
+
+        converted_docs, failed_pages = self.convert_ranges(file_path, filename, ranges, job=job)
+        full_doc = self.merge_documents(converted_docs)
+        # Dokumen yang sebagian halamannya gagal tidak disimpan, agar run berikutnya mencoba lagi
+        if not failed_pages:
+            self.save_artifact(content_sha256, full_doc)
+        else:
+            logging.error(f"{len(failed_pages)} pages of {filename} could not be converted: {failed_pages}")
+        processed_data = self.embed_document(full_doc, filename, job=job)
+        processed_data["failed_pages"] = failed_pages
+        return processed_data
+
+    def embed_document(self, full_doc: DoclingDocument, filename: str, job: IngestionJob = None):
+        if full_doc is None:
+            raise ValueError(f"No pages of {filename} could be converted.")
+
+        job = job or NullIngestionJob()
         logging.info(f"Final merged pages: {list(full_doc.pages.keys())}")
         # logging.info(f"Full doc: {full_doc.dict()}")
-        chunks = list(self._chunker.chunk(dl_doc=full_doc))
-        
-        docs = [self._chunker.contextualize(chunk=chunk) for chunk in chunks]
-
-        bm25_embeddings = list(self._bm25_embbeding_model.embed(docs))
-        late_interaction_embeddings = list(self._late_interaction_embedding_model.embed(docs))
-        gemini_embeddings_resp = self._gemini_embbeding_model.embed_content(
-            content=docs,
-            model=GEMINI_EMBEDDING_MODEL,
-            task_type="retrieval_document"
-        )
-      
-        gemini_embeddings = gemini_embeddings_resp['embedding']
+        with job.stage("chunk"):
+            chunks = list(self._chunker.chunk(dl_doc=full_doc))
+            docs = [self._chunker.contextualize(chunk=chunk) for chunk in chunks]
+        job.set_progress(chunks=len(docs))
+
+        with job.stage("embed_bm25"), EMBEDDING_LATENCY.labels(model="bm25", kind="document").time():
+            bm25_embeddings = list(self._bm25_embbeding_model.embed(docs))
+        with job.stage("embed_colbert"), EMBEDDING_LATENCY.labels(model="colbert", kind="document").time():
+            late_interaction_embeddings = list(self._late_interaction_embedding_model.embed(docs))
+        with job.stage("embed_dense"), EMBEDDING_LATENCY.labels(model=self._dense_embedding_model.label, kind="document").time():
+            dense_embeddings = self._dense_embedding_model.embed_documents(docs)
+
         # logging.info(f"Processed {len(docs)} documents with {len(chunks)} chunks.")
         # logging.info(f"Docs: {docs}")
         # logging.info(f"\n\nChunks: {chunks}\n\n")
@@ -178,7 +350,7 @@ class DocumentProcessor:
             "filename": filename,
             "bm25_vectors": bm25_embeddings,
             "colbert_vectors": late_interaction_embeddings,
-            "gemini_vectors": gemini_embeddings
+            "dense_vectors": dense_embeddings
         }
     
     def save(self, filename):
@@ -0,0 +1,170 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from settings import (
+    GOOGLE_API_KEY,
+    GEMINI_EMBEDDING_MODEL,
+    LOCAL_STORAGE_PATH,
+    DENSE_EMBEDDING_BACKEND,
+    DENSE_EMBEDDING_MODEL,
+    DENSE_EMBEDDING_BATCH_SIZE,
+    DENSE_EMBEDDING_THREADS,
+    DENSE_OUTPUT_DIMENSIONALITY
+)
+import logging
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+GEMINI_VECTOR_SIZE = 768
+# Batas jumlah teks per request embed_content Gemini
+GEMINI_MAX_BATCH_SIZE = 100
+# Model nomic dilatih dengan prefix tugas; tanpa prefix kualitas retrieval turun
+TASK_PREFIXES = {
+    "nomic-ai/": ("search_document: ", "search_query: ")
+}
+
+
+class DenseEmbedder(ABC):
+    """
+    Backend embedding dense untuk indexing dan query. `vector_name` dan `size`
+    (dimensi vektor, diisi subclass) menentukan konfigurasi vektor dense di
+    koleksi Qdrant, sehingga indexing dan pencarian harus memakai backend yang sama.
+    """
+    label: str
+    vector_name: str
+    size: int
+
+    @abstractmethod
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    @abstractmethod
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class GeminiDenseEmbedder(DenseEmbedder):
+    label = "gemini"
+
+    def __init__(
+        self,
+        model_name: str = GEMINI_EMBEDDING_MODEL,
+        batch_size: int = GEMINI_MAX_BATCH_SIZE,
+        output_dimensionality: Optional[int] = DENSE_OUTPUT_DIMENSIONALITY
+    ) -> None:
+        import google.generativeai as genai
+        genai.configure(api_key=GOOGLE_API_KEY)
+        self._genai = genai
+        self.vector_name = model_name
+        self.size = output_dimensionality or GEMINI_VECTOR_SIZE
+        self._batch_size = min(batch_size, GEMINI_MAX_BATCH_SIZE)
+        # API memotong vektor di sisi server; tidak dikirim jika memakai dimensi asli
+        self._extra_args = {"output_dimensionality": output_dimensionality} if output_dimensionality else {}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for i in range(0, len(texts), self._batch_size):
+            response = self._genai.embed_content(
+                content=texts[i:i + self._batch_size],
+                model=self.vector_name,
+                task_type="retrieval_document",
+                **self._extra_args
+            )
+            embeddings.extend(response["embedding"])
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._genai.embed_content(
+            content=text,
+            model=self.vector_name,
+            task_type="retrieval_query",
+            **self._extra_args
+        )["embedding"]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for i in range(0, len(texts), self._batch_size):
+            response = self._genai.embed_content(
+                content=texts[i:i + self._batch_size],
+                model=self.vector_name,
+                task_type="retrieval_query",
+                **self._extra_args
+            )
+            embeddings.extend(response["embedding"])
+        return embeddings
+
+
+class FastEmbedDenseEmbedder(DenseEmbedder):
+    """Model ONNX lokal lewat fastembed; tidak ada panggilan jaringan setelah model diunduh."""
+    label = "fastembed"
+
+    def __init__(
+        self,
+        model_name: str = DENSE_EMBEDDING_MODEL,
+        batch_size: int = DENSE_EMBEDDING_BATCH_SIZE,
+        threads: Optional[int] = DENSE_EMBEDDING_THREADS,
+        output_dimensionality: Optional[int] = DENSE_OUTPUT_DIMENSIONALITY
+    ) -> None:
+        from fastembed import TextEmbedding
+        self._model = TextEmbedding(
+            model_name=model_name,
+            cache_dir=f"./{LOCAL_STORAGE_PATH}/models/dense",
+            threads=threads
+        )
+        self.vector_name = model_name
+        native_size = self._vector_size(TextEmbedding, model_name)
+        self.size = min(output_dimensionality or native_size, native_size)
+        self._truncate = self.size < native_size
+        self._batch_size = batch_size
+        self._document_prefix, self._query_prefix = next(
+            (prefixes for prefix, prefixes in TASK_PREFIXES.items() if model_name.startswith(prefix)),
+            ("", "")
+        )
+
+    def _vector_size(self, text_embedding_cls, model_name: str) -> int:
+        for description in text_embedding_cls.list_supported_models():
+            if description["model"].lower() == model_name.lower():
+                return description["dim"]
+        return len(next(iter(self._model.embed(["dimension probe"]))))
+
+    def _finalize(self, vector: np.ndarray) -> List[float]:
+        # Matryoshka: ambil dimensi awal lalu normalisasi ulang agar cosine tetap valid
+        if self._truncate:
+            vector = vector[:self.size]
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [
+            self._finalize(vector)
+            for vector in self._model.embed(
+                [f"{self._document_prefix}{text}" for text in texts],
+                batch_size=self._batch_size
+            )
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._finalize(next(iter(self._model.embed([f"{self._query_prefix}{text}"]))))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [
+            self._finalize(vector)
+            for vector in self._model.embed(
+                [f"{self._query_prefix}{text}" for text in texts],
+                batch_size=self._batch_size
+            )
+        ]
+
+
+def create_dense_embedder(backend: str = DENSE_EMBEDDING_BACKEND) -> DenseEmbedder:
+    if backend == "gemini":
+        return GeminiDenseEmbedder()
+    if backend == "fastembed":
+        return FastEmbedDenseEmbedder()
+    raise ValueError(f"Unknown dense embedding backend: {backend}")
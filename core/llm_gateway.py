@@ -0,0 +1,181 @@
+from types import SimpleNamespace
+from typing import AsyncIterator
+from core.metrics import (
+    LLM_IN_FLIGHT,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_WAIT,
+    LLM_REJECTED,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_STREAM_DURATION
+)
+import asyncio
+import logging
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class LLMOverloadedError(Exception):
+    """Antrean gateway penuh atau slot tidak didapat sebelum deadline."""
+
+    def __init__(self, message: str, retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class StubGenerativeModel:
+    """
+    Model lokal dengan antarmuka `generate_content_async` seperti Gemini.
+    Dipakai untuk load test time-to-first-token dan throughput tanpa kuota API.
+    """
+
+    def __init__(self, ttft: float = 0.3, token_interval: float = 0.02, tokens: int = 50) -> None:
+        self._ttft = ttft
+        self._token_interval = token_interval
+        self._tokens = tokens
+
+    def _chunk(self, text: str):
+        return SimpleNamespace(
+            text=text,
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))]
+        )
+
+    async def _stream(self):
+        await asyncio.sleep(self._ttft)
+        for i in range(self._tokens):
+            if i:
+                await asyncio.sleep(self._token_interval)
+            yield self._chunk(f"token{i} ")
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        if stream:
+            return self._stream()
+        await asyncio.sleep(self._ttft)
+        return self._chunk("SELECT name, prediction_revenue FROM predictive_analis")
+
+
+class LLMLease:
+    """Slot konkurensi yang dipegang selama satu request chat berlangsung."""
+
+    def __init__(self, gateway: "LLMGateway") -> None:
+        self._gateway = gateway
+        self._released = False
+
+    def release(self) -> None:
+        # Idempotent: dipanggil dari generator stream maupun background task response
+        if not self._released:
+            self._released = True
+            self._gateway._release()
+
+
+class LLMGateway:
+    """
+    Gateway bersama untuk model generatif:
+    - satu instance model dipakai ulang oleh semua request
+    - maksimal `max_concurrency` request aktif, sisanya menunggu FIFO
+    - antrean dibatasi `max_queue`; jika penuh langsung ditolak (HTTP 429)
+    - request yang menunggu lebih dari `queue_timeout` detik juga ditolak
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        backend: str = "gemini",
+        stub_options: dict = None
+    ) -> None:
+        self._model_name = model_name
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+        self._model = self._create_model(backend, model_name, stub_options or {})
+        logging.info(f"LLM gateway ready: backend={backend}, model={model_name}, concurrency={max_concurrency}, queue={max_queue}")
+
+    def _create_model(self, backend: str, model_name: str, stub_options: dict):
+        if backend == "stub":
+            return StubGenerativeModel(**stub_options)
+
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> LLMLease:
+        if self._semaphore.locked() or self._waiting:
+            if self._waiting >= self._max_queue:
+                LLM_REJECTED.labels(reason="queue_full").inc()
+                raise LLMOverloadedError("LLM queue is full.")
+
+        self._waiting += 1
+        LLM_QUEUE_DEPTH.inc()
+        started_at = time.perf_counter()
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            done, _ = await asyncio.wait({acquire}, timeout=self._queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(acquire)
+            raise
+        finally:
+            self._waiting -= 1
+            LLM_QUEUE_DEPTH.dec()
+            LLM_QUEUE_WAIT.observe(time.perf_counter() - started_at)
+        if not done:
+            self._abandon(acquire)
+            LLM_REJECTED.labels(reason="deadline").inc()
+            raise LLMOverloadedError(f"No LLM slot available within {self._queue_timeout} seconds.")
+
+        self._in_flight += 1
+        LLM_IN_FLIGHT.inc()
+        return LLMLease(self)
+
+    def _abandon(self, acquire: asyncio.Future) -> None:
+        """
+        Batalkan acquire yang tidak lagi ditunggu (timeout atau request dibatalkan).
+        Slot yang terlanjur diberikan bersamaan dengan pembatalan dikembalikan, agar
+        kapasitas gateway tidak bocor.
+        """
+        def return_slot(future: asyncio.Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                self._semaphore.release()
+
+        if acquire.done():
+            return_slot(acquire)
+        else:
+            acquire.cancel()
+            acquire.add_done_callback(return_slot)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        LLM_IN_FLIGHT.dec()
+        self._semaphore.release()
+
+    async def generate(self, prompt: str) -> str:
+        response = await self._model.generate_content_async(prompt)
+        return response.text.strip()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        started_at = time.perf_counter()
+        first_token_at = None
+        stream = await self._model.generate_content_async(prompt, stream=True)
+        try:
+            async for chunk in stream:
+                if chunk.candidates and chunk.candidates[0].content.parts:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        LLM_TIME_TO_FIRST_TOKEN.observe(first_token_at - started_at)
+                    yield chunk.candidates[0].content.parts[0].text
+        finally:
+            LLM_STREAM_DURATION.observe(time.perf_counter() - started_at)
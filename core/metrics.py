@@ -0,0 +1,149 @@
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+    start_http_server
+)
+import os
+
+# Semua label sengaja dibatasi ke nilai tetap (nama model, branch, stage)
+# agar jumlah time series tetap kecil.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+EMBEDDING_LATENCY = Histogram(
+    "rag_embedding_seconds",
+    "Latency of embedding calls.",
+    ["model", "kind"],
+    buckets=LATENCY_BUCKETS
+)
+QDRANT_SEARCH_LATENCY = Histogram(
+    "rag_qdrant_search_seconds",
+    "Latency of Qdrant search calls per hybrid search branch.",
+    ["branch"],
+    buckets=LATENCY_BUCKETS
+)
+QDRANT_SEARCH_ERRORS = Counter(
+    "rag_qdrant_search_errors",
+    "Failed Qdrant calls per hybrid search branch; the branch is skipped.",
+    ["branch"]
+)
+HYBRID_FUSION_LATENCY = Histogram(
+    "rag_hybrid_fusion_seconds",
+    "Time spent fusing branch results in hybrid_search.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_llm_time_to_first_token_seconds",
+    "Time from sending the prompt to the first streamed LLM chunk.",
+    buckets=LATENCY_BUCKETS
+)
+LLM_STREAM_DURATION = Histogram(
+    "rag_llm_stream_seconds",
+    "Total duration of a streamed LLM response.",
+    buckets=LATENCY_BUCKETS
+)
+LLM_IN_FLIGHT = Gauge(
+    "rag_llm_in_flight",
+    "LLM requests currently holding a gateway slot.",
+    multiprocess_mode="livesum"
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "rag_llm_queue_depth",
+    "Requests waiting for an LLM gateway slot.",
+    multiprocess_mode="livesum"
+)
+LLM_QUEUE_WAIT = Histogram(
+    "rag_llm_queue_wait_seconds",
+    "Time spent waiting for an LLM gateway slot.",
+    buckets=LATENCY_BUCKETS
+)
+LLM_REJECTED = Counter(
+    "rag_llm_rejected",
+    "Requests rejected by LLM admission control.",
+    ["reason"]
+)
+SQL_PLAN_CACHE_LOOKUPS = Counter(
+    "rag_sql_plan_cache_lookups",
+    "Text-to-SQL plan cache lookups.",
+    ["result"]
+)
+SQL_PLAN_CACHE_SAVED_SECONDS = Counter(
+    "rag_sql_plan_cache_saved_seconds",
+    "Estimated LLM time saved by text-to-SQL plan cache hits."
+)
+PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens",
+    "Token count of prompts sent to the LLM, and of their packed document context.",
+    ["kind"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+CONTEXT_CHUNKS_DROPPED = Counter(
+    "rag_context_chunks_dropped",
+    "Retrieved chunks left out of the prompt by the context packer.",
+    ["reason"]
+)
+SPECULATIVE_RETRIEVAL_OUTCOMES = Counter(
+    "rag_speculative_retrieval",
+    "Outcome of speculative document/DB retrieval for ambiguous questions.",
+    ["outcome"]
+)
+RERANK_LATENCY = Histogram(
+    "rag_rerank_seconds",
+    "Cross-encoder rerank latency for requests that were reranked.",
+    buckets=LATENCY_BUCKETS
+)
+RERANK_OUTCOMES = Counter(
+    "rag_rerank",
+    "Outcome of the rerank stage (reranked, cached, timeout, busy, error).",
+    ["outcome"]
+)
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "rag_single_flight_requests",
+    "Requests that started a shared stream (leader) or joined an identical in-flight one (follower).",
+    ["name", "role"]
+)
+UPLOAD_BYTES = Counter(
+    "rag_upload_bytes",
+    "Bytes received through the upload endpoints."
+)
+UPLOAD_SIZE = Histogram(
+    "rag_upload_size_bytes",
+    "Size of uploaded files.",
+    buckets=(1e4, 1e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8)
+)
+INGESTION_STAGE_DURATION = Histogram(
+    "rag_ingestion_stage_seconds",
+    "Duration of each ingestion pipeline stage.",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+INGESTION_QUEUE_BACKLOG = Gauge(
+    "rag_ingestion_queue_backlog",
+    "Number of ingestion tasks waiting in the broker queue.",
+    multiprocess_mode="max"
+)
+
+
+def metrics_registry():
+    """
+    Registry untuk endpoint /metrics. Jika PROMETHEUS_MULTIPROC_DIR di-set
+    (uvicorn multi-worker atau Celery prefork), gabungkan metrik semua proses.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def start_metrics_server(port: int):
+    start_http_server(port, registry=metrics_registry())
+
+
+def mark_process_dead(pid: int):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
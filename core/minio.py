@@ -6,10 +6,14 @@ from settings import (
     MINIO_PORT,
     MINIO_ACCESS_KEY,
     MINIO_SECRET_KEY,
+    MINIO_PUBLIC_ENDPOINT,
+    MINIO_PUBLIC_SECURE,
+    MINIO_REGION,
     LOCAL_STORAGE_PATH
 )
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO
+from typing import BinaryIO
 import logging
 
 logging.basicConfig(
@@ -60,10 +64,86 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Failed to upload file: {e}")
         
-    def download_from_minio_to_local(self, file_name: str):
+    def upload_stream(self, stream: BinaryIO, file_name: str, size: int, content_type: str = None) -> dict:
+        """
+        Upload dari file object tanpa membaca seluruh isi ke memori (dipakai batch
+        upload, file besar dari UploadFile sudah di-spool ke disk). Hasilnya sama
+        dengan upload_to_minio.
+        """
+        object_name = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file_name}"
+        try:
+            self._client.put_object(
+                BUCKET_NAME,
+                object_name,
+                stream,
+                size,
+                content_type=content_type or "application/octet-stream"
+            )
+            logging.info(f"File {object_name} uploaded successfully to {BUCKET_NAME}.")
+            return {
+                "file_name": object_name,
+                "file_path": f"{BUCKET_NAME}/{object_name}",
+                "content_type": content_type,
+                "size": size,
+                "upload_time": datetime.now().isoformat()
+            }
+        except S3Error as e:
+            raise Exception(f"MinIO error: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to upload file: {e}")
+
+    def presigned_upload_url(self, file_name: str, expires_seconds: int) -> dict:
+        """
+        URL PUT presigned agar klien meng-upload langsung ke MinIO. Penandatanganan
+        dilakukan lokal; region diisi agar client tidak meminta lokasi bucket ke endpoint publik.
+        """
+        object_name = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file_name}"
+        public_client = Minio(
+            MINIO_PUBLIC_ENDPOINT,
+            access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY,
+            secure=MINIO_PUBLIC_SECURE,
+            region=MINIO_REGION
+        )
+        expires = timedelta(seconds=expires_seconds)
+        return {
+            "file_name": object_name,
+            "file_path": f"{BUCKET_NAME}/{object_name}",
+            "upload_url": public_client.presigned_put_object(BUCKET_NAME, object_name, expires=expires),
+            "expires_at": (datetime.now() + expires).isoformat()
+        }
+
+    def stat_upload(self, file_name: str):
+        """Metadata objek yang di-upload lewat presigned URL, atau None jika belum ada."""
+        try:
+            stat = self._client.stat_object(BUCKET_NAME, file_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            raise Exception(f"MinIO error: {e}")
+        return {
+            "file_name": file_name,
+            "file_path": f"{BUCKET_NAME}/{file_name}",
+            "content_type": stat.content_type,
+            "size": stat.size,
+            "upload_time": stat.last_modified.isoformat() if stat.last_modified else datetime.now().isoformat()
+        }
+
+    def upload_local_file(self, local_path: str, object_name: str) -> str:
+        """Upload file lokal dengan nama objek apa adanya; objek dengan nama sama ditimpa."""
+        try:
+            self._client.fput_object(BUCKET_NAME, object_name, local_path)
+            logging.info(f"File {local_path} uploaded to {BUCKET_NAME}/{object_name}.")
+            return object_name
+        except S3Error as e:
+            raise Exception(f"MinIO error: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to upload file: {e}")
+
+    def download_from_minio_to_local(self, file_name: str, local_path: str = None):
         try:
             logging.info(f"Downloading {file_name} from bucket {BUCKET_NAME} to local storage...")
-            local_path = f"{LOCAL_STORAGE_PATH}/documents/{file_name}"
+            local_path = local_path or f"{LOCAL_STORAGE_PATH}/documents/{file_name}"
             self._client.fget_object(bucket_name=BUCKET_NAME, object_name=file_name, file_path=local_path)
             logging.info(f"File {file_name} downloaded successfully to {local_path}.")
             return {
@@ -75,6 +155,41 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Failed to download file: {e}")
         
+    def list_documents(self, prefix: str = "") -> list:
+        """Nama objek dokumen upload; subfolder (mis. profiles/) tidak ikut."""
+        try:
+            return sorted(
+                obj.object_name
+                for obj in self._client.list_objects(BUCKET_NAME, prefix=prefix or None, recursive=False)
+                if not obj.is_dir
+            )
+        except S3Error as e:
+            raise Exception(f"MinIO error: {e}")
+
+    def save_artifact(self, object_name: str, data: bytes, content_type: str = "application/gzip") -> str:
+        try:
+            self._client.put_object(BUCKET_NAME, object_name, BytesIO(data), len(data), content_type=content_type)
+            logging.info(f"Artifact saved to {BUCKET_NAME}/{object_name} ({len(data)} bytes).")
+            return object_name
+        except S3Error as e:
+            raise Exception(f"MinIO error: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to save artifact: {e}")
+
+    def get_artifact(self, object_name: str):
+        response = None
+        try:
+            response = self._client.get_object(BUCKET_NAME, object_name)
+            return response.read()
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise Exception(f"MinIO error: {e}")
+        finally:
+            if response:
+                response.close()
+                response.release_conn()
+
     def delete_from_minio(self, file_name: str) -> None:
         try:
             self._client.remove_object(BUCKET_NAME, file_name)
@@ -82,4 +197,36 @@ class FileProcessor:
         except S3Error as e:
             raise Exception(f"MinIO error: {e}")
         except Exception as e:
-            raise Exception(f"Failed to delete file: {e}")
\ No newline at end of file
+            raise Exception(f"Failed to delete file: {e}")
+
+    def save_profile(self, profile_id: str, folded_stacks: str) -> str:
+        object_name = f"profiles/{profile_id}.folded"
+        try:
+            data = folded_stacks.encode("utf-8")
+            self._client.put_object(
+                BUCKET_NAME,
+                object_name,
+                BytesIO(data),
+                len(data),
+                content_type="text/plain"
+            )
+            logging.info(f"Profile {profile_id} saved to {object_name}.")
+            return object_name
+        except S3Error as e:
+            raise Exception(f"MinIO error: {e}")
+        except Exception as e:
+            raise Exception(f"Failed to save profile: {e}")
+
+    def get_profile(self, profile_id: str):
+        response = None
+        try:
+            response = self._client.get_object(BUCKET_NAME, f"profiles/{profile_id}.folded")
+            return response.read().decode("utf-8")
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            raise Exception(f"MinIO error: {e}")
+        finally:
+            if response:
+                response.close()
+                response.release_conn()
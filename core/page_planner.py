@@ -0,0 +1,62 @@
+from typing import List, Tuple
+
+# Bobot perkiraan biaya konversi docling per halaman. Gambar memicu model
+# layout/gambar yang mahal; teks padat menambah sel yang harus diurai.
+BASE_PAGE_COST = 1.0
+IMAGE_COST = 0.5
+MAX_COUNTED_IMAGES = 10
+CHARS_PER_COST_UNIT = 3000
+
+
+def estimate_page_cost(image_count: int, text_chars: int) -> float:
+    """Biaya relatif satu halaman; halaman teks biasa bernilai sekitar 1."""
+    return (
+        BASE_PAGE_COST
+        + IMAGE_COST * min(image_count, MAX_COUNTED_IMAGES)
+        + text_chars / CHARS_PER_COST_UNIT
+    )
+
+
+def plan_page_ranges(
+    page_costs: List[float],
+    max_cost: float,
+    max_pages: int,
+    offset: int = 0
+) -> List[Tuple[int, int]]:
+    """
+    Bagi halaman menjadi rentang [start, end) berurutan dengan total biaya
+    paling banyak `max_cost` dan paling banyak `max_pages` halaman. Halaman
+    yang biayanya sendiri melebihi `max_cost` menjadi rentang satu halaman.
+    `offset` ditambahkan ke nomor halaman (untuk merencanakan sub-rentang).
+    """
+    ranges = []
+    start = 0
+    cost = 0.0
+    for index, page_cost in enumerate(page_costs):
+        pages = index - start
+        if pages and (cost + page_cost > max_cost or pages >= max_pages):
+            ranges.append((offset + start, offset + index))
+            start, cost = index, 0.0
+        cost += page_cost
+    if start < len(page_costs):
+        ranges.append((offset + start, offset + len(page_costs)))
+    return ranges
+
+
+def split_page_range(start_page: int, end_page: int) -> List[Tuple[int, int]]:
+    """Bagi dua rentang yang gagal dikonversi; rentang satu halaman tidak bisa dibagi lagi."""
+    if end_page - start_page <= 1:
+        return [(start_page, end_page)]
+    middle = (start_page + end_page) // 2
+    return [(start_page, middle), (middle, end_page)]
+
+
+def page_runs(pages: List[int]) -> List[Tuple[int, int]]:
+    """Kelompokkan nomor halaman menjadi rentang [start, end) yang berurutan."""
+    runs = []
+    for page in sorted(set(pages)):
+        if runs and runs[-1][1] == page:
+            runs[-1] = (runs[-1][0], page + 1)
+        else:
+            runs.append((page, page + 1))
+    return runs
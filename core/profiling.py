@@ -0,0 +1,143 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+import asyncio
+import os
+import sys
+import threading
+
+# Profiler milik request yang sedang berjalan; ikut tersalin ke task dan thread
+# yang dibuat lewat `to_thread`, `create_task`, atau `run_in_context`
+_active_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+class SamplingProfiler:
+    """
+    Profiler sampling ringan untuk satu thread. Thread terpisah mengambil stack
+    thread target setiap `interval` detik lewat sys._current_frames() dan
+    mengumpulkannya dalam format folded stacks (`a;b;c <jumlah>`) yang bisa
+    dibaca flamegraph.pl, speedscope, atau inferno.
+
+    Tidak ada hook yang terpasang selama profiler tidak dijalankan, jadi
+    request tanpa profiling tidak menanggung overhead apa pun.
+
+    Kerja request di thread lain (`to_thread`, executor reranker) ikut disampel
+    selama thread itu menjalankannya. Jika ada task yang didaftarkan lewat
+    `add_task`, thread target (event loop) hanya disampel saat salah satu task
+    tersebut yang sedang berjalan, sehingga request lain di loop yang sama tidak ikut.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005, max_depth: int = 128) -> None:
+        self._thread_id = thread_id or threading.get_ident()
+        self._interval = interval
+        self._max_depth = max_depth
+        self._stacks = Counter()
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self._lock = threading.Lock()
+        self._threads = Counter()
+        self._loop = None
+        self._tasks = set()
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self._stacks.values())
+
+    def start(self) -> "SamplingProfiler":
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+        return self
+
+    def add_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self._threads[thread_id] += 1
+
+    def remove_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def add_task(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._loop = task.get_loop()
+            self._tasks.add(task)
+
+    def _sampled_threads(self):
+        with self._lock:
+            threads = set(self._threads)
+            tasks = set(self._tasks)
+            loop = self._loop
+        if not tasks or asyncio.current_task(loop) in tasks:
+            threads.add(self._thread_id)
+        return threads
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            threads = self._sampled_threads()
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._stacks[self._collapse(frame)] += 1
+
+    def _collapse(self, frame) -> str:
+        frames = []
+        while frame is not None and len(frames) < self._max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        # Folded stacks ditulis dari root ke leaf
+        return ";".join(reversed(frames))
+
+    def to_folded(self) -> str:
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self._stacks.most_common()
+        )
+
+
+def activate(profiler: SamplingProfiler) -> None:
+    """Jadikan `profiler` profiler request untuk context (task) saat ini dan ikuti task ini."""
+    _active_profiler.set(profiler)
+    profiler.add_task(asyncio.current_task())
+
+
+def run_in_context(func, *args, **kwargs):
+    """Jalankan `func` di thread saat ini; thread ini ikut disampel profiler request yang aktif."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    thread_id = threading.get_ident()
+    profiler.add_thread(thread_id)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.remove_thread(thread_id)
+
+
+async def to_thread(func, *args, **kwargs):
+    """Seperti asyncio.to_thread, tetapi thread pekerja ikut disampel profiler request."""
+    return await asyncio.to_thread(run_in_context, func, *args, **kwargs)
+
+
+def create_task(coro) -> asyncio.Task:
+    """Seperti asyncio.create_task, tetapi task baru ikut disampel profiler request."""
+    task = asyncio.create_task(coro)
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.add_task(task)
+    return task
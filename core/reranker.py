@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Sequence
+from .metrics import RERANK_LATENCY, RERANK_OUTCOMES
+from .profiling import run_in_context
+from settings import LOCAL_STORAGE_PATH
+import contextvars
+import logging
+import threading
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def _hit_id(hit) -> Any:
+    return hit.id
+
+
+def _hit_text(hit) -> str:
+    return hit.payload.get("document") or ""
+
+
+class Reranker:
+    """
+    Rerank kandidat hasil fusion hybrid_search dengan cross-encoder ONNX lokal
+    (fastembed TextCrossEncoder). Kandidat dinilai per batch di satu thread
+    khusus; skor disimpan per (query, point ID) sehingga pertanyaan berulang
+    hanya menilai kandidat baru. Jika penilaian melewati `timeout`, urutan
+    fusion yang dipakai dan skor yang sedang dihitung tetap masuk cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        threads: Optional[int] = None,
+        cache_size: int = 10000,
+        timeout: float = 1.5,
+        max_pending: int = 2,
+        score: Callable[[str, List[str]], List[float]] = None
+    ) -> None:
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._score = score
+        self._load_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending = 0
+        # Satu thread: ONNX Runtime sudah memakai `threads` untuk satu batch,
+        # penilaian paralel hanya akan saling berebut core
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+    def _load_model(self) -> Callable[[str, List[str]], List[float]]:
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
+        model = TextCrossEncoder(
+            model_name=self.model_name,
+            cache_dir=f"./{LOCAL_STORAGE_PATH}/models/reranker",
+            threads=self.threads
+        )
+        logging.info(f"Reranker model {self.model_name} loaded.")
+        return lambda query, texts: [float(score) for score in model.rerank(query, texts, batch_size=self.batch_size)]
+
+    def _score_texts(self, query: str, texts: List[str]) -> List[float]:
+        if self._score is None:
+            with self._load_lock:
+                if self._score is None:
+                    self._score = self._load_model()
+        return self._score(query, texts)
+
+    def warm_up(self) -> None:
+        """Muat model di thread reranker agar request pertama tidak menunggu unduhan/muat model."""
+        self._executor.submit(self._score_texts, "warm up", ["warm up"])
+
+    def _cache_key(self, query: str, point_id: Any, text: str):
+        # Hash teks ikut disimpan: ID point bisa dipakai ulang oleh dokumen lain setelah re-index
+        return (query, point_id, hash(text))
+
+    def _fill_cache(self, query: str, keys: List[tuple], texts: List[str]) -> None:
+        scores = self._score_texts(query, texts)
+        with self._cache_lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _finish_pending(self, _future) -> None:
+        with self._cache_lock:
+            self._pending -= 1
+
+    def rerank(
+        self,
+        query: str,
+        candidates: Sequence,
+        top_k: int,
+        key: Callable[[Any], Any] = _hit_id,
+        text: Callable[[Any], str] = _hit_text
+    ) -> List:
+        """
+        Urutkan ulang `candidates` (urutan fusion) menurut skor cross-encoder dan
+        kembalikan `top_k` teratas. Saat timeout, sibuk, atau gagal, kembalikan
+        `top_k` teratas dari urutan fusion.
+        """
+        candidates = list(candidates)
+        if not candidates:
+            return []
+        started_at = time.perf_counter()
+        keys = [self._cache_key(query, key(item), text(item)) for item in candidates]
+
+        with self._cache_lock:
+            missing = [index for index, cache_key in enumerate(keys) if cache_key not in self._cache]
+            busy = bool(missing) and self._pending >= self.max_pending
+            if missing and not busy:
+                self._pending += 1
+
+        if busy:
+            RERANK_OUTCOMES.labels(outcome="busy").inc()
+            return candidates[:top_k]
+
+        if missing:
+            # Context request ikut dibawa agar thread reranker tersampel saat request diprofil
+            future = self._executor.submit(
+                contextvars.copy_context().run,
+                run_in_context,
+                self._fill_cache,
+                query,
+                [keys[index] for index in missing],
+                [text(candidates[index]) for index in missing]
+            )
+            future.add_done_callback(self._finish_pending)
+            try:
+                future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                logging.warning(f"Rerank of {len(missing)} candidates exceeded {self.timeout}s; using fused order.")
+                RERANK_OUTCOMES.labels(outcome="timeout").inc()
+                return candidates[:top_k]
+            except Exception as e:
+                logging.error(f"Rerank failed, using fused order: {e}")
+                RERANK_OUTCOMES.labels(outcome="error").inc()
+                return candidates[:top_k]
+
+        scores = []
+        with self._cache_lock:
+            for cache_key in keys:
+                score = self._cache.get(cache_key)
+                if score is not None:
+                    self._cache.move_to_end(cache_key)
+                scores.append(float("-inf") if score is None else score)
+        # sorted stabil: skor sama tetap mengikuti urutan fusion
+        order = sorted(range(len(candidates)), key=lambda index: scores[index], reverse=True)
+        RERANK_LATENCY.observe(time.perf_counter() - started_at)
+        RERANK_OUTCOMES.labels(outcome="reranked" if missing else "cached").inc()
+        return [candidates[index] for index in order[:top_k]]
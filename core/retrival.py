@@ -2,39 +2,90 @@ import asyncio
 import google.generativeai as genai
 from service.qdrant_client import QdrantClientService
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from qdrant_client.http.models import NamedVector
-from .utils import classify_intent, clean_sql
+from .utils import classify_intent, classify_intent_with_ambiguity, clean_sql, format_db_rows, summarize_numeric_columns
+from .metrics import (
+    EMBEDDING_LATENCY,
+    SQL_PLAN_CACHE_LOOKUPS,
+    SQL_PLAN_CACHE_SAVED_SECONDS,
+    PROMPT_TOKENS,
+    CONTEXT_CHUNKS_DROPPED,
+    SPECULATIVE_RETRIEVAL_OUTCOMES
+)
+from .context_packer import ContextPacker
+from .reranker import Reranker
+from . import profiling
+from .llm_gateway import LLMGateway
+from .sql_plan_cache import SQLPlanCache, UnsafeSQLError, normalize_query, ensure_read_only, bind_names
 from settings import (
     GOOGLE_API_KEY,
     VECTOR_COLLECTION_NAME,
-    DATABASE_URL
+    LLM_MODEL_NAME,
+    SQL_PLAN_CACHE_SIZE,
+    DB_MAX_ROWS,
+    SQL_QUERY_ROLE,
+    DB_CONTEXT_MAX_TOKENS,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_DEDUP_THRESHOLD,
+    LOCAL_TOKENIZER_PATH,
+    SPECULATIVE_RETRIEVAL_ENABLED,
+    RETRIEVAL_DEADLINE_SECONDS,
+    SPECULATIVE_MERGE_GRACE_SECONDS,
+    RERANK_ENABLED,
+    RERANK_MODEL,
+    RERANK_CANDIDATES,
+    RERANK_TOP_K,
+    RERANK_BATCH_SIZE,
+    RERANK_THREADS,
+    RERANK_TIMEOUT_SECONDS,
+    RERANK_CACHE_SIZE
 )
 import logging
+import time
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 genai.configure(api_key=GOOGLE_API_KEY)
+
+# Dipakai bersama oleh semua request karena DocumentRetrieval dibuat per request
+sql_plan_cache = SQLPlanCache(max_size=SQL_PLAN_CACHE_SIZE)
+# Tokenizer dimuat sekali saat konteks pertama disusun
+context_packer = ContextPacker(
+    max_tokens=CONTEXT_MAX_TOKENS,
+    dedup_threshold=CONTEXT_DEDUP_THRESHOLD,
+    tokenizer_path=LOCAL_TOKENIZER_PATH
+)
+# Model cross-encoder dimuat sekali (warm_up di lifespan) dan dipakai bersama
+reranker = Reranker(
+    model_name=RERANK_MODEL,
+    batch_size=RERANK_BATCH_SIZE,
+    threads=RERANK_THREADS,
+    cache_size=RERANK_CACHE_SIZE,
+    timeout=RERANK_TIMEOUT_SECONDS
+) if RERANK_ENABLED else None
+
 class DocumentRetrieval:
-    def __init__(self, vector_db_client: QdrantClientService):
+    def __init__(self, vector_db_client: QdrantClientService, llm_gateway: LLMGateway = None, db_engine: AsyncEngine = None):
         self.vector_db_client = vector_db_client
-        self.db_engine = create_async_engine(DATABASE_URL) if DATABASE_URL else None
+        # Gateway dibuat sekali di lifespan; fallback ini hanya untuk pemakaian di luar API
+        self.llm_gateway = llm_gateway or LLMGateway(model_name=LLM_MODEL_NAME)
+        # Engine (dan pool koneksinya) dimiliki aplikasi, bukan per request
+        self.db_engine = db_engine
 
     def retrieve(self, query, top_k=10):
-        # Generate embedding for the query using Google Generative AI
-        query_embedding = genai.embed_content(
-            model="models/text-embedding-004",
-            content=query,
-            task_type="retrieval_query"
-        )["embedding"]
+        # Generate embedding for the query with the configured dense backend
+        dense_embedder = self.vector_db_client.dense_embedder
+        with EMBEDDING_LATENCY.labels(model=dense_embedder.label, kind="query").time():
+            query_embedding = dense_embedder.embed_query(query)
 
         # Search in the vector database
         hits = self.vector_db_client.search(
             collection_name=VECTOR_COLLECTION_NAME,
             query_vector=NamedVector(
-                name="models/text-embedding-004", 
+                name=dense_embedder.vector_name,
                 vector=query_embedding
             ),
             limit=top_k
@@ -44,7 +95,7 @@ class DocumentRetrieval:
         # Extract and return the relevant documents
         documents = [
             {
-                "document": hit.payload["document"],
+                "document": hit.payload.get("document", ""),
                 "filename": hit.payload.get("filename"),
                 "page_number": hit.payload.get("page_number")
             }
@@ -53,11 +104,16 @@ class DocumentRetrieval:
         return documents
     
     def retrieve_hybrid(self, query, top_k=10):
-        hits = self.vector_db_client.hybrid_search(query=query, limit=top_k)
+        if reranker:
+            # Ambil lebih banyak kandidat fusion, kirim lebih sedikit chunk ke LLM
+            candidates = self.vector_db_client.hybrid_search(query=query, limit=max(top_k, RERANK_CANDIDATES))
+            hits = reranker.rerank(query, candidates, top_k=min(top_k, RERANK_TOP_K))
+        else:
+            hits = self.vector_db_client.hybrid_search(query=query, limit=top_k)
         
         documents = [
             {
-                "document": hit.payload["document"],
+                "document": hit.payload.get("document", ""),
                 "filename": hit.payload.get("filename"),
                 "page_number": hit.payload.get("page_number")
             }
@@ -65,58 +121,204 @@ class DocumentRetrieval:
         ]
         return documents
     
-    async def retrieve_from_db(self, query: str):
+    def search_batch(self, queries, top_k=10):
+        """Hasil hybrid search terurut untuk banyak query sekaligus, tanpa panggilan LLM."""
+        results = self.vector_db_client.hybrid_search_batch(queries=queries, limit=top_k)
+        return [
+            {
+                "query": query,
+                "hits": [
+                    {
+                        "rank": rank,
+                        "id": hit.id,
+                        "document": hit.payload.get("document", ""),
+                        "filename": hit.payload.get("filename"),
+                        "page_number": hit.payload.get("page_number")
+                    }
+                    for rank, hit in enumerate(hits, start=1)
+                ]
+            }
+            for query, hits in zip(queries, results)
+        ]
+
+    async def _generate_sql(self, question_template: str, params: dict) -> str:
+        if "product" in params:
+            string_rule = """- Untuk pencarian nama produk, gunakan bind parameter :product (nilainya sudah berisi wildcard), contoh:
+        SELECT ... WHERE name ILIKE :product;"""
+        else:
+            string_rule = """- Untuk pencarian string, gunakan ILIKE dengan wildcard, contoh:
+        SELECT ... WHERE name ILIKE '%produk%';"""
+
         prompt = f"""
         Kamu adalah asisten SQL.
-        Pertanyaan user: "{query}"
+        Pertanyaan user: "{question_template}"
         Database schema:
         Tabel predictive_analis(name, prediction_revenue)
 
         Buat SQL valid untuk PostgreSQL:
         - Gunakan kolom "name"
-        - Untuk pencarian string, gunakan ILIKE dengan wildcard, contoh:
-        SELECT ... WHERE name ILIKE '%produk%';
+        {string_rule}
         - Jangan gunakan format markdown, cukup SQL murni.
         """
 
-        raw_sql = genai.GenerativeModel("gemini-1.5-flash").generate_content(prompt).text.strip()
+        started_at = time.perf_counter()
+        raw_sql = await self.llm_gateway.generate(prompt)
+        sql_plan_cache.record_generation(time.perf_counter() - started_at)
         logging.info(f"Generated SQL: {raw_sql}")
-        sql_query = clean_sql(raw_sql)
-        logging.info(f"Cleaned SQL: {sql_query}")
- 
+        return clean_sql(raw_sql)
+
+    async def retrieve_from_db(self, query: str):
         if not self.db_engine:
             raise ValueError("Database engine belum dikonfigurasi")
 
+        # Pertanyaan dengan bentuk yang sama (hanya beda nama produk) memakai SQL yang sama
+        question_template, params = normalize_query(query)
+        sql_query = sql_plan_cache.get(question_template)
+        if sql_query:
+            SQL_PLAN_CACHE_LOOKUPS.labels(result="hit").inc()
+            SQL_PLAN_CACHE_SAVED_SECONDS.inc(sql_plan_cache.average_generation_seconds)
+            logging.info(f"SQL plan cache hit for '{question_template}': {sql_plan_cache.stats()}")
+        else:
+            SQL_PLAN_CACHE_LOOKUPS.labels(result="miss").inc()
+            sql_query = ensure_read_only(await self._generate_sql(question_template, params))
+            if not sql_plan_cache.put(question_template, sql_query, params):
+                logging.warning(f"Generated SQL does not use the expected bind parameters; not caching: {sql_query}")
+        logging.info(f"Cleaned SQL: {sql_query}")
+
+        unknown_binds = bind_names(sql_query) - set(params)
+        if unknown_binds:
+            raise UnsafeSQLError(f"SQL uses unknown bind parameters: {sorted(unknown_binds)}")
+        bind_params = {name: value for name, value in params.items() if name in bind_names(sql_query)}
+
+        # SQL dari LLM dibungkus LIMIT agar Postgres berhenti di batas row, lalu
+        # dibaca lewat server-side cursor tanpa fetchall ke memori.
+        limited_sql = f"SELECT * FROM ({sql_query}) AS llm_query LIMIT {DB_MAX_ROWS + 1}"
+        rows = []
+        truncated = False
         async with AsyncSession(self.db_engine) as session:
-            result = await session.execute(text(sql_query))
-            rows = result.fetchall()
+            # Lapisan kedua di luar ensure_read_only: Postgres sendiri menolak penulisan,
+            # dan role khusus (jika diatur) membatasi tabel serta fungsi yang bisa diakses
+            await session.execute(text("SET TRANSACTION READ ONLY"))
+            if SQL_QUERY_ROLE:
+                role = SQL_QUERY_ROLE.replace('"', '""')
+                await session.execute(text(f'SET LOCAL ROLE "{role}"'))
+            result = await session.stream(text(limited_sql), bind_params)
+            columns = list(result.keys())
+            async for row in result:
+                if len(rows) >= DB_MAX_ROWS:
+                    truncated = True
+                    break
+                rows.append(row)
+            await result.close()
+
+        # Baris ke DB_MAX_ROWS + 1 cukup menandakan "lebih dari DB_MAX_ROWS";
+        # count(*) atas SQL dari LLM akan menjalankan ulang query tanpa batas
+        total_rows = None if truncated else len(rows)
+
+        rows_text, shown_rows = format_db_rows(columns, rows, DB_CONTEXT_MAX_TOKENS)
+        if total_rows is None:
+            omitted_rows = None
+        else:
+            omitted_rows = total_rows - shown_rows
 
-        logging.info(f"Executed SQL: {sql_query} with {rows} rows returned.")
-        return {"sql": sql_query, "rows": rows}
+        logging.info(f"Executed SQL: {sql_query}; fetched {len(rows)} rows, showing {shown_rows}, total {total_rows}.")
+        return {
+            "sql": sql_query,
+            "columns": columns,
+            "rows": rows[:shown_rows],
+            "rows_text": rows_text,
+            "summary": summarize_numeric_columns(columns, rows) if shown_rows < len(rows) or truncated else "",
+            "fetched_rows": len(rows),
+            "total_rows": total_rows,
+            "omitted_rows": omitted_rows
+        }
     
+    async def retrieve_speculative(self, query, top_k=10):
+        """
+        Jalankan retrieval dokumen dan DB bersamaan. Hasil pertama yang berguna
+        dipakai; cabang lain diberi waktu SPECULATIVE_MERGE_GRACE_SECONDS untuk
+        ikut digabung sebelum dibatalkan. Seluruhnya dibatasi RETRIEVAL_DEADLINE_SECONDS.
+        Mengembalikan (documents, db_result); cabang yang kalah bernilai None.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RETRIEVAL_DEADLINE_SECONDS
+        # hybrid_search bersifat sync; thread-nya tetap berjalan sampai selesai
+        # walau task dibatalkan, tetapi hasilnya diabaikan.
+        branches = {
+            profiling.create_task(profiling.to_thread(self.retrieve_hybrid, query, top_k)): "document",
+            profiling.create_task(self.retrieve_from_db(query)): "db"
+        }
+        results = {}
+        pending = set(branches)
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    branch = branches[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logging.warning(f"Speculative {branch} retrieval failed: {e}")
+                        continue
+                    usable = bool(result) if branch == "document" else bool(result and result["rows"])
+                    if usable:
+                        if not results:
+                            deadline = min(deadline, loop.time() + SPECULATIVE_MERGE_GRACE_SECONDS)
+                        results[branch] = result
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if pending:
+            logging.info(f"Cancelled speculative {[branches[task] for task in pending]} retrieval.")
+        outcome = "merged" if len(results) == 2 else next(iter(results), "none")
+        SPECULATIVE_RETRIEVAL_OUTCOMES.labels(outcome=outcome).inc()
+        return results.get("document"), results.get("db")
+
     async def answer_query(self, query, top_k=10):
-        intent = classify_intent(query)  # atau classify_intent_llm(query)
+        if SPECULATIVE_RETRIEVAL_ENABLED and self.db_engine:
+            intent = classify_intent_with_ambiguity(query)
+        else:
+            intent = classify_intent(query)  # atau classify_intent_llm(query)
 
-        if intent == "db":
+        if intent == "ambiguous":
+            documents, db_result = await self.retrieve_speculative(query, top_k=top_k)
+            return self.generate_response_stream(query, documents=documents, db_result=db_result)
+        elif intent == "db":
             db_result = await self.retrieve_from_db(query)
             return self.generate_response_stream(query, db_result=db_result)
         else:
-            documents = self.retrieve_hybrid(query, top_k=top_k)
+            # Pencarian dan rerank bersifat sync; jangan blok event loop
+            documents = await profiling.to_thread(self.retrieve_hybrid, query, top_k)
             return self.generate_response_stream(query, documents=documents)
 
     async def generate_response_stream(self, query, documents=None, db_result=None):
         # Build context dari dokumen kalau ada
         context_parts = []
         if documents:
-            context_parts.append("\n".join([
-                f"[{doc['filename']} - Page {doc['page_number']}]\n{doc['document']}"
-                for doc in documents
-            ]))
+            packed_context, pack_stats = await profiling.to_thread(context_packer.pack, documents)
+            PROMPT_TOKENS.labels(kind="context").observe(pack_stats["tokens"])
+            CONTEXT_CHUNKS_DROPPED.labels(reason="duplicate").inc(pack_stats["duplicate"])
+            CONTEXT_CHUNKS_DROPPED.labels(reason="over_budget").inc(pack_stats["over_budget"])
+            logging.info(f"Packed context: {pack_stats}")
+            context_parts.append(packed_context)
 
         # Build context dari hasil DB kalau ada
+        omitted_note = None
         if db_result:
-            rows_str = "\n".join([str(row) for row in db_result["rows"]])
-            context_parts.append(f"Hasil query database:\nSQL: {db_result['sql']}\nData:\n{rows_str}")
+            db_context = f"Hasil query database:\nSQL: {db_result['sql']}\nData:\n{db_result['rows_text']}"
+            if db_result["omitted_rows"] is None:
+                omitted_note = f"lebih dari {db_result['fetched_rows']} baris, hanya {len(db_result['rows'])} yang ditampilkan"
+            elif db_result["omitted_rows"] > 0:
+                omitted_note = f"{db_result['omitted_rows']} dari {db_result['total_rows']} baris tidak ditampilkan"
+            if omitted_note:
+                db_context += f"\n({omitted_note})"
+            if db_result["summary"]:
+                db_context += f"\nRingkasan {db_result['fetched_rows']} baris yang diambil:\n{db_result['summary']}"
+            context_parts.append(db_context)
 
         context = "\n\n".join(context_parts)
 
@@ -145,13 +347,13 @@ class DocumentRetrieval:
         {context}
         """
 
-        # Streaming dari Gemini
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        stream_coro = model.generate_content_async(prompt, stream=True)
+        prompt_tokens = await profiling.to_thread(context_packer.count_tokens, prompt)
+        PROMPT_TOKENS.labels(kind="prompt").observe(prompt_tokens)
+        logging.info(f"Prompt tokens: {prompt_tokens}")
 
-        stream = await stream_coro
+        # Streaming dari Gemini
+        async for text_chunk in self.llm_gateway.stream(prompt):
+            yield text_chunk
 
-        # Sekarang bisa async for
-        async for chunk in stream:
-            if chunk.candidates and chunk.candidates[0].content.parts:
-                yield chunk.candidates[0].content.parts[0].text
+        if omitted_note:
+            yield f"\n\nCatatan: hasil database terpotong ({omitted_note})."
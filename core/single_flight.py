@@ -0,0 +1,146 @@
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from .metrics import SINGLE_FLIGHT_REQUESTS
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def normalize_query(query: str) -> str:
+    """Pertanyaan yang hanya beda huruf besar/spasi dianggap sama."""
+    return " ".join(query.lower().split())
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        # Event diganti setiap ada perubahan; subscriber yang menunggu event lama dibangunkan
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+
+class Subscription:
+    """
+    Satu penerima stream bersama. Iterasi memutar ulang chunk yang sudah ada lalu
+    mengikuti chunk baru. `close` boleh dipanggil berkali-kali, mis. dari
+    BackgroundTask saat client putus sebelum stream dimulai.
+    """
+
+    def __init__(self, group: "SingleFlight", key: str, flight: _Flight) -> None:
+        self._group = group
+        self._key = key
+        self._flight = flight
+        self._closed = False
+        flight.subscribers += 1
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        flight = self._flight
+        index = 0
+        try:
+            while True:
+                if index < len(flight.chunks):
+                    yield flight.chunks[index]
+                    index += 1
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.changed.wait()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._group._unsubscribe(self._key, self._flight)
+
+
+class SingleFlight:
+    """
+    Menggabungkan request identik yang sedang berjalan: request pertama (leader)
+    menjalankan stream, request lain dengan key yang sama selama stream belum
+    selesai (follower) menerima chunk yang sama. Hasil tidak di-cache; setelah
+    stream selesai request berikutnya menjalankan stream baru. Jika semua
+    subscriber pergi, stream dibatalkan.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._flights: Dict[str, _Flight] = {}
+
+    def join(self, key: str) -> Optional[Subscription]:
+        """Ikut stream yang sedang berjalan untuk `key`, atau None jika tidak ada."""
+        flight = self._flights.get(key)
+        if flight is None:
+            return None
+        SINGLE_FLIGHT_REQUESTS.labels(name=self._name, role="follower").inc()
+        return Subscription(self, key, flight)
+
+    def lead(
+        self,
+        key: str,
+        stream_factory: Callable[[], AsyncIterator[str]],
+        on_done: Optional[Callable[[], None]] = None
+    ) -> Subscription:
+        """
+        Mulai stream baru untuk `key`. Pemanggil memastikan `join(key)` mengembalikan
+        None tanpa `await` di antaranya. Stream dijalankan sebagai task terpisah
+        sehingga tetap berjalan untuk follower walau leader putus. `on_done` selalu
+        dipanggil saat task selesai, juga jika dibatalkan sebelum sempat berjalan.
+        """
+        if key in self._flights:
+            raise RuntimeError(f"Flight already running for key: {key}")
+        flight = _Flight()
+        self._flights[key] = flight
+        subscription = Subscription(self, key, flight)
+        flight.task = asyncio.get_running_loop().create_task(self._produce(key, flight, stream_factory))
+        if on_done is not None:
+            flight.task.add_done_callback(lambda task: on_done())
+        SINGLE_FLIGHT_REQUESTS.labels(name=self._name, role="leader").inc()
+        return subscription
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def _produce(self, key: str, flight: _Flight, stream_factory: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for chunk in stream_factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = RuntimeError(f"Shared {self._name} stream was cancelled.")
+            raise
+        except Exception as e:
+            logging.error(f"Shared {self._name} stream failed: {e}")
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _unsubscribe(self, key: str, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers <= 0 and not flight.done:
+            # Tidak ada lagi yang menunggu jawaban ini: bebaskan slot LLM.
+            # Key dilepas segera agar request baru tidak ikut stream yang dibatalkan.
+            self._forget(key, flight)
+            if flight.task is not None:
+                flight.task.cancel()
+            # Task yang dibatalkan sebelum berjalan tidak sempat masuk `finally` di _produce
+            flight.done = True
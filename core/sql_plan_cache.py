@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import re
+import threading
+
+# Nama produk diambil dari teks setelah kata "produk" sampai kata penghubung/tanda baca
+PRODUCT_PATTERN = re.compile(
+    r"\bproduk\s+(?P<name>.+?)(?=\s+(?:di|pada|untuk|tahun|bulan|minggu|periode|dan|atau|selama)\b|[?.!,]|$)"
+)
+ALLOWED_TABLES = {"predictive_analis"}
+FORBIDDEN_KEYWORDS = re.compile(
+    r"\b(insert|update|delete|drop|alter|create|truncate|grant|revoke|copy|merge|call|do)\b",
+    re.IGNORECASE
+)
+# Fungsi yang boleh dipanggil SQL hasil LLM; fungsi lain (pg_read_file, dblink, ...) ditolak
+ALLOWED_FUNCTIONS = {
+    "count", "sum", "avg", "min", "max", "round", "coalesce", "nullif", "greatest", "least",
+    "lower", "upper", "trim", "length", "concat", "substring", "replace", "abs", "ceil", "floor",
+    "cast", "extract", "date_trunc", "date_part", "to_char", "to_date", "now", "age",
+    "stddev", "variance", "string_agg", "array_agg", "percentile_cont",
+    "row_number", "rank", "dense_rank", "lag", "lead"
+}
+# Kata kunci SQL yang wajar diikuti "(" dan bukan pemanggilan fungsi
+PAREN_KEYWORDS = {
+    "select", "from", "join", "where", "and", "or", "not", "in", "exists", "any", "all", "as",
+    "on", "using", "values", "over", "filter", "within", "when", "then", "else", "by", "case",
+    "having", "union", "intersect", "except", "lateral", "distinct", "between", "like", "ilike", "is"
+}
+# Fungsi yang argumennya memakai kata FROM (mis. EXTRACT(year FROM tanggal))
+FROM_ARGUMENT_FUNCTIONS = {"extract", "substring", "trim", "position", "overlay"}
+# Kata kunci yang mengakhiri daftar tabel setelah FROM (JOIN ... ON tetap bagian daftar)
+FROM_LIST_END = {
+    "where", "group", "order", "limit", "offset", "having", "union", "intersect", "except",
+    "window", "fetch", "for"
+}
+TOKEN_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[a-zA-Z_][\w$]*(?:\.[a-zA-Z_][\w$]*)*|::|\S")
+CTE_PATTERN = re.compile(r"(?:\bwith\s+(?:recursive\s+)?|,)\s*([a-zA-Z_]\w*)\s+as\s*\(", re.IGNORECASE)
+# `:nama` adalah bind parameter, `::tipe` adalah cast PostgreSQL
+BIND_PATTERN = re.compile(r"(?<![:\w]):([a-zA-Z_]\w*)")
+
+
+class UnsafeSQLError(ValueError):
+    pass
+
+
+def normalize_query(query: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Ubah pertanyaan menjadi template berparameter. Nama produk diganti
+    `:product` dan dikembalikan sebagai bind parameter (dengan wildcard ILIKE).
+
+    "Berapa prediksi revenue produk Kopi Bubuk?" ->
+        ("berapa prediksi revenue produk :product", {"product": "%kopi bubuk%"})
+    """
+    text = " ".join(query.lower().split())
+    params = {}
+
+    match = PRODUCT_PATTERN.search(text)
+    if match:
+        name = match.group("name").strip(" '\"")
+        if name:
+            params["product"] = f"%{name}%"
+            text = text[:match.start("name")] + ":product" + text[match.end("name"):]
+
+    template = re.sub(r"[^\w:\s]", "", text)
+    template = " ".join(template.split())
+    return template, params
+
+
+def _tokens(sql: str):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(sql):
+        if token.startswith("'"):
+            continue  # literal string tidak pernah berisi nama tabel atau fungsi
+        if token.startswith('"'):
+            token = token[1:-1].replace('""', '"')
+        tokens.append(token.lower())
+    return tokens
+
+
+def _is_name(token: str) -> bool:
+    return bool(re.match(r"[a-z_]", token))
+
+
+def _check_functions(tokens) -> None:
+    for index, token in enumerate(tokens[:-1]):
+        if tokens[index + 1] == "(" and _is_name(token) and token not in PAREN_KEYWORDS and token not in ALLOWED_FUNCTIONS:
+            raise UnsafeSQLError(f"SQL calls a function that is not allowed: {token}")
+
+
+def _referenced_tables(tokens) -> set:
+    """
+    Nama tabel di setiap daftar FROM (termasuk join dengan koma) dan setelah JOIN.
+    Subquery diperiksa lewat FROM miliknya sendiri.
+    """
+    tables = set()
+    openers = []  # token sebelum setiap "(" yang masih terbuka
+    from_lists = set()  # kedalaman kurung yang sedang berada di daftar FROM
+    expect_table = False
+    previous = None
+    for index, token in enumerate(tokens):
+        depth = len(openers)
+        if token == "(":
+            expect_table = False  # subquery atau fungsi di posisi tabel
+            openers.append(previous)
+        elif token == ")":
+            if openers:
+                openers.pop()
+            from_lists.discard(depth)
+        elif token == "from" and not (openers and openers[-1] in FROM_ARGUMENT_FUNCTIONS):
+            from_lists.add(depth)
+            expect_table = True
+        elif token == "join":
+            expect_table = True
+        elif depth in from_lists and token == ",":
+            expect_table = True
+        elif depth in from_lists and token in FROM_LIST_END:
+            from_lists.discard(depth)
+        elif expect_table and token in ("lateral", "only"):
+            pass
+        elif expect_table:
+            expect_table = False
+            next_token = tokens[index + 1] if index + 1 < len(tokens) else None
+            if _is_name(token) and next_token != "(":
+                tables.add(token)
+        previous = token
+    return tables
+
+
+def ensure_read_only(sql: str) -> str:
+    """
+    Tolak SQL hasil LLM yang bukan satu statement SELECT ke tabel yang diizinkan,
+    atau yang memanggil fungsi di luar ALLOWED_FUNCTIONS.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        raise UnsafeSQLError("Empty SQL statement.")
+    if ";" in sql:
+        raise UnsafeSQLError("Multiple SQL statements are not allowed.")
+    if not re.match(r"^(select|with)\b", sql, re.IGNORECASE):
+        raise UnsafeSQLError("Only SELECT statements are allowed.")
+    if FORBIDDEN_KEYWORDS.search(sql):
+        raise UnsafeSQLError("SQL contains a forbidden keyword.")
+
+    tokens = _tokens(sql)
+    _check_functions(tokens)
+    # Nama CTE boleh dipakai sebagai tabel; isi CTE sendiri tetap diperiksa
+    cte_names = {name.lower() for name in CTE_PATTERN.findall(sql)}
+    tables = _referenced_tables(tokens)
+    if not tables - cte_names or not tables <= ALLOWED_TABLES | cte_names:
+        raise UnsafeSQLError(f"SQL references tables outside {sorted(ALLOWED_TABLES)}.")
+    return sql
+
+
+def bind_names(sql: str) -> set:
+    return set(BIND_PATTERN.findall(sql))
+
+
+class SQLPlanCache:
+    """
+    Cache LRU template pertanyaan -> SQL berparameter yang sudah divalidasi.
+    Statement yang teksnya identik juga dipakai ulang oleh statement cache
+    asyncpg, sehingga hit tidak perlu round trip LLM maupun prepare ulang.
+    """
+
+    def __init__(self, max_size: int = 256) -> None:
+        self._max_size = max_size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._generation_seconds = 0.0
+        self._generations = 0
+
+    @property
+    def average_generation_seconds(self) -> float:
+        return self._generation_seconds / self._generations if self._generations else 0.0
+
+    def get(self, template: str) -> Optional[str]:
+        with self._lock:
+            sql = self._plans.get(template)
+            if sql is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(template)
+            self.hits += 1
+            # Estimasi waktu yang dihemat: rata-rata durasi generate SQL oleh LLM
+            self.saved_seconds += self.average_generation_seconds
+            return sql
+
+    def put(self, template: str, sql: str, params: Dict[str, str]) -> bool:
+        """Simpan hanya jika bind parameter di SQL persis sama dengan parameter template."""
+        if bind_names(sql) != set(params):
+            return False
+        with self._lock:
+            self._plans[template] = sql
+            self._plans.move_to_end(template)
+            while len(self._plans) > self._max_size:
+                self._plans.popitem(last=False)
+        return True
+
+    def record_generation(self, seconds: float) -> None:
+        with self._lock:
+            self._generation_seconds += seconds
+            self._generations += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._plans),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "average_generation_seconds": round(self.average_generation_seconds, 4),
+                "saved_seconds": round(self.saved_seconds, 3)
+            }
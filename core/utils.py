@@ -1,14 +1,75 @@
 import re
+from decimal import Decimal
+
+DB_KEYWORDS = ["prediksi", "produk", "revenue", "penjualan", "analisis", "forecast"]
+# Kata yang mengarah ke isi dokumen desa, dan kata kuantitatif yang bisa dijawab keduanya
+DOCUMENT_KEYWORDS = ["dokumen", "laporan", "peraturan", "perdes", "menurut", "halaman", "pasal", "file", "pdf"]
+QUANTITATIVE_KEYWORDS = ["berapa", "jumlah", "total", "rata-rata", "tren", "tertinggi", "terendah", "data"]
+
+def _keyword_hits(query: str, keywords) -> int:
+    return sum(1 for k in keywords if re.search(rf"\b{k}\b", query))
 
 def classify_intent(query: str) -> str:
     # Regex/keyword untuk deteksi intent DB
-    db_keywords = ["prediksi", "produk", "revenue", "penjualan", "analisis", "forecast"]
-    if any(re.search(rf"\b{k}\b", query.lower()) for k in db_keywords):
+    if _keyword_hits(query.lower(), DB_KEYWORDS):
+        return "db"
+    return "document"
+
+def classify_intent_with_ambiguity(query: str) -> str:
+    """
+    Seperti classify_intent, tetapi mengembalikan "ambiguous" jika pertanyaan
+    memuat sinyal DB sekaligus sinyal dokumen, atau hanya sinyal kuantitatif
+    tanpa kata kunci DB yang jelas.
+    """
+    text = query.lower()
+    db_hits = _keyword_hits(text, DB_KEYWORDS)
+    document_hits = _keyword_hits(text, DOCUMENT_KEYWORDS)
+    if db_hits and document_hits:
+        return "ambiguous"
+    if db_hits:
         return "db"
+    if not document_hits and _keyword_hits(text, QUANTITATIVE_KEYWORDS):
+        return "ambiguous"
     return "document"
 
 def clean_sql(sql_query: str) -> str:
     # Hapus blok markdown ```sql ... ```
     sql_query = re.sub(r"```sql", "", sql_query, flags=re.IGNORECASE)
     sql_query = sql_query.replace("```", "")
-    return sql_query.strip()
\ No newline at end of file
+    return sql_query.strip()
+
+def estimate_tokens(text: str) -> int:
+    # Perkiraan kasar ~4 karakter per token, cukup untuk membatasi ukuran prompt
+    return (len(text) + 3) // 4 if text else 0
+
+def format_db_rows(columns, rows, max_tokens: int, count_tokens=estimate_tokens):
+    """
+    Render hasil query sebagai tabel ringkas (header sekali, satu baris per row)
+    sampai anggaran token habis. Mengembalikan (teks, jumlah row yang ditampilkan).
+    """
+    header = " | ".join(str(column) for column in columns)
+    lines = [header]
+    used_tokens = count_tokens(header)
+    shown = 0
+    for row in rows:
+        line = " | ".join("" if value is None else str(value) for value in row)
+        line_tokens = count_tokens(line)
+        if used_tokens + line_tokens > max_tokens:
+            break
+        lines.append(line)
+        used_tokens += line_tokens
+        shown += 1
+    return "\n".join(lines), shown
+
+def summarize_numeric_columns(columns, rows) -> str:
+    """Ringkasan min/max/total kolom numerik untuk row yang diambil."""
+    summaries = []
+    for index, column in enumerate(columns):
+        values = [
+            row[index] for row in rows
+            if isinstance(row[index], (int, float, Decimal)) and not isinstance(row[index], bool)
+        ]
+        if not values:
+            continue
+        summaries.append(f"{column}: min={min(values)}, max={max(values)}, total={sum(values)}")
+    return "\n".join(summaries)
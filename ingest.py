@@ -0,0 +1,192 @@
+"""
+Ingestion massal dari direktori lokal atau prefix MinIO tanpa lewat /api/upload.
+Setiap proses worker memuat DocumentProcessor sendiri dan menjalankan pipeline
+yang sama dengan Celery worker; proses utama membuat point dan melakukan upsert
+Qdrant secara batch. File lokal ikut di-upload ke MinIO (kecuali --no-upload)
+agar tetap bisa di-re-index dengan reindex.py; nama objeknya diturunkan
+dari isi file sehingga menjalankan ulang pada direktori yang sama menimpa point
+yang sama, bukan menggandakannya.
+
+    python ingest.py --dir /data/arsip-desa --workers 4
+    python ingest.py --minio-prefix 2024 --workers 2 --upsert-batch 512
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from service.qdrant_client import QdrantClientService
+from settings import VECTOR_DB_URL, LOCAL_STORAGE_PATH
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+ACCEPTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+_processor = None
+
+
+def _init_worker():
+    # Model docling/BM25/ColBERT dimuat sekali per proses, sama seperti worker Celery
+    global _processor
+    from core.document_processor import DocumentProcessor
+    _processor = DocumentProcessor()
+
+
+def _page_count(file_path: str) -> int:
+    try:
+        return _processor.get_page_count(file_path)
+    except Exception:
+        return 0
+
+
+def stable_object_name(file_path: str, file_name: str) -> str:
+    """
+    Nama objek MinIO dari hash isi file. ID point diturunkan dari nama file, jadi
+    menjalankan ulang ingest pada direktori yang sama menimpa point yang sama.
+    """
+    from core.document_processor import file_sha256
+    return f"{file_sha256(file_path)[:16]}_{file_name}"
+
+
+def process_local_file(file_path: str, file_name: str, upload: bool) -> dict:
+    if upload:
+        from core.minio import FileProcessor
+        file_name = FileProcessor().upload_local_file(file_path, stable_object_name(file_path, file_name))
+    processed_data = _processor.process(file_path=file_path, filename=file_name)
+    return {"processed_data": processed_data, "pages": _page_count(file_path)}
+
+
+def process_minio_object(file_name: str) -> dict:
+    local_path = _processor.download_file_to_local(
+        file_name,
+        local_path=f"{LOCAL_STORAGE_PATH}/documents/ingest_{os.getpid()}_{file_name}"
+    )
+    try:
+        processed_data = _processor.process(file_path=local_path, filename=file_name)
+        return {"processed_data": processed_data, "pages": _page_count(local_path)}
+    finally:
+        try:
+            os.remove(local_path)
+        except OSError:
+            pass
+
+
+def find_local_files(directory: str) -> list:
+    """Pasangan (path, nama file). Nama memuat path relatif agar file senama di subfolder tidak bentrok."""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.lower().endswith(ACCEPTED_EXTENSIONS):
+                path = os.path.join(root, name)
+                files.append((path, os.path.relpath(path, directory).replace(os.sep, "_")))
+    return sorted(files)
+
+
+class PointBuffer:
+    """Kumpulkan point dari banyak dokumen lalu upsert ke Qdrant per batch."""
+
+    def __init__(self, qdrant_client: QdrantClientService, batch_size: int) -> None:
+        self._qdrant_client = qdrant_client
+        self._batch_size = batch_size
+        self._points = []
+
+    def add(self, processed_data: dict) -> int:
+        # ID per (file, chunk): aman dijalankan bersamaan dengan worker Celery dan consumer
+        points = self._qdrant_client.create_points(processed_data)
+        self._points.extend(points)
+        if len(self._points) >= self._batch_size:
+            self.flush()
+        return len(points)
+
+    def flush(self):
+        if self._points:
+            self._qdrant_client.insert_points(self._points, batch_size=self._batch_size)
+            self._points = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion massal dokumen ke Qdrant")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="Direktori lokal berisi dokumen (rekursif)")
+    source.add_argument("--minio-prefix", help="Prefix objek di bucket MinIO; string kosong untuk semua")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--upsert-batch", type=int, default=256)
+    parser.add_argument("--no-upload", action="store_true", help="Jangan simpan file lokal ke MinIO")
+    args = parser.parse_args()
+
+    if args.dir:
+        sources = find_local_files(args.dir)
+    else:
+        from core.minio import FileProcessor
+        sources = FileProcessor().list_documents(prefix=args.minio_prefix)
+    if not sources:
+        raise SystemExit("No documents found.")
+
+    qdrant_client = QdrantClientService(host=VECTOR_DB_URL, https=False)
+    if not qdrant_client.connect():
+        raise SystemExit(f"Failed to connect to Qdrant at {VECTOR_DB_URL}")
+    buffer = PointBuffer(qdrant_client, args.upsert_batch)
+
+    total = len(sources)
+    done = pages = chunks = 0
+    failures = []
+    failed_pages = {}
+    started_at = time.perf_counter()
+    print(f"Ingesting {total} documents with {args.workers} workers...")
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as executor:
+        if args.dir:
+            futures = {
+                executor.submit(process_local_file, path, name, not args.no_upload): path
+                for path, name in sources
+            }
+        else:
+            futures = {executor.submit(process_minio_object, name): name for name in sources}
+
+        for future in as_completed(futures):
+            name = futures[future]
+            done += 1
+            try:
+                result = future.result()
+                chunks += buffer.add(result["processed_data"])
+                pages += result["pages"]
+                status = "ok"
+                # Nomor halaman dilaporkan mulai dari 1, sama dengan yang dilihat pengguna di PDF
+                missing = [page + 1 for page in result["processed_data"].get("failed_pages", [])]
+                if missing:
+                    failed_pages[name] = missing
+                    status = f"ok ({len(missing)} pages failed)"
+            except Exception as e:
+                logging.error(f"Failed to ingest {name}: {e}")
+                failures.append(name)
+                status = "FAILED"
+            elapsed = time.perf_counter() - started_at
+            print(
+                f"[{done}/{total}] {status} {name} | {pages / elapsed:.2f} pages/s "
+                f"{chunks / elapsed:.2f} chunks/s | failures: {len(failures)}, with failed pages: {len(failed_pages)}",
+                flush=True
+            )
+    buffer.flush()
+    qdrant_client.disconnect()
+
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"Done in {elapsed:.1f}s: {total - len(failures)} documents, {pages} pages, {chunks} chunks "
+        f"({pages / elapsed:.2f} pages/s, {chunks / elapsed:.2f} chunks/s)."
+    )
+    if failures:
+        print(f"{len(failures)} failed:")
+        for name in failures:
+            print(f"  {name}")
+    if failed_pages:
+        print(f"{len(failed_pages)} indexed with failed pages:")
+        for name, missing in sorted(failed_pages.items()):
+            print(f"  {name}: pages {', '.join(str(page) for page in missing)}")
+    if failures or failed_pages:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,41 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from service.qdrant_client import QdrantClientService
-from service.rabbitmq_producer import RabbitmqProducer
+from service.rabbitmq_producer import RabbitmqProducer, ConfirmingRabbitmqProducer
 from service.rabbitmq_consumer import RabbitmqConsumer
+from service.job_tracker import JobTracker
+from core.llm_gateway import LLMGateway
+from core.database import create_db_engine
+from core.retrival import reranker
 from routes.uploads import router as uploads_router
 from routes.chat import router as chat_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router
+from routes.profiles import router as profiles_router
+from routes.search import router as search_router
+from routes.documents import router as documents_router
+import asyncio
 import logging
 import threading
 import os
 from settings import (
     RABBITMQ_URL,
     RABBITMQ_SERVICE_NAME,
+    RABBITMQ_DRAIN_TIMEOUT_SECONDS,
+    RABBITMQ_PUBLISHER_CONFIRMS,
     LOCAL_STORAGE_PATH,
-    VECTOR_DB_URL
+    VECTOR_DB_URL,
+    DATABASE_URL,
+    REDIS_URL,
+    JOB_STATUS_TTL_SECONDS,
+    LLM_BACKEND,
+    LLM_MODEL_NAME,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_QUEUE,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    LLM_STUB_TTFT_MS,
+    LLM_STUB_TOKEN_INTERVAL_MS,
+    LLM_STUB_TOKENS
 )
 
 logging.basicConfig(
@@ -24,7 +47,7 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.info("Application startup initiated.") 
-    global qdrant_client, rabbitmq_producer, rabbitmq_consumer  
+    global qdrant_client, rabbitmq_producer, rabbitmq_consumer, job_tracker, llm_gateway, db_engine
 
     if not os.path.exists(LOCAL_STORAGE_PATH):
         os.makedirs(LOCAL_STORAGE_PATH)
@@ -37,20 +60,37 @@ async def lifespan(app: FastAPI):
         logging.error(f"Failed to connect to Qdrant: {e}")
         raise
 
+    job_tracker = JobTracker(redis_url=REDIS_URL, ttl_seconds=JOB_STATUS_TTL_SECONDS)
+
+    db_engine = create_db_engine() if DATABASE_URL else None
+
+    llm_gateway = LLMGateway(
+        model_name=LLM_MODEL_NAME,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        max_queue=LLM_MAX_QUEUE,
+        queue_timeout=LLM_QUEUE_TIMEOUT_SECONDS,
+        backend=LLM_BACKEND,
+        stub_options={
+            "ttft": LLM_STUB_TTFT_MS / 1000,
+            "token_interval": LLM_STUB_TOKEN_INTERVAL_MS / 1000,
+            "tokens": LLM_STUB_TOKENS
+        }
+    )
+
+    if reranker:
+        reranker.warm_up()
+
     try:
-        rabbitmq_producer = RabbitmqProducer(rabbitmq_url=RABBITMQ_URL, service_name=RABBITMQ_SERVICE_NAME)
+        producer_class = ConfirmingRabbitmqProducer if RABBITMQ_PUBLISHER_CONFIRMS else RabbitmqProducer
+        rabbitmq_producer = producer_class(rabbitmq_url=RABBITMQ_URL, service_name=RABBITMQ_SERVICE_NAME)
         rabbitmq_producer.connect()
     except Exception as e:
         logging.error(f"Failed to connect to RabbitMQ Producer: {e}")
         raise
 
     try:
-
-        def start_consumer():
-            rabbitmq_consumer = RabbitmqConsumer(rabbitmq_url=RABBITMQ_URL, service_name=RABBITMQ_SERVICE_NAME)
-            rabbitmq_consumer.consume()
-        
-        consumer_thread = threading.Thread(target=start_consumer, daemon=True)
+        rabbitmq_consumer = RabbitmqConsumer(rabbitmq_url=RABBITMQ_URL, service_name=RABBITMQ_SERVICE_NAME)
+        consumer_thread = threading.Thread(target=rabbitmq_consumer.consume, daemon=True)
         consumer_thread.start()
         logging.info("RabbitMQ consumer started in background thread.")
     except Exception as e:
@@ -60,7 +100,9 @@ async def lifespan(app: FastAPI):
     yield
     logging.info("Application shutdown initiated.")
     if rabbitmq_consumer:
-        rabbitmq_consumer.close()
+        # Hentikan konsumsi dan tunggu pesan yang sedang diproses di-ack; consume() menutup koneksi
+        rabbitmq_consumer.stop()
+        await asyncio.to_thread(consumer_thread.join, RABBITMQ_DRAIN_TIMEOUT_SECONDS + 5)
         logging.info("RabbitMQ consumer stopped.")
     if rabbitmq_producer:
         rabbitmq_producer.close()
@@ -68,6 +110,9 @@ async def lifespan(app: FastAPI):
     if qdrant_client:
         qdrant_client.disconnect()
         logging.info("Qdrant client disconnected.")
+    if db_engine:
+        await db_engine.dispose()
+        logging.info("Database engine disposed.")
 
     logging.info("Application shutdown complete.")
 
@@ -78,4 +123,9 @@ async def root():
     return {"message": "Hello, World!"}
 
 app.include_router(uploads_router, prefix="/api")
-app.include_router(chat_router, prefix="/api")
\ No newline at end of file
+app.include_router(chat_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(profiles_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
+app.include_router(documents_router, prefix="/api")
+app.include_router(metrics_router)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime
+from . import Base
+from datetime import datetime
+
+
+class ChunkText(Base):
+    """Teks chunk hasil ingestion (zlib), direferensikan `text_key` di payload Qdrant."""
+    __tablename__ = "chunk_texts"
+
+    key = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.now)
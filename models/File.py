@@ -1,17 +1,40 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from . import Base
 from datetime import datetime
 import uuid
 
 class File(Base):
+    """
+    Katalog dokumen: satu baris per upload, diisi saat upload dan diperbarui
+    worker selama ingestion. Status: queued, processing, indexed, failed.
+    """
     __tablename__ = "files"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    job_id = Column(String, unique=True, index=True)
     file_name = Column(String, index=True)
+    original_name = Column(String)
     file_path = Column(String, unique=True, index=True)
-    file_size = Column(Integer)
+    file_size = Column(BigInteger)
     file_type = Column(String)
-    created_at = Column(DateTime, default=datetime.now())
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    content_sha256 = Column(String(64), index=True)
+    page_count = Column(Integer)
+    chunk_count = Column(Integer)
+    failed_page_count = Column(Integer)
+    status = Column(String(32), nullable=False, default="queued")
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    processing_seconds = Column(Float)
+    user_id = Column(String, ForeignKey("users.id"), nullable=True)
     owner = relationship("User", back_populates="files")
+
+    __table_args__ = (
+        # Listing /api/documents: keyset pagination terbaru-dulu, dengan atau tanpa filter status
+        Index("ix_files_created_at_id", "created_at", "id"),
+        Index("ix_files_status_created_at_id", "status", "created_at", "id"),
+        # Filter prefix nama file (LIKE 'abc%') memakai index ini di Postgres
+        Index("ix_files_original_name_pattern", "original_name", postgresql_ops={"original_name": "text_pattern_ops"}),
+    )
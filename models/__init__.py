@@ -5,3 +5,4 @@ Base = declarative_base()
 # import semua model agar dikenali SQLAlchemy
 from .User import User
 from .File import File
+from .ChunkText import ChunkText
@@ -0,0 +1,177 @@
+"""
+Re-index blue/green: bangun koleksi berversi baru dari semua dokumen di MinIO,
+lalu pindahkan alias VECTOR_COLLECTION_NAME secara atomik. Pencarian tetap
+memakai koleksi lama sampai alias dipindah.
+
+    python reindex.py --workers 2 --max-points-per-second 200
+    python reindex.py --replace-legacy-collection   # pertama kali, jika VECTOR_COLLECTION_NAME masih koleksi asli
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.document_processor import DocumentProcessor
+from core.minio import FileProcessor
+from service.qdrant_client import QdrantClientService
+from settings import (
+    VECTOR_DB_URL,
+    VECTOR_COLLECTION_NAME,
+    LOCAL_STORAGE_PATH,
+    REINDEX_WORKERS,
+    REINDEX_MAX_POINTS_PER_SECOND
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class Throttle:
+    """Batasi laju upsert (point/detik) bersama untuk semua thread."""
+
+    def __init__(self, rate: float) -> None:
+        self._rate = rate
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self, amount: int) -> None:
+        if self._rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + amount / self._rate
+        time.sleep(max(0.0, start_at - now))
+
+
+class Reindexer:
+    def __init__(self, qdrant_client: QdrantClientService, collection_name: str, throttle: Throttle) -> None:
+        self._qdrant_client = qdrant_client
+        self._collection_name = collection_name
+        self._throttle = throttle
+        self._local = threading.local()
+
+    def _processor(self) -> DocumentProcessor:
+        # Converter docling tidak aman dipakai bersama antar thread
+        if not hasattr(self._local, "processor"):
+            self._local.processor = DocumentProcessor()
+        return self._local.processor
+
+    def index_document(self, file_name: str) -> int:
+        processor = self._processor()
+        local_path = processor.download_file_to_local(
+            file_name,
+            local_path=f"{LOCAL_STORAGE_PATH}/documents/reindex_{file_name}"
+        )
+        try:
+            processed_data = processor.process(file_path=local_path, filename=file_name)
+        finally:
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+
+        # ID point deterministik per (file, chunk): dokumen yang diindeks ulang saat
+        # catch-up menimpa point yang sama, bukan menggandakannya
+        points = self._qdrant_client.create_points(processed_data)
+        for i in range(0, len(points), 25):
+            batch = points[i:i + 25]
+            self._throttle.wait(len(batch))
+            self._qdrant_client.insert_points(batch, collection_name=self._collection_name)
+        return len(points)
+
+    def run(self, file_names, workers: int) -> dict:
+        result = {"documents": 0, "points": 0, "failed": []}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.index_document, name): name for name in file_names}
+            for future in as_completed(futures):
+                file_name = futures[future]
+                try:
+                    result["points"] += future.result()
+                    result["documents"] += 1
+                    logging.info(f"Re-indexed {file_name} ({result['documents']}/{len(futures)}).")
+                except Exception as e:
+                    logging.error(f"Failed to re-index {file_name}: {e}")
+                    result["failed"].append(file_name)
+        return result
+
+    def catch_up(self, file_processor: FileProcessor, indexed: set, workers: int, result: dict) -> None:
+        """
+        Susulkan dokumen MinIO yang belum ada di `indexed` (di-upload selama
+        re-index) lalu tambahkan ke `indexed` dan hasilnya ke `result`.
+        """
+        late_file_names = sorted(set(file_processor.list_documents()) - indexed)
+        if not late_file_names:
+            return
+        logging.info(f"Catching up {len(late_file_names)} documents uploaded during re-index.")
+        late_result = self.run(late_file_names, workers)
+        indexed.update(late_file_names)
+        for key in ("documents", "points"):
+            result[key] += late_result[key]
+        result["failed"] += late_result["failed"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-index semua dokumen ke koleksi baru lalu pindahkan alias")
+    parser.add_argument("--workers", type=int, default=REINDEX_WORKERS)
+    parser.add_argument("--max-points-per-second", type=float, default=REINDEX_MAX_POINTS_PER_SECOND)
+    parser.add_argument("--nice", type=int, default=10, help="Turunkan prioritas CPU agar API tetap responsif")
+    parser.add_argument("--allow-failures", action="store_true", help="Tetap pindahkan alias walau ada dokumen gagal")
+    parser.add_argument("--replace-legacy-collection", action="store_true")
+    parser.add_argument("--drop-old", action="store_true", help="Hapus koleksi lama setelah alias dipindah")
+    args = parser.parse_args()
+
+    if args.nice:
+        os.nice(args.nice)
+
+    qdrant_client = QdrantClientService(host=VECTOR_DB_URL, https=False)
+    if not qdrant_client.connect():
+        raise SystemExit(f"Failed to connect to Qdrant at {VECTOR_DB_URL}")
+
+    collection_name = qdrant_client.versioned_collection_name()
+    qdrant_client._create_collection(collection_name)
+    reindexer = Reindexer(qdrant_client, collection_name, Throttle(args.max_points_per_second))
+    file_processor = FileProcessor()
+
+    started_at = time.perf_counter()
+    file_names = file_processor.list_documents()
+    logging.info(f"Re-indexing {len(file_names)} documents into '{collection_name}' with {args.workers} workers.")
+    result = reindexer.run(file_names, args.workers)
+
+    # Dokumen yang di-upload selama re-index sudah masuk koleksi lama; susulkan sebelum alias dipindah
+    indexed = set(file_names)
+    reindexer.catch_up(file_processor, indexed, args.workers, result)
+
+    elapsed = time.perf_counter() - started_at
+    print(
+        f"Indexed {result['documents']} documents ({result['points']} points) into '{collection_name}' "
+        f"in {elapsed:.1f}s; {len(result['failed'])} failed."
+    )
+    if result["failed"] and not args.allow_failures:
+        raise SystemExit(
+            f"Alias not switched because {len(result['failed'])} documents failed: {result['failed']}. "
+            f"Collection '{collection_name}' was kept for inspection."
+        )
+
+    previous = qdrant_client.switch_alias(collection_name, replace_collection=args.replace_legacy_collection)
+    print(f"Alias '{VECTOR_COLLECTION_NAME}' -> '{collection_name}' (was {previous}).")
+
+    # Upload yang diindeks ke koleksi lama antara catch-up dan pemindahan alias belum
+    # ada di koleksi baru; upload setelah pemindahan sudah langsung masuk lewat alias
+    failed_before_switch = len(result["failed"])
+    reindexer.catch_up(file_processor, indexed, args.workers, result)
+    if len(result["failed"]) > failed_before_switch:
+        print(f"Failed to catch up after alias switch: {result['failed'][failed_before_switch:]}.")
+        if previous and args.drop_old:
+            raise SystemExit(f"Old collection '{previous}' was kept because the final catch-up failed.")
+    if previous and args.drop_old:
+        qdrant_client._client.delete_collection(collection_name=previous)
+        print(f"Dropped old collection '{previous}'.")
+    qdrant_client.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,102 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
 from models.File import File
+import base64
 
-async def save_file(db: AsyncSession, file: File, user_id: str) -> File:
+# Statement Core pada tabel katalog; baris dikembalikan sebagai dict untuk response API
+files = File.__table__
+
+LISTING_COLUMNS = [
+    files.c.id,
+    files.c.job_id,
+    files.c.file_name,
+    files.c.original_name,
+    files.c.file_size,
+    files.c.file_type,
+    files.c.content_sha256,
+    files.c.page_count,
+    files.c.chunk_count,
+    files.c.failed_page_count,
+    files.c.status,
+    files.c.error,
+    files.c.created_at,
+    files.c.started_at,
+    files.c.finished_at,
+    files.c.processing_seconds
+]
+
+
+def encode_cursor(created_at: datetime, file_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{file_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """ValueError jika cursor tidak valid."""
+    try:
+        created_at, file_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), file_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+async def save_files(engine: AsyncEngine, rows: List[Dict[str, any]]) -> None:
+    """Simpan banyak baris katalog dalam satu INSERT (executemany)."""
+    if not rows:
+        return
+    async with engine.begin() as connection:
+        await connection.execute(insert(files), rows)
+
+
+async def list_files(
+    engine: AsyncEngine,
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    name_prefix: Optional[str] = None
+) -> Tuple[List[Dict[str, any]], Optional[str]]:
+    """
+    Halaman katalog terbaru-dulu dengan keyset pagination pada (created_at, id),
+    sehingga biaya tiap halaman tetap walau katalog besar. Mengembalikan
+    (baris, cursor halaman berikutnya atau None).
+    """
+    query = select(*LISTING_COLUMNS).order_by(files.c.created_at.desc(), files.c.id.desc()).limit(limit + 1)
+    if status:
+        query = query.where(files.c.status == status)
+    if name_prefix:
+        escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(files.c.original_name.like(f"{escaped}%", escape="\\"))
+    if cursor:
+        created_at, file_id = decode_cursor(cursor)
+        query = query.where(tuple_(files.c.created_at, files.c.id) < tuple_(created_at, file_id))
+
+    async with engine.connect() as connection:
+        rows = [dict(row) for row in (await connection.execute(query)).mappings()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def update_files_by_job(connection: Connection, updates: Dict[str, Dict[str, any]]) -> None:
     """
-    Save a file to the database.
-    
+    Terapkan update {job_id: {kolom: nilai}}. Update dengan himpunan kolom yang
+    sama dikirim sebagai satu UPDATE executemany.
     """
-    db.add(
-        File(file_size)
-    )
-    await db.commit()
-    await db.refresh(file)
-    return file
\ No newline at end of file
+    groups: Dict[Tuple[str, ...], List[Dict[str, any]]] = {}
+    for job_id, fields in updates.items():
+        columns = tuple(sorted(fields))
+        groups.setdefault(columns, []).append({"b_job_id": job_id, **{f"b_{name}": fields[name] for name in columns}})
+
+    for columns, params in groups.items():
+        statement = (
+            update(files)
+            .where(files.c.job_id == bindparam("b_job_id"))
+            .values({name: bindparam(f"b_{name}") for name in columns})
+        )
+        connection.execute(statement, params)
@@ -1,8 +1,17 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Header
 from fastapi.responses import JSONResponse
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from core.retrival import DocumentRetrieval
+from core.llm_gateway import LLMOverloadedError
+from core.profiling import SamplingProfiler, activate
+from core.minio import FileProcessor
+from core.single_flight import SingleFlight, normalize_query
+from settings import PROFILING_ENABLED, PROFILE_SAMPLE_INTERVAL_MS, CHAT_COALESCING_ENABLED
+import asyncio
 import logging
+import uuid
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,21 +20,109 @@ logging.basicConfig(
 
 router = APIRouter(tags=["Chat"])
 
+# Pertanyaan identik yang sedang dijawab berbagi satu retrieval dan satu stream LLM
+chat_flights = SingleFlight("chat")
+
+def _shared_response(subscription) -> StreamingResponse:
+    return StreamingResponse(
+        subscription,
+        media_type="text/plain",
+        background=BackgroundTask(subscription.close)
+    )
+
+def _save_profile(profile_id: str, profiler: SamplingProfiler):
+    try:
+        FileProcessor().save_profile(profile_id, profiler.to_folded())
+    except Exception as e:
+        logging.error(f"Failed to save chat profile {profile_id}: {str(e)}")
+
 @router.get("/chat/stream")
-async def chat_stream(query: str):
+async def chat_stream(query: str, x_profile: Optional[str] = Header(default=None)):
+    lease = None
     try:
-        from main import qdrant_client
+        from main import qdrant_client, llm_gateway, db_engine
 
         if not qdrant_client or not qdrant_client.connect():
             return JSONResponse(content={"message": "Qdrant client is not connected."}, status_code=500)
 
-        document_retrieval = DocumentRetrieval(vector_db_client=qdrant_client)
+        # Request yang diprofil selalu dijalankan sendiri agar profilnya mencerminkan kerja nyata
+        profiling = PROFILING_ENABLED and x_profile and x_profile.lower() in ("1", "true", "yes")
+        coalesce = CHAT_COALESCING_ENABLED and not profiling
+        key = normalize_query(query)
+        if coalesce:
+            # Follower tidak memakai slot LLM; stream leader sudah memegangnya
+            subscription = chat_flights.join(key)
+            if subscription:
+                return _shared_response(subscription)
+
+        # Admission control: tolak cepat saat antrean LLM penuh daripada stream yang putus di tengah
+        try:
+            lease = await llm_gateway.acquire()
+        except LLMOverloadedError as e:
+            return JSONResponse(
+                content={"message": str(e)},
+                status_code=429,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+        # Profiling hanya aktif jika diizinkan di settings dan diminta lewat header.
+        # Sampel diambil dari task stream request ini di event loop dan dari thread
+        # yang menjalankan retrieval, rerank, dan packing untuknya.
+        profiler = None
+        profile_id = None
+        if profiling:
+            profile_id = f"chat-{uuid.uuid4()}"
+            profiler = SamplingProfiler(interval=PROFILE_SAMPLE_INTERVAL_MS / 1000).start()
+
+        document_retrieval = DocumentRetrieval(
+            vector_db_client=qdrant_client,
+            llm_gateway=llm_gateway,
+            db_engine=db_engine
+        )
+
+        if coalesce:
+            # Leader lain bisa mulai selama menunggu slot LLM
+            subscription = chat_flights.join(key)
+            if subscription:
+                lease.release()
+                return _shared_response(subscription)
+
+            async def shared_stream():
+                stream = await document_retrieval.answer_query(query, top_k=10)
+                async for chunk_text in stream:
+                    yield chunk_text
+
+            # Slot dilepas saat stream bersama selesai, gagal, atau dibatalkan karena semua client putus
+            return _shared_response(chat_flights.lead(key, shared_stream, on_done=lease.release))
+
         async def event_generator():
-            stream = await document_retrieval.answer_query(query, top_k=10)
-            async for chunk_text in stream:
-                yield chunk_text
+            try:
+                if profiler:
+                    activate(profiler)
+                stream = await document_retrieval.answer_query(query, top_k=10)
+                async for chunk_text in stream:
+                    yield chunk_text
+            finally:
+                lease.release()
+                if profiler:
+                    profiler.stop()
+                    await asyncio.to_thread(_save_profile, profile_id, profiler)
+
+        def cleanup():
+            # Menjamin slot dilepas dan profiler berhenti walau client putus sebelum stream dimulai
+            lease.release()
+            if profiler:
+                profiler.stop()
 
-        return StreamingResponse(event_generator(), media_type="text/plain")
+        headers = {"X-Profile-Id": profile_id} if profile_id else None
+        return StreamingResponse(
+            event_generator(),
+            media_type="text/plain",
+            headers=headers,
+            background=BackgroundTask(cleanup)
+        )
     except Exception as e:
+        if lease:
+            lease.release()
         logging.error(f"Error processing chat request: {str(e)}")
         return JSONResponse(content={"message": f"Failed to process chat request: {str(e)}"}, status_code=500)
@@ -0,0 +1,50 @@
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from repository.file_repo import list_files
+from settings import DOCUMENTS_PAGE_MAX_LIMIT
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+router = APIRouter(tags=["Documents"])
+
+
+def _serialize(row: dict) -> dict:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+@router.get("/documents")
+async def list_documents(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    filename: Optional[str] = None
+):
+    """
+    Daftar katalog dokumen terbaru-dulu. Gunakan `next_cursor` dari response
+    sebagai `cursor` untuk halaman berikutnya; `filename` mencocokkan prefix
+    nama file asli.
+    """
+    try:
+        from main import db_engine
+
+        if db_engine is None:
+            return JSONResponse(content={"message": "Document catalog requires DATABASE_URL."}, status_code=503)
+
+        limit = max(1, min(limit, DOCUMENTS_PAGE_MAX_LIMIT))
+        try:
+            rows, next_cursor = await list_files(db_engine, limit, cursor=cursor, status=status, name_prefix=filename)
+        except ValueError as e:
+            return JSONResponse(content={"message": str(e)}, status_code=400)
+
+        return JSONResponse(
+            content={"documents": [_serialize(row) for row in rows], "next_cursor": next_cursor},
+            status_code=200
+        )
+    except Exception as e:
+        logging.error(f"Error listing documents: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to list documents: {str(e)}"}, status_code=500)
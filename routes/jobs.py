@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+router = APIRouter(tags=["Jobs"])
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    try:
+        from main import job_tracker
+
+        # Client Redis memblokir; jangan jalankan di event loop
+        job = await asyncio.to_thread(job_tracker.get, job_id)
+        if job is None:
+            return JSONResponse(content={"message": "Job not found."}, status_code=404)
+
+        return JSONResponse(content=job, status_code=200)
+    except Exception as e:
+        logging.error(f"Error fetching job {job_id}: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to fetch job status: {str(e)}"}, status_code=500)
+
+@router.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: str):
+    try:
+        from main import job_tracker
+
+        batch = await asyncio.to_thread(job_tracker.get_batch, batch_id)
+        if batch is None:
+            return JSONResponse(content={"message": "Batch not found."}, status_code=404)
+
+        return JSONResponse(content=batch, status_code=200)
+    except Exception as e:
+        logging.error(f"Error fetching batch {batch_id}: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to fetch batch status: {str(e)}"}, status_code=500)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from core.metrics import INGESTION_QUEUE_BACKLOG, metrics_registry
+from worker.tasks import get_queue_backlog
+import asyncio
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics")
+async def metrics():
+    # Backlog dibaca dari broker saat scrape, bukan dari background loop
+    INGESTION_QUEUE_BACKLOG.set(await asyncio.to_thread(get_queue_backlog))
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from core.minio import FileProcessor
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+router = APIRouter(tags=["Profiles"])
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """Folded stacks hasil profiling; bisa langsung dibuka di speedscope atau flamegraph.pl."""
+    try:
+        folded = FileProcessor().get_profile(profile_id)
+        if folded is None:
+            return JSONResponse(content={"message": "Profile not found."}, status_code=404)
+
+        return PlainTextResponse(
+            content=folded,
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+        )
+    except Exception as e:
+        logging.error(f"Error fetching profile {profile_id}: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to fetch profile: {str(e)}"}, status_code=500)
@@ -0,0 +1,38 @@
+from typing import List
+from fastapi import APIRouter, Body
+from fastapi.responses import JSONResponse
+from core.retrival import DocumentRetrieval
+from settings import SEARCH_BATCH_MAX_QUERIES
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+router = APIRouter(tags=["Search"])
+
+@router.post("/search/batch")
+async def search_batch(queries: List[str] = Body(embed=True), top_k: int = Body(default=10, embed=True)):
+    """Hybrid search untuk banyak query dalam satu request; hanya hasil terurut, tanpa LLM."""
+    if not queries:
+        return JSONResponse(content={"message": "No queries given."}, status_code=400)
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        return JSONResponse(
+            content={"message": f"Too many queries; at most {SEARCH_BATCH_MAX_QUERIES} per request."},
+            status_code=400
+        )
+    try:
+        from main import qdrant_client, llm_gateway
+
+        if not qdrant_client or not qdrant_client.connect():
+            return JSONResponse(content={"message": "Qdrant client is not connected."}, status_code=500)
+
+        retrieval = DocumentRetrieval(vector_db_client=qdrant_client, llm_gateway=llm_gateway)
+        # Embedding dan request Qdrant bersifat sync; jalankan di thread agar event loop tidak terblok
+        results = await asyncio.to_thread(retrieval.search_batch, queries, top_k)
+        return JSONResponse(content={"results": results}, status_code=200)
+    except Exception as e:
+        logging.error(f"Batch search failed: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to search: {str(e)}"}, status_code=500)
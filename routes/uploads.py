@@ -1,8 +1,23 @@
+from typing import List
+from celery import group
 from fastapi import APIRouter, UploadFile, File
 from fastapi.responses import JSONResponse
 from core.minio import FileProcessor
 from worker.tasks import document_processing_task
+from core.metrics import UPLOAD_BYTES, UPLOAD_SIZE
+from repository.file_repo import save_files
+from settings import (
+    PROFILING_ENABLED,
+    UPLOAD_BATCH_MAX_FILES,
+    UPLOAD_BATCH_CONCURRENCY,
+    PRESIGNED_UPLOAD_EXPIRY_SECONDS,
+    PRESIGNED_UPLOAD_MAX_BYTES
+)
+from datetime import datetime
+import asyncio
 import logging
+import os
+import uuid
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,23 +26,71 @@ logging.basicConfig(
 
 router = APIRouter(tags=["Upload File"])
 
+ACCEPTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+def _document_task_info(result: dict, job_id: str, profile: bool) -> dict:
+    return {
+        "file_name": result["file_name"],
+        "file_path": result["file_path"],
+        "content_type": result["content_type"],
+        "size": result["size"],
+        "upload_time": result["upload_time"],
+        "action": "file_uploaded",
+        "job_id": job_id,
+        "profile": profile and PROFILING_ENABLED
+    }
+
+
+def _catalog_row(result: dict, job_id: str, original_name: str) -> dict:
+    return {
+        "job_id": job_id,
+        "file_name": result["file_name"],
+        "original_name": original_name,
+        "file_path": result["file_path"],
+        "file_size": result["size"],
+        "file_type": result["content_type"],
+        "status": "queued"
+    }
+
+
+async def _save_catalog(rows: List[dict]) -> None:
+    # Katalog dicatat sebelum task dikirim agar update worker selalu menemukan barisnya
+    from main import db_engine
+
+    if db_engine is None:
+        return
+    try:
+        await save_files(db_engine, rows)
+    except Exception as e:
+        # Ingestion tetap berjalan; status job di Redis tidak bergantung pada katalog
+        logging.warning(f"Failed to save {len(rows)} rows to document catalog: {e}")
+
+
+def _file_size(file: UploadFile) -> int:
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
 @router.post("/upload")
-async def upload_file(file: UploadFile = File()):
-    accepted_extensions = ['.pdf', '.docx', '.txt']
-    if not any(file.filename.endswith(ext) for ext in accepted_extensions):
+async def upload_file(file: UploadFile = File(), profile: bool = False):
+    if not file.filename.endswith(ACCEPTED_EXTENSIONS):
         return JSONResponse(content={"message": "Unsupported file type."}, status_code=400)
     try:
         
+        from main import job_tracker
+
         file_processor = FileProcessor()
         result = await file_processor.upload_to_minio(file)
-        document_processing_task.delay({
-            "file_name": result["file_name"],
-            "file_path": result["file_path"],
-            "content_type": result["content_type"],
-            "size": result["size"],
-            "upload_time": result["upload_time"],
-            "action": "file_uploaded"
-        })
+        UPLOAD_BYTES.inc(result["size"])
+        UPLOAD_SIZE.observe(result["size"])
+
+        # Job ID sekaligus dipakai sebagai task ID Celery
+        job_id = str(uuid.uuid4())
+        job_tracker.create(job_id, file_name=result["file_name"])
+        await _save_catalog([_catalog_row(result, job_id, file.filename)])
+        document_processing_task.apply_async(args=[_document_task_info(result, job_id, profile)], task_id=job_id)
         # try:
         #     from main import rabbitmq_producer
 
@@ -50,6 +113,189 @@ async def upload_file(file: UploadFile = File()):
         #         file_processor.delete_from_minio(result["file_name"])
         #     raise Exception(f"Failed to publish message to RabbitMQ: {str(e)}")
 
-        return JSONResponse(content={"filename": file.filename, "message": result}, status_code=200)
+        return JSONResponse(content={"filename": file.filename, "job_id": job_id, "message": result}, status_code=200)
+    except Exception as e:
+        return JSONResponse(content={"message": f"Failed to upload file: {str(e)}"}, status_code=500)
+
+
+@router.post("/upload/batch")
+async def upload_batch(files: List[UploadFile] = File(), profile: bool = False):
+    """
+    Upload banyak file sekaligus. File di-stream ke MinIO secara paralel (paling
+    banyak UPLOAD_BATCH_CONCURRENCY bersamaan), lalu semua task ingestion dikirim
+    dalam satu group Celery. Hasil per file dikembalikan bersama batch ID yang bisa
+    dipantau lewat /api/batches/{batch_id}.
+    """
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        return JSONResponse(
+            content={"message": f"Too many files; at most {UPLOAD_BATCH_MAX_FILES} per batch."},
+            status_code=400
+        )
+
+    from main import job_tracker
+
+    try:
+        file_processor = await asyncio.to_thread(FileProcessor)
+    except Exception as e:
+        return JSONResponse(content={"message": f"Failed to upload files: {str(e)}"}, status_code=500)
+
+    semaphore = asyncio.Semaphore(UPLOAD_BATCH_CONCURRENCY)
+    seen_filenames = set()
+
+    async def upload_one(file: UploadFile) -> dict:
+        if not file.filename.endswith(ACCEPTED_EXTENSIONS):
+            return {"filename": file.filename, "status": "rejected", "message": "Unsupported file type."}
+        # Nama objek MinIO hanya diberi prefix timestamp per detik; nama ganda akan saling menimpa
+        if file.filename in seen_filenames:
+            return {"filename": file.filename, "status": "rejected", "message": "Duplicate file name in batch."}
+        seen_filenames.add(file.filename)
+
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(
+                    file_processor.upload_stream,
+                    file.file,
+                    file.filename,
+                    _file_size(file),
+                    file.content_type
+                )
+            except Exception as e:
+                logging.error(f"Failed to upload {file.filename} in batch: {e}")
+                return {"filename": file.filename, "status": "failed", "message": str(e)}
+        UPLOAD_BYTES.inc(result["size"])
+        UPLOAD_SIZE.observe(result["size"])
+        return {"filename": file.filename, "status": "uploaded", "upload": result}
+
+    results = await asyncio.gather(*[upload_one(file) for file in files])
+    uploaded = [item for item in results if item["status"] == "uploaded"]
+
+    batch_id = str(uuid.uuid4())
+    if uploaded:
+        # Job ID sekaligus dipakai sebagai task ID Celery, sama seperti /upload
+        for item in uploaded:
+            item["job_id"] = str(uuid.uuid4())
+        job_tracker.create_batch(batch_id, {item["job_id"]: item["upload"]["file_name"] for item in uploaded})
+        await _save_catalog([_catalog_row(item["upload"], item["job_id"], item["filename"]) for item in uploaded])
+        try:
+            group(
+                document_processing_task.signature(
+                    args=[_document_task_info(item["upload"], item["job_id"], profile)],
+                    task_id=item["job_id"]
+                )
+                for item in uploaded
+            ).apply_async()
+        except Exception as e:
+            logging.error(f"Failed to enqueue batch {batch_id}: {e}")
+            await asyncio.gather(*[
+                asyncio.to_thread(file_processor.delete_from_minio, item["upload"]["file_name"])
+                for item in uploaded
+            ], return_exceptions=True)
+            for item in uploaded:
+                job_tracker.update(item["job_id"], status="error", stage="error", message=str(e))
+            return JSONResponse(content={"message": f"Failed to enqueue files: {str(e)}"}, status_code=500)
+
+    files_result = []
+    for item in results:
+        if item["status"] == "uploaded":
+            files_result.append({
+                "filename": item["filename"],
+                "status": "queued",
+                "job_id": item["job_id"],
+                "file_name": item["upload"]["file_name"],
+                "size": item["upload"]["size"]
+            })
+        else:
+            files_result.append(item)
+
+    counts = {status: sum(1 for item in files_result if item["status"] == status) for status in ("queued", "rejected", "failed")}
+    if uploaded:
+        status_code = 200
+    else:
+        status_code = 500 if counts["failed"] else 400
+    return JSONResponse(
+        content={"batch_id": batch_id if uploaded else None, **counts, "files": files_result},
+        status_code=status_code
+    )
+
+
+@router.post("/upload/presigned")
+async def create_presigned_upload(filename: str, profile: bool = False):
+    """
+    Minta URL PUT presigned untuk satu file. Klien meng-upload langsung ke MinIO,
+    lalu memanggil endpoint complete; API hanya menangani metadata.
+    """
+    if not filename.endswith(ACCEPTED_EXTENSIONS):
+        return JSONResponse(content={"message": "Unsupported file type."}, status_code=400)
+    try:
+        from main import job_tracker
+
+        file_processor = await asyncio.to_thread(FileProcessor)
+        upload = file_processor.presigned_upload_url(os.path.basename(filename), PRESIGNED_UPLOAD_EXPIRY_SECONDS)
+
+        job_id = str(uuid.uuid4())
+        job_tracker.create(
+            job_id,
+            file_name=upload["file_name"],
+            original_name=os.path.basename(filename),
+            status="awaiting_upload",
+            stage="awaiting_upload",
+            profile="true" if profile and PROFILING_ENABLED else None
+        )
+        return JSONResponse(content={
+            "job_id": job_id,
+            "file_name": upload["file_name"],
+            "upload_url": upload["upload_url"],
+            "method": "PUT",
+            "expires_at": upload["expires_at"],
+            "max_size": PRESIGNED_UPLOAD_MAX_BYTES,
+            "complete_url": f"/api/upload/presigned/{job_id}/complete"
+        }, status_code=200)
+    except Exception as e:
+        logging.error(f"Failed to create presigned upload for {filename}: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to create presigned upload: {str(e)}"}, status_code=500)
+
+
+@router.post("/upload/presigned/{job_id}/complete")
+async def complete_presigned_upload(job_id: str):
+    """Verifikasi objek sudah ada di MinIO lalu kirim task ingestion (sekali per job)."""
+    try:
+        from main import job_tracker
+
+        job = job_tracker.get(job_id)
+        if job is None:
+            return JSONResponse(content={"message": "Upload not found."}, status_code=404)
+        if job.get("status") != "awaiting_upload":
+            return JSONResponse(content={"message": "Upload was already completed.", "job_id": job_id}, status_code=409)
+
+        file_processor = await asyncio.to_thread(FileProcessor)
+        result = await asyncio.to_thread(file_processor.stat_upload, job["file_name"])
+        if result is None:
+            return JSONResponse(content={"message": "File has not been uploaded yet."}, status_code=400)
+        if result["size"] > PRESIGNED_UPLOAD_MAX_BYTES:
+            # Presigned PUT tidak bisa membatasi ukuran; file terlalu besar dibuang di sini
+            await asyncio.to_thread(file_processor.delete_from_minio, job["file_name"])
+            job_tracker.update(job_id, status="error", stage="error", message="File too large.")
+            return JSONResponse(content={"message": f"File too large; at most {PRESIGNED_UPLOAD_MAX_BYTES} bytes."}, status_code=413)
+
+        # Panggilan complete ganda (mis. retry klien) hanya boleh mengirim satu task
+        if not job_tracker.set_once(job_id, "completed_at", datetime.now().isoformat()):
+            return JSONResponse(content={"message": "Upload was already completed.", "job_id": job_id}, status_code=409)
+
+        job_tracker.update(job_id, status="queued", stage="queued")
+        await _save_catalog([_catalog_row(result, job_id, job.get("original_name") or result["file_name"])])
+        try:
+            document_processing_task.apply_async(
+                args=[_document_task_info(result, job_id, job.get("profile") == "true")],
+                task_id=job_id
+            )
+        except Exception as e:
+            # Lepas penanda agar klien bisa mengulang complete; file masih ada di MinIO
+            job_tracker.clear(job_id, "completed_at")
+            job_tracker.update(job_id, status="awaiting_upload", stage="awaiting_upload", message=f"Failed to enqueue: {str(e)}")
+            raise
+        UPLOAD_BYTES.inc(result["size"])
+        UPLOAD_SIZE.observe(result["size"])
+        return JSONResponse(content={"job_id": job_id, "message": result}, status_code=200)
     except Exception as e:
-        return JSONResponse(content={"message": f"Failed to upload file: {str(e)}"}, status_code=500)
\ No newline at end of file
+        logging.error(f"Failed to complete presigned upload {job_id}: {str(e)}")
+        return JSONResponse(content={"message": f"Failed to complete upload: {str(e)}"}, status_code=500)
@@ -0,0 +1,85 @@
+from typing import Dict, Optional
+from repository.file_repo import update_files_by_job
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+class CatalogWriter:
+    """
+    Update katalog dokumen (tabel `files`) dari worker ingestion. Update masuk
+    antrean dan ditulis per batch oleh thread background, sehingga pipeline
+    tidak menunggu Postgres dan banyak update dikirim dalam satu transaksi.
+    Tanpa DATABASE_URL semua update diabaikan.
+    """
+
+    def __init__(self, database_url: Optional[str], flush_interval: float = 1.0, max_batch: int = 200) -> None:
+        self._database_url = database_url
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._engine = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _get_engine(self):
+        if self._engine is None:
+            from core.database import create_sync_engine
+            self._engine = create_sync_engine(self._database_url)
+        return self._engine
+
+    def _ensure_thread(self):
+        # Thread dibuat saat update pertama: dengan prefork Celery, setelah proses anak di-fork
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="catalog-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def update(self, job_id: Optional[str], **fields) -> None:
+        if not self._database_url or not job_id:
+            return
+        self._queue.put((job_id, fields))
+        self._ensure_thread()
+
+    def _drain(self) -> Dict[str, Dict[str, any]]:
+        # Update untuk job yang sama digabung; nilai terakhir menang
+        updates: Dict[str, Dict[str, any]] = {}
+        for _ in range(self._max_batch):
+            try:
+                job_id, fields = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            updates.setdefault(job_id, {}).update(fields)
+        return updates
+
+    def _write(self, updates: Dict[str, Dict[str, any]]) -> None:
+        if not updates:
+            return
+        try:
+            with self._get_engine().begin() as connection:
+                update_files_by_job(connection, updates)
+        except Exception as e:
+            # Katalog hanya pencatatan; kegagalan tidak boleh menggagalkan ingestion
+            logging.warning(f"Failed to write {len(updates)} catalog updates: {e}")
+
+    def _run(self) -> None:
+        while True:
+            # Update yang masuk selama interval ditulis bersama dalam satu transaksi
+            time.sleep(self._flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        """Tulis semua update yang masih antre; juga dipanggil saat proses worker berhenti."""
+        with self._write_lock:
+            while not self._queue.empty():
+                self._write(self._drain())
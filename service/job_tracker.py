@@ -0,0 +1,243 @@
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+from core.metrics import INGESTION_STAGE_DURATION
+import redis
+import logging
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Urutan stage pipeline ingestion, dipakai UI untuk menampilkan progres
+INGESTION_STAGES = [
+    "download",
+    "split",
+    "convert",
+    "chunk",
+    "embed_bm25",
+    "embed_colbert",
+    "embed_dense",
+    "upsert"
+]
+
+
+class JobTracker:
+    """
+    Menyimpan status job ingestion di Redis sebagai hash `ingestion:job:{job_id}`.
+    Field `duration:<stage>` berisi total detik per stage (untuk dokumen yang
+    di-fan-out, durasi `convert` adalah jumlah waktu semua subtask), field
+    `count:<nama>` berisi counter progres, dan `profile:<task>` berisi ID
+    artefak profiling jika job dijalankan dengan opsi profile.
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int = 7 * 24 * 3600) -> None:
+        self._redis_url = redis_url
+        self._ttl_seconds = ttl_seconds
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._redis_url, decode_responses=True)
+        return self._client
+
+    def _key(self, job_id: str) -> str:
+        return f"ingestion:job:{job_id}"
+
+    def _batch_key(self, batch_id: str) -> str:
+        return f"ingestion:batch:{batch_id}"
+
+    def _write(self, job_id: str, mapping: Dict[str, any] = None, increments: Dict[str, float] = None):
+        # Status job hanya informasi tambahan; kegagalan Redis tidak boleh menggagalkan ingestion
+        try:
+            pipe = self._get_client().pipeline()
+            key = self._key(job_id)
+            if mapping:
+                pipe.hset(key, mapping={k: v for k, v in mapping.items() if v is not None})
+            for field, amount in (increments or {}).items():
+                if isinstance(amount, float):
+                    pipe.hincrbyfloat(key, field, amount)
+                else:
+                    pipe.hincrby(key, field, amount)
+            pipe.hset(key, "updated_at", datetime.now().isoformat())
+            pipe.expire(key, self._ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logging.warning(f"Failed to update job {job_id} status: {e}")
+
+    def create(self, job_id: str, file_name: str, **fields) -> None:
+        self._write(job_id, {
+            "job_id": job_id,
+            "file_name": file_name,
+            "status": "queued",
+            "stage": "queued",
+            "created_at": datetime.now().isoformat(),
+            **fields
+        })
+
+    def update(self, job_id: str, **fields) -> None:
+        self._write(job_id, fields)
+
+    def set_once(self, job_id: str, field: str, value: str) -> bool:
+        """Isi field hanya jika belum ada; False berarti request lain sudah mengisinya lebih dulu."""
+        return bool(self._get_client().hsetnx(self._key(job_id), field, value))
+
+    def clear(self, job_id: str, *fields: str) -> None:
+        """Hapus field job, mis. penanda `set_once` saat langkah yang dijaganya gagal."""
+        try:
+            self._get_client().hdel(self._key(job_id), *fields)
+        except Exception as e:
+            logging.warning(f"Failed to clear {fields} of job {job_id}: {e}")
+
+    def create_batch(self, batch_id: str, jobs: Dict[str, str]) -> None:
+        """
+        Buat job untuk setiap file (job_id -> nama file) dan simpan daftar job
+        batch di `ingestion:batch:{batch_id}`, semuanya dalam satu round trip.
+        """
+        now = datetime.now().isoformat()
+        try:
+            pipe = self._get_client().pipeline()
+            for job_id, file_name in jobs.items():
+                key = self._key(job_id)
+                pipe.hset(key, mapping={
+                    "job_id": job_id,
+                    "file_name": file_name,
+                    "batch_id": batch_id,
+                    "status": "queued",
+                    "stage": "queued",
+                    "created_at": now,
+                    "updated_at": now
+                })
+                pipe.expire(key, self._ttl_seconds)
+            if jobs:
+                batch_key = self._batch_key(batch_id)
+                pipe.rpush(batch_key, *jobs.keys())
+                pipe.expire(batch_key, self._ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logging.warning(f"Failed to create batch {batch_id}: {e}")
+
+    def add_duration(self, job_id: str, stage: str, seconds: float) -> None:
+        self._write(job_id, increments={f"duration:{stage}": round(float(seconds), 4)})
+
+    def increment(self, job_id: str, counter: str, amount: int = 1) -> None:
+        self._write(job_id, increments={f"count:{counter}": int(amount)})
+
+    def get(self, job_id: str) -> Optional[Dict[str, any]]:
+        raw = self._get_client().hgetall(self._key(job_id))
+        if not raw:
+            return None
+
+        job = {"progress": {}, "durations": {}, "profiles": {}}
+        for field, value in raw.items():
+            if field.startswith("profile:"):
+                job["profiles"][field[len("profile:"):]] = f"/api/profiles/{value}"
+            elif field.startswith("count:"):
+                job["progress"][field[len("count:"):]] = int(value)
+            elif field.startswith("duration:"):
+                job["durations"][field[len("duration:"):]] = round(float(value), 3)
+            else:
+                job[field] = value
+        return job
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, any]]:
+        client = self._get_client()
+        job_ids = client.lrange(self._batch_key(batch_id), 0, -1)
+        if not job_ids:
+            return None
+
+        pipe = client.pipeline()
+        for job_id in job_ids:
+            pipe.hmget(self._key(job_id), "file_name", "status", "stage", "message")
+        jobs = []
+        status_counts = {}
+        for job_id, (file_name, status, stage, message) in zip(job_ids, pipe.execute()):
+            # Status job bisa sudah kedaluwarsa walau daftar batch masih ada
+            status = status or "unknown"
+            status_counts[status] = status_counts.get(status, 0) + 1
+            jobs.append({"job_id": job_id, "file_name": file_name, "status": status, "stage": stage, "message": message})
+
+        finished = sum(count for status, count in status_counts.items() if status in ("success", "error"))
+        return {
+            "batch_id": batch_id,
+            "total": len(job_ids),
+            "finished": finished,
+            "status_counts": status_counts,
+            "jobs": jobs
+        }
+
+    def job(self, job_id: Optional[str]) -> "IngestionJob":
+        if not job_id:
+            return NullIngestionJob()
+        return IngestionJob(self, job_id)
+
+
+class IngestionJob:
+    """Handle yang diteruskan ke pipeline ingestion untuk melaporkan stage dan progres."""
+
+    def __init__(self, tracker: JobTracker, job_id: str) -> None:
+        self._tracker = tracker
+        self.job_id = job_id
+
+    def set_stage(self, stage: str) -> None:
+        self._tracker.update(self.job_id, status="running", stage=stage)
+
+    def add_duration(self, stage: str, seconds: float) -> None:
+        self._tracker.add_duration(self.job_id, stage, seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        self._tracker.increment(self.job_id, counter, amount)
+
+    def set_progress(self, **counters) -> None:
+        self._tracker.update(self.job_id, **{f"count:{name}": int(value) for name, value in counters.items()})
+
+    def update(self, **fields) -> None:
+        self._tracker.update(self.job_id, **fields)
+
+    def finish(self, status: str, message: str = None) -> None:
+        self._tracker.update(
+            self.job_id,
+            status=status,
+            stage="done" if status == "success" else status,
+            message=message,
+            finished_at=datetime.now().isoformat()
+        )
+
+    @contextmanager
+    def stage(self, name: str):
+        self.set_stage(name)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            INGESTION_STAGE_DURATION.labels(stage=name).observe(elapsed)
+            self.add_duration(name, elapsed)
+
+
+class NullIngestionJob(IngestionJob):
+    """Dipakai saat pipeline berjalan tanpa job ID (mis. RabbitMQ consumer)."""
+
+    def __init__(self) -> None:
+        self._tracker = None
+        self.job_id = None
+
+    def set_stage(self, stage: str) -> None:
+        pass
+
+    def add_duration(self, stage: str, seconds: float) -> None:
+        pass
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        pass
+
+    def set_progress(self, **counters) -> None:
+        pass
+
+    def update(self, **fields) -> None:
+        pass
+
+    def finish(self, status: str, message: str = None) -> None:
+        pass
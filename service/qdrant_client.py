@@ -1,5 +1,5 @@
 import google.generativeai as genai
-from typing import Dict, List
+from typing import Dict, List, Optional
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
     MultiVectorConfig,
@@ -9,16 +9,48 @@ from qdrant_client.http.models import (
     SparseVector
 )
 from qdrant_client.http.models import VectorParams, Distance
+from qdrant_client.http.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionParamsDiff,
+    Disabled,
+    HnswConfigDiff,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParamsDiff
+)
 from fastembed import SparseTextEmbedding, LateInteractionTextEmbedding
 from qdrant_client.http.models import NamedVector, NamedSparseVector, SparseVector
 from qdrant_client import QdrantClient
 from datetime import datetime
+from core.metrics import EMBEDDING_LATENCY, QDRANT_SEARCH_LATENCY, QDRANT_SEARCH_ERRORS, HYBRID_FUSION_LATENCY
+from core.embeddings import DenseEmbedder, GEMINI_VECTOR_SIZE, create_dense_embedder
+from core.chunk_store import ChunkTextStore, create_chunk_store, text_key
 from settings import (
     VECTOR_COLLECTION_NAME,
     GOOGLE_API_KEY,
-    LOCAL_STORAGE_PATH
+    LOCAL_STORAGE_PATH,
+    QDRANT_QUANTIZATION,
+    QDRANT_QUANTIZATION_ALWAYS_RAM,
+    QDRANT_SEARCH_RESCORE,
+    QDRANT_SEARCH_OVERSAMPLING,
+    QDRANT_HNSW_M,
+    QDRANT_HNSW_EF_CONSTRUCT,
+    QDRANT_HNSW_EF_SEARCH,
+    QDRANT_ON_DISK_PAYLOAD
 )
 import logging
+import time
+import uuid
 
 logging.basicConfig(
     level=logging.INFO,
@@ -26,7 +58,6 @@ logging.basicConfig(
 )
 
 GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
-GEMINI_VECTOR_SIZE = 768
 COLBERT_VECTOR_SIZE = 128 # Ukuran vektor umum untuk ColbertV2
 # Nama vektor yang akan digunakan di Qdrant
 VECTOR_NAMES = {
@@ -34,16 +65,37 @@ VECTOR_NAMES = {
     "colbert": "colbertv2",
     "bm25": "bm25"
 }
+# Field payload kecil yang bisa dipakai filter; teks chunk disimpan di luar Qdrant
+PAYLOAD_INDEXES = {
+    "filename": PayloadSchemaType.KEYWORD,
+    "page_number": PayloadSchemaType.INTEGER
+}
+
+# Namespace tetap untuk ID point; jangan diubah agar ID point yang sudah ada tetap sama
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2b0e-5d3a-4c8e-9b7f-2a4d6e8c0b13")
 
 genai.configure(api_key=GOOGLE_API_KEY)
 
 
+def point_id(filename: str, chunk_index: int) -> str:
+    """
+    ID point deterministik per (file, urutan chunk). Writer paralel (worker Celery,
+    consumer, ingest massal) tidak perlu koordinasi dan tidak saling menimpa;
+    ingest ulang file yang sama menimpa point miliknya sendiri.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{filename}:{chunk_index}"))
+
+
 class QdrantClientService:
-    def __init__(self, host: str, https: bool = False):
+    def __init__(self, host: str, https: bool = False, dense_embedder: DenseEmbedder = None, chunk_store: ChunkTextStore = None):
         self._host = host
         self._https = https
         self._client = None
         self._genai = genai
+        # Vektor dense mengikuti backend yang dipilih (Gemini API atau model lokal)
+        self._dense_embedder = dense_embedder or create_dense_embedder()
+        # None: teks chunk tetap di payload `document` (CHUNK_TEXT_STORE=qdrant)
+        self._chunk_store = chunk_store if chunk_store is not None else create_chunk_store()
         # Inisialisasi model BM25 dan Colbert jika belum
         self._bm25_model = SparseTextEmbedding(model_name="Qdrant/bm25", cache_dir=f"./{LOCAL_STORAGE_PATH}/models/bm25")
         self._colbert_model = LateInteractionTextEmbedding(model_name="colbert-ir/colbertv2.0", cache_dir=f"./{LOCAL_STORAGE_PATH}/models/colbert")
@@ -64,23 +116,152 @@ class QdrantClientService:
         try:
             collection = self._client.collection_exists(collection_name=VECTOR_COLLECTION_NAME)
 
-            if not collection:
-                self._create_collection()
+            if not collection and not self.resolve_alias():
+                # Koleksi baru selalu berversi dan diakses lewat alias VECTOR_COLLECTION_NAME
+                collection_name = self.versioned_collection_name()
+                self._create_collection(collection_name)
+                self.switch_alias(collection_name)
             else:
                 logging.info(f"Collection '{VECTOR_COLLECTION_NAME}' already exists.")
+                self._check_dense_vector()
         
         except Exception as e:
             logging.error(f"Error checking/creating collection: {e}")
             raise e
 
-    def _create_collection(self):
+    @property
+    def dense_embedder(self) -> DenseEmbedder:
+        return self._dense_embedder
+
+    def _check_dense_vector(self):
+        vectors = self._client.get_collection(collection_name=VECTOR_COLLECTION_NAME).config.params.vectors
+        if not isinstance(vectors, dict):
+            return
+        if self._dense_embedder.vector_name not in vectors:
+            raise ValueError(
+                f"Collection '{VECTOR_COLLECTION_NAME}' has no dense vector '{self._dense_embedder.vector_name}' "
+                f"(found {sorted(vectors)}); the dense embedding backend changed, re-index into a new collection."
+            )
+        size = vectors[self._dense_embedder.vector_name].size
+        if size != self._dense_embedder.size:
+            raise ValueError(
+                f"Dense vector '{self._dense_embedder.vector_name}' in '{VECTOR_COLLECTION_NAME}' has size {size}, "
+                f"expected {self._dense_embedder.size}; the output dimensionality changed, re-index into a new collection."
+            )
+
+    def _quantization_config(self):
+        # Hanya vektor dense yang dikuantisasi; ColBERT sudah on_disk dan BM25 sparse
+        if QDRANT_QUANTIZATION == "none":
+            return None
+        if QDRANT_QUANTIZATION == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM
+                )
+            )
+        if QDRANT_QUANTIZATION == "binary":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM)
+            )
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION: {QDRANT_QUANTIZATION}")
+
+    def _hnsw_config(self) -> HnswConfigDiff:
+        return HnswConfigDiff(m=QDRANT_HNSW_M, ef_construct=QDRANT_HNSW_EF_CONSTRUCT)
+
+    def dense_search_params(self, rescore: bool = QDRANT_SEARCH_RESCORE, ignore_quantization: bool = False, exact: bool = False):
+        """Parameter pencarian dense: oversampling + rescore dengan vektor asli jika koleksi dikuantisasi."""
+        quantization = None
+        if QDRANT_QUANTIZATION != "none":
+            quantization = QuantizationSearchParams(
+                ignore=ignore_quantization,
+                rescore=rescore,
+                oversampling=QDRANT_SEARCH_OVERSAMPLING
+            )
+        if quantization is None and not QDRANT_HNSW_EF_SEARCH and not exact:
+            return None
+        return SearchParams(hnsw_ef=QDRANT_HNSW_EF_SEARCH, exact=exact, quantization=quantization)
+
+    def apply_collection_settings(self):
+        """
+        Terapkan pengaturan kuantisasi, HNSW, dan on-disk payload dari settings ke
+        koleksi yang sudah ada. Qdrant membangun ulang index/kuantisasi di background.
+        Dimensi vektor tidak bisa diubah di tempat; perubahan dimensi butuh re-index.
+        """
+        self._check_dense_vector()
+        self._client.update_collection(
+            collection_name=self.resolve_alias() or VECTOR_COLLECTION_NAME,
+            vectors_config={
+                self._dense_embedder.vector_name: VectorParamsDiff(
+                    hnsw_config=self._hnsw_config(),
+                    quantization_config=self._quantization_config() or Disabled.DISABLED
+                )
+            },
+            hnsw_config=self._hnsw_config(),
+            collection_params=CollectionParamsDiff(on_disk_payload=QDRANT_ON_DISK_PAYLOAD)
+        )
+        self._create_payload_indexes(self.resolve_alias() or VECTOR_COLLECTION_NAME)
+        logging.info(
+            f"Applied collection settings to '{VECTOR_COLLECTION_NAME}': quantization={QDRANT_QUANTIZATION}, "
+            f"hnsw m={QDRANT_HNSW_M} ef_construct={QDRANT_HNSW_EF_CONSTRUCT}, on_disk_payload={QDRANT_ON_DISK_PAYLOAD}"
+        )
+
+    def _create_payload_indexes(self, collection_name: str):
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self._client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema
+            )
+
+    def versioned_collection_name(self) -> str:
+        return f"{VECTOR_COLLECTION_NAME}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+
+    def resolve_alias(self, alias_name: str = VECTOR_COLLECTION_NAME) -> Optional[str]:
+        for alias in self._client.get_aliases().aliases:
+            if alias.alias_name == alias_name:
+                return alias.collection_name
+        return None
+
+    def switch_alias(self, collection_name: str, alias_name: str = VECTOR_COLLECTION_NAME, replace_collection: bool = False) -> Optional[str]:
+        """
+        Arahkan alias ke `collection_name`. Hapus dan buat alias dikirim dalam satu
+        update_collection_aliases sehingga pencarian tidak pernah melihat alias kosong.
+        Mengembalikan koleksi yang sebelumnya ditunjuk alias.
+
+        Deployment lama punya koleksi asli bernama `alias_name`; koleksi itu hanya
+        dihapus jika `replace_collection=True`, dan ada jeda singkat sampai alias dibuat.
+        """
+        previous = self.resolve_alias(alias_name)
+        operations = []
+        if previous:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+        elif self._client.collection_exists(collection_name=alias_name):
+            if not replace_collection:
+                raise ValueError(
+                    f"'{alias_name}' is a collection, not an alias; pass replace_collection=True to replace it."
+                )
+            logging.warning(f"Deleting legacy collection '{alias_name}' to replace it with an alias.")
+            self._client.delete_collection(collection_name=alias_name)
+
+        operations.append(CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name)
+        ))
+        self._client.update_collection_aliases(change_aliases_operations=operations)
+        logging.info(f"Alias '{alias_name}' now points to '{collection_name}' (was {previous}).")
+        return previous
+
+    def _create_collection(self, collection_name: str = VECTOR_COLLECTION_NAME):
         try:
             self._client.create_collection(
-                collection_name=VECTOR_COLLECTION_NAME,
+                collection_name=collection_name,
                 vectors_config={
-                    VECTOR_NAMES["gemini"]: VectorParams(
-                        size=GEMINI_VECTOR_SIZE, 
-                        distance=Distance.COSINE
+                    self._dense_embedder.vector_name: VectorParams(
+                        size=self._dense_embedder.size,
+                        distance=Distance.COSINE,
+                        hnsw_config=self._hnsw_config(),
+                        quantization_config=self._quantization_config()
                     ),
                     VECTOR_NAMES["colbert"]: VectorParams(
                         size=COLBERT_VECTOR_SIZE,
@@ -97,19 +278,29 @@ class QdrantClientService:
                             on_disk=True
                         )
                     )
-                }
+                },
+                hnsw_config=self._hnsw_config(),
+                on_disk_payload=QDRANT_ON_DISK_PAYLOAD
             )
-            logging.info(f"Hybrid collection '{VECTOR_COLLECTION_NAME}' created successfully.")
+            self._create_payload_indexes(collection_name)
+            logging.info(f"Hybrid collection '{collection_name}' created successfully.")
         except Exception as e:
             logging.error(f"Failed to create/check collection: {e}")
             raise e
         
-    def create_points(self, processed_data: Dict[str, any], start_id: int) -> List[PointStruct]:
+    def create_points(self, processed_data: Dict[str, any], start_id: Optional[int] = None) -> List[PointStruct]:
+        """Tanpa `start_id`, ID point diturunkan dari nama file dan urutan chunk (lihat `point_id`)."""
         points = []
-        for i, (bm25_vector, colbert_vector, gemini_vector, doc, chunk) in enumerate(zip(
+        # Teks ditulis ke store lebih dulu agar point yang sudah bisa dicari selalu punya teks
+        text_keys = [text_key(doc) for doc in processed_data["docs"]] if self._chunk_store else []
+        if self._chunk_store:
+            self._chunk_store.put_many(dict(zip(text_keys, processed_data["docs"])))
+        # `gemini_vectors` adalah nama lama dari `dense_vectors`
+        dense_vectors = processed_data["dense_vectors"] if "dense_vectors" in processed_data else processed_data["gemini_vectors"]
+        for i, (bm25_vector, colbert_vector, dense_vector, doc, chunk) in enumerate(zip(
             processed_data["bm25_vectors"],
             processed_data["colbert_vectors"],
-            processed_data["gemini_vectors"],
+            dense_vectors,
             processed_data["docs"],
             processed_data["chunks"]
         )):
@@ -128,19 +319,24 @@ class QdrantClientService:
 
             logging.info(f"Insert ColBERT vector shape: {len(colbert_vector_list)} x {len(colbert_vector_list[0])}")
 
+            payload = {
+                "filename": processed_data["filename"],
+                "page_number": page_no,
+                "upload_timestamp": datetime.utcnow().isoformat(),
+            }
+            if self._chunk_store:
+                payload["text_key"] = text_keys[i]
+            else:
+                payload["document"] = doc
+
             point = PointStruct(
-                id=start_id + i,
+                id=start_id + i if start_id is not None else point_id(processed_data["filename"], i),
                 vector={
                     VECTOR_NAMES["bm25"]: sparse_vector_qdrant,
                     VECTOR_NAMES["colbert"]: colbert_vector_list,
-                    VECTOR_NAMES["gemini"]: gemini_vector
+                    self._dense_embedder.vector_name: dense_vector
                 },
-                payload={
-                "document": doc,
-                "filename": processed_data["filename"],
-                "page_number": page_no,
-                "upload_timestamp": datetime.utcnow().isoformat(),
-                }
+                payload=payload
             )
             points.append(point)
 
@@ -152,13 +348,15 @@ class QdrantClientService:
             return []
 
         try:
-            hits = self._client.search(
-                collection_name=collection_name,
-                query_vector=query_vector,
-                limit=limit
-            )
+            with QDRANT_SEARCH_LATENCY.labels(branch="search").time():
+                hits = self._client.search(
+                    collection_name=collection_name,
+                    query_vector=query_vector,
+                    with_payload=False,
+                    limit=limit
+                )
             logging.info(f"Search completed with {len(hits)} hits.")
-            return hits
+            return self._attach_payloads(hits, collection_name)
         except Exception as e:
             logging.error(f"Search failed: {e}")
             return []
@@ -169,17 +367,17 @@ class QdrantClientService:
 ):
         """
         Hybrid search menggunakan:
-        - Gemini (dense vector, models/text-embedding-004)
+        - Dense vector dari backend embedding (Gemini models/text-embedding-004 atau model lokal)
         - BM25 (sparse vector, bm25)
         - ColBERT (multi-vector, colbertv2)
         """
 
         # --- 1. Buat embedding query ---
-        query_gemini_vector = self._genai.embed_content(
-            content=query, model="models/text-embedding-004", task_type="retrieval_query"
-        )['embedding']
+        with EMBEDDING_LATENCY.labels(model=self._dense_embedder.label, kind="query").time():
+            query_dense_vector = self._dense_embedder.embed_query(query)
         
-        query_bm25_vectors = list(self._bm25_model.query_embed(query=query))
+        with EMBEDDING_LATENCY.labels(model="bm25", kind="query").time():
+            query_bm25_vectors = list(self._bm25_model.query_embed(query=query))
         sparse_vector_qdrant = None
         if query_bm25_vectors:
             query_bm25_vector = query_bm25_vectors[0]
@@ -189,37 +387,45 @@ class QdrantClientService:
             )
 
         # --- 2. Perform searches ---
-        gemini_hits = []
+        dense_hits = []
         try:
-            gemini_hits = self._client.search(
-                collection_name=VECTOR_COLLECTION_NAME,
-                query_vector=NamedVector(
-                    name=VECTOR_NAMES["gemini"],
-                    vector=query_gemini_vector
-                ),
-                limit=limit
-            )
+            with QDRANT_SEARCH_LATENCY.labels(branch="dense").time():
+                dense_hits = self._client.search(
+                    collection_name=VECTOR_COLLECTION_NAME,
+                    query_vector=NamedVector(
+                        name=self._dense_embedder.vector_name,
+                        vector=query_dense_vector
+                    ),
+                    search_params=self.dense_search_params(),
+                    with_payload=False,
+                    limit=limit
+                )
         except Exception as e:
-            logging.error(f"Gemini search failed: {e}")
+            logging.error(f"Dense search failed: {e}")
+            QDRANT_SEARCH_ERRORS.labels(branch="dense").inc()
 
         bm25_hits = []
         if sparse_vector_qdrant:
             try:
-                bm25_hits = self._client.search(
-                    collection_name=VECTOR_COLLECTION_NAME,
-                    query_vector=NamedSparseVector(
-                        name=VECTOR_NAMES["bm25"],
-                        vector=sparse_vector_qdrant
-                    ),
-                    limit=limit
-                )
+                with QDRANT_SEARCH_LATENCY.labels(branch="bm25").time():
+                    bm25_hits = self._client.search(
+                        collection_name=VECTOR_COLLECTION_NAME,
+                        query_vector=NamedSparseVector(
+                            name=VECTOR_NAMES["bm25"],
+                            vector=sparse_vector_qdrant
+                        ),
+                        with_payload=False,
+                        limit=limit
+                    )
             except Exception as e:
                 logging.error(f"BM25 search failed: {e}")
+                QDRANT_SEARCH_ERRORS.labels(branch="bm25").inc()
 
         # ColBERT search - Fixed implementation
         colbert_hits = []
         try:
-            query_colbert_vectors = list(self._colbert_model.query_embed(query=query))
+            with EMBEDDING_LATENCY.labels(model="colbert", kind="query").time():
+                query_colbert_vectors = list(self._colbert_model.query_embed(query=query))
             if query_colbert_vectors:
                 # ColBERT returns multi-vectors, convert numpy arrays to lists
                 colbert_multi_vector = query_colbert_vectors[0]  # Get the first (and likely only) multi-vector
@@ -230,18 +436,28 @@ class QdrantClientService:
                 logging.info(f"ColBERT query vector shape: {len(colbert_vector_list)} vectors of {len(colbert_vector_list[0])} dimensions")
                 
                 # For multi-vector search, use tuple format (vector_name, multi_vector_list)
-                colbert_hits = self._client.search(
-                    collection_name=VECTOR_COLLECTION_NAME,
-                    query_vector=(VECTOR_NAMES["colbert"], colbert_vector_list),
-                    limit=limit
-                )
+                with QDRANT_SEARCH_LATENCY.labels(branch="colbert").time():
+                    colbert_hits = self._client.search(
+                        collection_name=VECTOR_COLLECTION_NAME,
+                        query_vector=(VECTOR_NAMES["colbert"], colbert_vector_list),
+                        with_payload=False,
+                        limit=limit
+                    )
         except Exception as e:
             logging.error(f"Colbert search failed: {e}")
+            QDRANT_SEARCH_ERRORS.labels(branch="colbert").inc()
 
-        # --- 3. Gabungkan hasil dengan bobot ---
+        # --- 3. Gabungkan hasil dengan bobot, lalu ambil payload hanya untuk hasil akhir ---
+        return self._attach_payloads(
+            self._fuse([(dense_hits, alpha), (bm25_hits, beta), (colbert_hits, gamma)], limit)
+        )
+
+    def _fuse(self, weighted_hits: List[tuple], limit: int) -> list:
+        """Jumlahkan skor berbobot tiap cabang per point lalu urutkan."""
+        fusion_start = time.perf_counter()
         combined_scores = {}
 
-        def add_scores(hits, weight):
+        for hits, weight in weighted_hits:
             for hit in hits:
                 doc_id = hit.id
                 score = hit.score * weight
@@ -250,19 +466,143 @@ class QdrantClientService:
                 else:
                     combined_scores[doc_id]["score"] += score
 
-        add_scores(gemini_hits, alpha)
-        add_scores(bm25_hits, beta)
-        add_scores(colbert_hits, gamma)
-
-        # --- 4. Urutkan hasil akhir ---
         ranked_hits = sorted(
             combined_scores.values(),
             key=lambda x: x["score"],
             reverse=True
         )
+        HYBRID_FUSION_LATENCY.observe(time.perf_counter() - fusion_start)
 
         return [entry["hit"] for entry in ranked_hits[:limit]]
+
+    def _query_batch(self, branch: str, requests: Dict[int, QueryRequest], count: int) -> List[list]:
+        """
+        Kirim semua request satu cabang dalam satu query_batch_points. `requests`
+        dipetakan dari indeks query; query tanpa request (mis. vektor BM25 kosong)
+        mendapat hasil kosong. Kegagalan satu cabang tidak menggagalkan cabang lain.
+        """
+        results = [[] for _ in range(count)]
+        if not requests:
+            return results
+        indexes = list(requests.keys())
+        try:
+            with QDRANT_SEARCH_LATENCY.labels(branch=f"{branch}_batch").time():
+                responses = self._client.query_batch_points(
+                    collection_name=VECTOR_COLLECTION_NAME,
+                    requests=[requests[index] for index in indexes]
+                )
+            for index, response in zip(indexes, responses):
+                results[index] = response.points
+        except Exception as e:
+            logging.error(f"Batch {branch} search failed: {e}")
+            QDRANT_SEARCH_ERRORS.labels(branch=f"{branch}_batch").inc()
+        return results
+
+    def hybrid_search_batch(
+        self, queries: List[str], limit: int = 5,
+        alpha: float = 0.5, beta: float = 0.3, gamma: float = 0.2
+    ) -> List[list]:
+        """
+        hybrid_search untuk banyak query sekaligus. Embedding tiap model dibuat
+        dalam satu panggilan batch dan tiap cabang (dense, BM25, ColBERT) dikirim
+        sebagai satu request batch ke Qdrant, jadi jumlah round trip tetap tiga
+        berapa pun jumlah query. Bobot dan fusion sama dengan hybrid_search.
+        """
+        if not queries:
+            return []
+
+        with EMBEDDING_LATENCY.labels(model=self._dense_embedder.label, kind="query_batch").time():
+            dense_vectors = self._dense_embedder.embed_queries(queries)
+        with EMBEDDING_LATENCY.labels(model="bm25", kind="query_batch").time():
+            bm25_vectors = list(self._bm25_model.query_embed(query=queries))
+        with EMBEDDING_LATENCY.labels(model="colbert", kind="query_batch").time():
+            colbert_vectors = list(self._colbert_model.query_embed(query=queries))
+
+        dense_search_params = self.dense_search_params()
+        dense_results = self._query_batch("dense", {
+            i: QueryRequest(
+                query=vector,
+                using=self._dense_embedder.vector_name,
+                params=dense_search_params,
+                limit=limit,
+                with_payload=False
+            )
+            for i, vector in enumerate(dense_vectors)
+        }, len(queries))
+        bm25_results = self._query_batch("bm25", {
+            i: QueryRequest(
+                query=SparseVector(indices=vector.indices.tolist(), values=vector.values.tolist()),
+                using=VECTOR_NAMES["bm25"],
+                limit=limit,
+                with_payload=False
+            )
+            for i, vector in enumerate(bm25_vectors) if len(vector.indices)
+        }, len(queries))
+        colbert_results = self._query_batch("colbert", {
+            i: QueryRequest(
+                query=[vec.tolist() for vec in multi_vector],
+                using=VECTOR_NAMES["colbert"],
+                limit=limit,
+                with_payload=False
+            )
+            for i, multi_vector in enumerate(colbert_vectors)
+        }, len(queries))
+
+        results = [
+            self._fuse([(dense_results[i], alpha), (bm25_results[i], beta), (colbert_results[i], gamma)], limit)
+            for i in range(len(queries))
+        ]
+        self._attach_payloads([hit for hits in results for hit in hits])
+        return results
+
+    def _attach_payloads(self, hits: list, collection_name: str = VECTOR_COLLECTION_NAME) -> list:
+        """
+        Cabang pencarian berjalan tanpa payload. Payload point yang lolos fusion
+        diambil dengan satu retrieve, lalu teks chunk-nya dengan satu bacaan massal
+        dari chunk store dan dipasang sebagai `payload["document"]`. Point lama yang
+        masih menyimpan `document` di payload dipakai apa adanya. Jika retrieve atau
+        chunk store gagal, pencarian tetap mengembalikan hasil dengan payload yang ada
+        (kosong jika retrieve gagal).
+        """
+        if not hits:
+            return hits
+        try:
+            with QDRANT_SEARCH_LATENCY.labels(branch="payload").time():
+                records = self._client.retrieve(
+                    collection_name=collection_name,
+                    ids=list({hit.id for hit in hits}),
+                    with_payload=True,
+                    with_vectors=False
+                )
+        except Exception as e:
+            logging.error(f"Payload retrieve failed: {e}")
+            QDRANT_SEARCH_ERRORS.labels(branch="payload").inc()
+            records = []
+        payloads = {record.id: record.payload or {} for record in records}
+
+        missing_keys = [
+            payload["text_key"] for payload in payloads.values()
+            if "document" not in payload and "text_key" in payload
+        ]
+        if missing_keys:
+            if self._chunk_store is None:
+                logging.warning(f"{len(missing_keys)} points reference external chunk text but CHUNK_TEXT_STORE is not postgres.")
+            else:
+                try:
+                    texts = self._chunk_store.get_many(missing_keys)
+                except Exception as e:
+                    logging.warning(f"Failed to read {len(missing_keys)} chunk texts; using Qdrant payloads only: {e}")
+                    texts = {}
+                for payload in payloads.values():
+                    if "document" not in payload and payload.get("text_key") in texts:
+                        payload["document"] = texts[payload["text_key"]]
+
+        for hit in hits:
+            hit.payload = payloads.get(hit.id, {})
+        return hits
+
     def get_next_id(self) -> int:
+        # Hanya aman jika tidak ada writer lain; writer paralel memakai `point_id`
         try:
             collection_info = self._client.get_collection(collection_name=VECTOR_COLLECTION_NAME)
             return collection_info.points_count
@@ -270,7 +610,7 @@ class QdrantClientService:
             logging.error(f"Failed to get next ID: {e}")
             return 0
     
-    def insert_points(self, points: List[PointStruct], batch_size: int = 25):
+    def insert_points(self, points: List[PointStruct], batch_size: int = 25, collection_name: str = VECTOR_COLLECTION_NAME):
         # logging.info(f"\n\nPoints: {points}\n\n")
         if not self._client:
             logging.error("Qdrant client is not connected.")
@@ -280,7 +620,7 @@ class QdrantClientService:
             for i in range(0, len(points), batch_size):
                 batch = points[i:i+batch_size]
                 self._client.upsert(
-                    collection_name=VECTOR_COLLECTION_NAME,
+                    collection_name=collection_name,
                     points=batch
                 )
                 logging.info(f"Inserted batch {i//batch_size + 1} with {len(batch)} points.")
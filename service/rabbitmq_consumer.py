@@ -3,7 +3,14 @@ from pika import URLParameters, BlockingConnection, exceptions
 from concurrent.futures import ThreadPoolExecutor
 from core.document_processor import DocumentProcessor
 from core.minio import FileProcessor
+from settings import (
+    RABBITMQ_PREFETCH_COUNT,
+    RABBITMQ_CONSUMER_WORKERS,
+    RABBITMQ_CONSUMER_CONCURRENT,
+    RABBITMQ_DRAIN_TIMEOUT_SECONDS
+)
 import logging
+import threading
 import time
 import functools
 import os
@@ -15,7 +22,23 @@ logging.basicConfig(
 )
 
 class RabbitmqConsumer:
-    def __init__(self, rabbitmq_url: str, service_name: str) -> None:
+    """
+    Mode concurrent (default) memproses pesan di thread pool terbatas sehingga
+    I/O loop pika tetap bebas mengirim heartbeat dan menerima pesan lain.
+    Ack/nack dijadwalkan kembali ke thread koneksi lewat add_callback_threadsafe,
+    dan prefetch_count membatasi jumlah pesan yang belum di-ack. Mode sync
+    memproses pesan langsung di callback seperti sebelumnya.
+    """
+
+    def __init__(
+        self,
+        rabbitmq_url: str,
+        service_name: str,
+        prefetch_count: int = RABBITMQ_PREFETCH_COUNT,
+        max_workers: int = RABBITMQ_CONSUMER_WORKERS,
+        concurrent: bool = RABBITMQ_CONSUMER_CONCURRENT,
+        drain_timeout: float = RABBITMQ_DRAIN_TIMEOUT_SECONDS
+    ) -> None:
         self._rabbitmq_url = rabbitmq_url
         self._service_name = service_name
         self._heartbeat_interval = 300
@@ -23,8 +46,14 @@ class RabbitmqConsumer:
         self._connection = None
         self._channel = None
         self._is_ruinning = False
+        self._prefetch_count = prefetch_count
+        self._concurrent = concurrent
+        self._drain_timeout = drain_timeout
 
-        self._executor = ThreadPoolExecutor(max_workers=3)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rabbitmq-consumer")
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._local = threading.local()
 
     def connect(self):
         try:
@@ -62,16 +91,16 @@ class RabbitmqConsumer:
         if not self.connect():
             return
         
-        self.is_running = True
+        self._is_ruinning = True
         logging.info(f"Consuming messages from queue: {self._service_name}. Press CTRL+C to exit.")
         
-        # Mengatur prefetch_count untuk mengelola pesan
-        # self._channel.basic_qos(prefetch_count=1)
+        # Mengatur prefetch_count untuk mengelola pesan; di mode sync hanya satu pesan yang diproses
+        self._channel.basic_qos(prefetch_count=self._prefetch_count if self._concurrent else 1)
 
         # Mulai mengkonsumsi pesan dari queue
         self._channel.basic_consume(
             queue=self._service_name,
-            on_message_callback=self._on_message_received,
+            on_message_callback=self._threaded_callback if self._concurrent else self._on_message_received,
             auto_ack=False # Jangan auto-acknowledge
         )
         
@@ -81,8 +110,34 @@ class RabbitmqConsumer:
         except KeyboardInterrupt:
             logging.info("Consumer stopped by user.")
         finally:
+            self._is_ruinning = False
+            self._drain()
             self.close()
 
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stop(self):
+        """
+        Hentikan konsumsi dari thread mana pun. Pesan yang sedang diproses
+        dibiarkan selesai dan di-ack (lihat _drain) sebelum koneksi ditutup.
+        """
+        if self._connection and self._connection.is_open and self._channel:
+            self._connection.add_callback_threadsafe(self._channel.stop_consuming)
+
+    def _drain(self):
+        # Layani callback ack/nack dari worker sampai semua pesan selesai atau timeout;
+        # pesan yang belum di-ack akan di-requeue broker saat koneksi ditutup.
+        deadline = time.monotonic() + self._drain_timeout
+        while self._in_flight and time.monotonic() < deadline:
+            if not (self._connection and self._connection.is_open):
+                break
+            self._connection.process_data_events(time_limit=0.5)
+        if self._in_flight:
+            logging.warning(f"Shutting down with {self._in_flight} messages still in flight; they will be redelivered.")
+        self._executor.shutdown(wait=False)
+
     def _ack_message(self, delivery_tag):
         if self._channel and self._channel.is_open:
             self._channel.basic_ack(delivery_tag=delivery_tag)
@@ -98,20 +153,46 @@ class RabbitmqConsumer:
             logging.warning("Channel is not open, cannot not acknowledge message.")
 
     def _threaded_callback(self, channel, method, properties, body):
+        # Dipanggil di thread koneksi; pekerjaan berat dipindah ke thread pool
+        delivery_tag = method.delivery_tag
+        with self._in_flight_lock:
+            self._in_flight += 1
+
         def do_work():
             try:
                 logging.info(f"Processing message in thread: {body.decode('utf-8')}")
-                self._on_message_received(channel, method, properties, body)
-
-                cb = functools.partial(self._ack_message, channel, method.delivery_tag)
-                self._connection.add_callback_threadsafe(cb)
+                self.process_message(json.loads(body.decode('utf-8')))
+                cb = functools.partial(self._ack_message, delivery_tag)
             except Exception as e:
+                # Termasuk JSON tidak valid: tanpa nack pesan akan menahan slot prefetch selamanya
                 logging.error(f"Error in threaded callback: {e}")
-                cb = functools.partial(self._nack_message, channel, method.delivery_tag, requeue=False)
-                self._connection.add_callback_threadsafe(cb)
-        
+                cb = functools.partial(self._nack_message, delivery_tag, requeue=False)
+
+            # Channel pika tidak thread-safe; ack/nack harus dijalankan di thread koneksi
+            try:
+                self._connection.add_callback_threadsafe(functools.partial(self._settle, cb))
+            except Exception as e:
+                logging.error(f"Failed to schedule ack/nack for delivery tag {delivery_tag}: {e}")
+                self._finish_message()
+
         self._executor.submit(do_work)
 
+    def _settle(self, ack_or_nack):
+        try:
+            ack_or_nack()
+        finally:
+            self._finish_message()
+
+    def _finish_message(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def _processor(self) -> DocumentProcessor:
+        # Satu DocumentProcessor per thread worker; converter docling tidak dipakai bersama
+        if not hasattr(self._local, "processor"):
+            self._local.processor = DocumentProcessor()
+        return self._local.processor
+
 
     def _on_message_received(self, channel, method, properties, body):
         try:
@@ -142,7 +223,7 @@ class RabbitmqConsumer:
     def process_message(self, message: Dict[str, any]):
         logging.info(f"Processing message: {message}")
         try:
-            processor = DocumentProcessor()
+            processor = self._processor()
             local_temp_path = None
             try:
 
@@ -159,9 +240,8 @@ class RabbitmqConsumer:
 
                 processed_data = processor.process(local_temp_path, message['file_name'])
                 
-                start_id = qdrant_client.get_next_id()
-
-                points = qdrant_client.create_points(processed_data, start_id)
+                # Pesan diproses paralel; ID dari points_count bisa dipakai dua thread sekaligus
+                points = qdrant_client.create_points(processed_data)
 
                 if points:
                     qdrant_client.insert_points(points)
@@ -171,7 +251,8 @@ class RabbitmqConsumer:
 
             except Exception as e:
                 logging.error(f"Failed Data Indexing {e}")
-                os.unlink(local_temp_path)
+                if local_temp_path:
+                    os.unlink(local_temp_path)
                 return
             
         except Exception as e:
@@ -1,5 +1,9 @@
-from typing import Dict
-from pika import BlockingConnection, ConnectionParameters, BasicProperties, URLParameters, exceptions
+from concurrent.futures import Future
+from typing import Dict, List
+from pika import BlockingConnection, ConnectionParameters, BasicProperties, URLParameters, SelectConnection, exceptions
+from settings import RABBITMQ_CONFIRM_TIMEOUT_SECONDS
+import asyncio
+import functools
 import logging
 import threading
 import time
@@ -84,4 +88,211 @@ class RabbitmqProducer:
     def close(self):
         if self._connection and self._connection.is_open:
             self._connection.close()
-            logging.info("RabbitMQ Producer connection closed.")
\ No newline at end of file
+            logging.info("RabbitMQ Producer connection closed.")
+
+
+class PublishNackedError(Exception):
+    pass
+
+
+class ConfirmingRabbitmqProducer:
+    """
+    Producer dengan publisher confirms. Koneksi SelectConnection berjalan di
+    I/O thread sendiri; publish dari thread mana pun hanya menjadwalkan
+    basic_publish ke thread itu dan langsung mendapat Future yang selesai saat
+    broker mengirim ack (atau gagal saat nack/koneksi putus). Broker boleh
+    mengonfirmasi banyak pesan sekaligus (`multiple=True`), sehingga publish
+    beruntun tidak menunggu satu per satu.
+    """
+
+    def __init__(self, rabbitmq_url: str, service_name: str, confirm_timeout: float = RABBITMQ_CONFIRM_TIMEOUT_SECONDS) -> None:
+        self._rabbitmq_url = rabbitmq_url
+        self._service_name = service_name
+        self._heartbeat_interval = 60
+        self._confirm_timeout = confirm_timeout
+        self._connection = None
+        self._channel = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._connect_error = None
+        self._connect_lock = threading.Lock()
+        self._properties = BasicProperties(
+            delivery_mode=2,  # Make message persistent
+            content_type='application/json'
+        )
+        # Hanya diakses dari I/O thread
+        self._next_delivery_tag = 0
+        self._pending: Dict[int, Future] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and self._channel is not None and self._channel.is_open
+
+    def connect(self):
+        with self._connect_lock:
+            if self.is_ready:
+                return
+            logging.info("Connecting to RabbitMQ (publisher confirms)...")
+            if self._connection is not None:
+                # Koneksi lama (mis. channel-nya ditutup broker) dilepas sebelum diganti
+                self._stop_io_thread()
+            self._ready.clear()
+            self._connect_error = None
+
+            parameters = URLParameters(self._rabbitmq_url)
+            parameters.heartbeat = self._heartbeat_interval
+            self._connection = SelectConnection(
+                parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_open_error,
+                on_close_callback=self._on_connection_closed
+            )
+            self._thread = threading.Thread(target=self._connection.ioloop.start, name="rabbitmq-producer-io", daemon=True)
+            self._thread.start()
+
+            if not self._ready.wait(timeout=self._confirm_timeout) or self._connect_error:
+                self._stop_io_thread()
+                raise exceptions.AMQPConnectionError(self._connect_error or "Timed out opening RabbitMQ channel")
+            logging.info("Successfully connected to RabbitMQ Producer with publisher confirms.")
+
+    def _stop_io_thread(self):
+        # Koneksi gagal dibuka atau diganti: tutup socket dan hentikan I/O loop agar thread-nya tidak tertinggal
+        connection, thread = self._connection, self._thread
+
+        def abort():
+            try:
+                if not (connection.is_closing or connection.is_closed):
+                    connection.close()
+            except Exception as e:
+                logging.warning(f"Failed to close RabbitMQ producer connection: {e}")
+            finally:
+                connection.ioloop.stop()
+
+        connection.ioloop.add_callback_threadsafe(abort)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self._confirm_timeout)
+            if thread.is_alive():
+                logging.warning("RabbitMQ producer I/O thread did not stop.")
+        self._connection = None
+        self._channel = None
+        self._thread = None
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        self._connect_error = str(error)
+        self._ready.set()
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        logging.warning(f"RabbitMQ producer connection closed: {reason}")
+        self._channel = None
+        self._fail_pending(exceptions.AMQPConnectionError(f"Connection closed before confirm: {reason}"))
+        connection.ioloop.stop()
+
+    def _on_channel_closed(self, channel, reason):
+        # Broker bisa menutup channel (mis. channel exception) sementara koneksi tetap hidup
+        logging.warning(f"RabbitMQ producer channel closed: {reason}")
+        if self._channel is channel:
+            self._channel = None
+        self._fail_pending(exceptions.AMQPChannelError(f"Channel closed before confirm: {reason}"))
+        if not self._ready.is_set():
+            self._connect_error = str(reason)
+            self._ready.set()
+        connection = self._connection
+        if connection is not None and not (connection.is_closing or connection.is_closed):
+            connection.close()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        self._next_delivery_tag = 0
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.exchange_declare(
+            exchange=self._service_name,
+            exchange_type='topic',
+            durable=True,
+            callback=lambda _: channel.queue_declare(
+                queue=self._service_name,
+                durable=True,
+                callback=lambda _: channel.confirm_delivery(
+                    ack_nack_callback=self._on_delivery_confirmation,
+                    callback=lambda _: self._ready.set()
+                )
+            )
+        )
+
+    def _publish(self, items: List[tuple]):
+        # Berjalan di I/O thread; delivery tag dihitung sendiri sesuai urutan publish di channel
+        for body, future in items:
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not self._channel or not self._channel.is_open:
+                future.set_exception(exceptions.AMQPChannelError("Channel is not open"))
+                continue
+            try:
+                self._channel.basic_publish(
+                    exchange=self._service_name,
+                    routing_key=self._service_name,
+                    body=body,
+                    properties=self._properties
+                )
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self._next_delivery_tag += 1
+            self._pending[self._next_delivery_tag] = future
+
+    def _on_delivery_confirmation(self, frame):
+        method = frame.method
+        confirmed = method.NAME.split('.')[1].lower() == "ack"
+        if method.multiple:
+            tags = [tag for tag in self._pending if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag] if method.delivery_tag in self._pending else []
+        for tag in tags:
+            future = self._pending.pop(tag)
+            if confirmed:
+                future.set_result(tag)
+            else:
+                future.set_exception(PublishNackedError(f"Broker rejected message with delivery tag {tag}"))
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def publish_many(self, messages: List[Dict[str, any]]) -> List[Future]:
+        """Jadwalkan banyak pesan dalam satu callback I/O; masing-masing mendapat Future konfirmasi."""
+        if not self.is_ready:
+            self.connect()
+        items = [(json.dumps(message), Future()) for message in messages]
+        self._connection.ioloop.add_callback_threadsafe(functools.partial(self._publish, items))
+        return [future for _, future in items]
+
+    def publish_nowait(self, message: Dict[str, any]) -> Future:
+        return self.publish_many([message])[0]
+
+    def publish(self, message: Dict[str, any]) -> None:
+        """Publish lalu tunggu konfirmasi broker (antarmuka sama dengan RabbitmqProducer.publish)."""
+        self.publish_nowait(message).result(timeout=self._confirm_timeout)
+        logging.info(f"Message published and confirmed: {message}")
+
+    async def publish_many_async(self, messages: List[Dict[str, any]]) -> None:
+        """Untuk handler FastAPI: menunggu konfirmasi tanpa memblokir event loop."""
+        if not self.is_ready:
+            # connect() memblokir sampai channel siap, jadi jalankan di thread
+            await asyncio.to_thread(self.connect)
+        futures = self.publish_many(messages)
+        await asyncio.wait_for(
+            asyncio.gather(*[asyncio.wrap_future(future) for future in futures]),
+            timeout=self._confirm_timeout
+        )
+
+    def close(self):
+        if self._connection and self._connection.is_open:
+            self._connection.ioloop.add_callback_threadsafe(self._connection.close)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self._confirm_timeout)
+        logging.info("RabbitMQ Producer connection closed.")
@@ -13,6 +13,14 @@ MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
 
 RABBITMQ_URL = os.getenv("RABBITMQ_URL", "rabbitmq")
 RABBITMQ_SERVICE_NAME = os.getenv("RABBITMQ_SERVICE_NAME", "desa-maju-rag-service")
+# Consumer: jumlah pesan belum di-ack maksimum dan ukuran thread pool pemrosesan
+RABBITMQ_CONSUMER_CONCURRENT = os.getenv("RABBITMQ_CONSUMER_CONCURRENT", "true").lower() == "true"
+RABBITMQ_PREFETCH_COUNT = int(os.getenv("RABBITMQ_PREFETCH_COUNT", "3"))
+RABBITMQ_CONSUMER_WORKERS = int(os.getenv("RABBITMQ_CONSUMER_WORKERS", "3"))
+RABBITMQ_DRAIN_TIMEOUT_SECONDS = float(os.getenv("RABBITMQ_DRAIN_TIMEOUT_SECONDS", "60"))
+# Producer: publisher confirms (ack broker per pesan, dikonfirmasi secara batch)
+RABBITMQ_PUBLISHER_CONFIRMS = os.getenv("RABBITMQ_PUBLISHER_CONFIRMS", "true").lower() == "true"
+RABBITMQ_CONFIRM_TIMEOUT_SECONDS = float(os.getenv("RABBITMQ_CONFIRM_TIMEOUT_SECONDS", "10"))
 
 BUCKET_NAME = "rag-bucket-desa-maju"
 LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", "storage")
@@ -20,9 +28,37 @@ LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", "storage")
 MINIO_HOST = os.getenv("MINIO_HOST", "minio")
 MINIO_PORT = int(os.getenv("MINIO_PORT", "9000"))
 
+# Presigned upload langsung ke MinIO. Signature memuat host, jadi URL harus
+# ditandatangani dengan endpoint yang dijangkau klien (bukan hostname internal).
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", f"{MINIO_HOST}:{MINIO_PORT}")
+MINIO_PUBLIC_SECURE = os.getenv("MINIO_PUBLIC_SECURE", "false").lower() == "true"
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+PRESIGNED_UPLOAD_EXPIRY_SECONDS = int(os.getenv("PRESIGNED_UPLOAD_EXPIRY_SECONDS", "3600"))
+PRESIGNED_UPLOAD_MAX_BYTES = int(os.getenv("PRESIGNED_UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+
 GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
 MODEL_ID = "nomic-ai/nomic-embed-text-v2-moe"
 MODEL_NAME = "nomic-embed-text-v2-moe"
+LOCAL_TOKENIZER_PATH = f"{LOCAL_STORAGE_PATH}/tokenizer/{MODEL_NAME}"
+
+# Backend embedding dense: "gemini" (API) atau "fastembed" (model ONNX lokal).
+# Mengganti backend mengubah nama/ukuran vektor, jadi perlu koleksi baru.
+DENSE_EMBEDDING_BACKEND = os.getenv("DENSE_EMBEDDING_BACKEND", "gemini")
+DENSE_EMBEDDING_MODEL = os.getenv("DENSE_EMBEDDING_MODEL", "nomic-ai/nomic-embed-text-v1.5")
+DENSE_EMBEDDING_BATCH_SIZE = int(os.getenv("DENSE_EMBEDDING_BATCH_SIZE", "32"))
+DENSE_EMBEDDING_THREADS = int(os.getenv("DENSE_EMBEDDING_THREADS", "0")) or None
+# Dimensi keluaran Matryoshka (0 = dimensi asli model)
+DENSE_OUTPUT_DIMENSIONALITY = int(os.getenv("DENSE_OUTPUT_DIMENSIONALITY", "0")) or None
+
+# Skema koleksi Qdrant; terapkan ke koleksi yang sudah ada dengan `python migrate.py qdrant`
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")  # none | scalar | binary
+QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+QDRANT_SEARCH_RESCORE = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+QDRANT_SEARCH_OVERSAMPLING = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", "2.0"))
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+QDRANT_HNSW_EF_SEARCH = int(os.getenv("QDRANT_HNSW_EF_SEARCH", "0")) or None
+QDRANT_ON_DISK_PAYLOAD = os.getenv("QDRANT_ON_DISK_PAYLOAD", "false").lower() == "true"
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -33,3 +69,99 @@ REDIS_URL = os.getenv(
     "REDIS_URL",
     "redis://:taufikdev@localhost:6379/0"
 )
+
+# Dokumen dengan jumlah halaman di atas threshold dipecah menjadi beberapa
+# subtask Celery (rentang halaman) yang bisa dikerjakan worker mana saja.
+DOCUMENT_FANOUT_PAGE_THRESHOLD = int(os.getenv("DOCUMENT_FANOUT_PAGE_THRESHOLD", "40"))
+DOCUMENT_FANOUT_PAGES_PER_TASK = int(os.getenv("DOCUMENT_FANOUT_PAGES_PER_TASK", "20"))
+
+# Ukuran bagian konversi docling dipilih dari perkiraan biaya per halaman
+# (gambar, kepadatan teks); bagian yang gagal/timeout dibagi dua dan dicoba ulang
+PAGE_PART_MAX_COST = float(os.getenv("PAGE_PART_MAX_COST", "15"))
+PAGE_PART_MAX_PAGES = int(os.getenv("PAGE_PART_MAX_PAGES", "10"))
+DOCLING_PART_TIMEOUT_SECONDS = float(os.getenv("DOCLING_PART_TIMEOUT_SECONDS", "300"))
+
+# Lama status job ingestion disimpan di Redis
+JOB_STATUS_TTL_SECONDS = int(os.getenv("JOB_STATUS_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Port HTTP untuk metrik Prometheus di worker Celery (0 = nonaktif)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+
+# Profiling on-demand (header X-Profile pada chat, opsi profile pada upload)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+# LLM gateway: satu instance model bersama dengan batas konkurensi dan antrean.
+# LLM_BACKEND=stub memakai model lokal palsu untuk load test.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-1.5-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_STUB_TTFT_MS = float(os.getenv("LLM_STUB_TTFT_MS", "300"))
+LLM_STUB_TOKEN_INTERVAL_MS = float(os.getenv("LLM_STUB_TOKEN_INTERVAL_MS", "20"))
+LLM_STUB_TOKENS = int(os.getenv("LLM_STUB_TOKENS", "50"))
+
+# Jumlah template text-to-SQL yang disimpan di cache
+SQL_PLAN_CACHE_SIZE = int(os.getenv("SQL_PLAN_CACHE_SIZE", "256"))
+# Role Postgres (hanya SELECT ke tabel yang diizinkan) untuk menjalankan SQL hasil LLM; kosong = role koneksi
+SQL_QUERY_ROLE = os.getenv("SQL_QUERY_ROLE", "")
+
+# Pool koneksi Postgres untuk engine async yang dibuat sekali di lifespan
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
+# Tempat teks chunk: "qdrant" (payload `document`, default) atau "postgres" (tabel
+# chunk_texts, terkompresi; payload Qdrant hanya berisi text_key dan metadata).
+# Jalankan migrate.py sebelum mengaktifkan "postgres".
+CHUNK_TEXT_STORE = os.getenv("CHUNK_TEXT_STORE", "qdrant")
+CHUNK_TEXT_COMPRESSION_LEVEL = int(os.getenv("CHUNK_TEXT_COMPRESSION_LEVEL", "6"))
+
+# Katalog dokumen (tabel files): update dari worker ditulis per batch setiap interval
+CATALOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("CATALOG_FLUSH_INTERVAL_SECONDS", "1"))
+DOCUMENTS_PAGE_MAX_LIMIT = int(os.getenv("DOCUMENTS_PAGE_MAX_LIMIT", "200"))
+
+# Batas hasil query DB yang diteruskan ke LLM
+DB_MAX_ROWS = int(os.getenv("DB_MAX_ROWS", "200"))
+DB_CONTEXT_MAX_TOKENS = int(os.getenv("DB_CONTEXT_MAX_TOKENS", "2000"))
+
+# Anggaran token konteks dokumen yang dikirim ke LLM
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))
+
+# Retrieval spekulatif: pertanyaan ambigu menjalankan pencarian dokumen dan DB bersamaan
+SPECULATIVE_RETRIEVAL_ENABLED = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "true").lower() == "true"
+RETRIEVAL_DEADLINE_SECONDS = float(os.getenv("RETRIEVAL_DEADLINE_SECONDS", "8"))
+SPECULATIVE_MERGE_GRACE_SECONDS = float(os.getenv("SPECULATIVE_MERGE_GRACE_SECONDS", "0.5"))
+
+# Rerank kandidat hybrid search dengan cross-encoder ONNX lokal (fastembed).
+# RERANK_CANDIDATES kandidat hasil fusion dinilai, RERANK_TOP_K teratas masuk prompt.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "jinaai/jina-reranker-v2-base-multilingual")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "5"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "0")) or None
+RERANK_TIMEOUT_SECONDS = float(os.getenv("RERANK_TIMEOUT_SECONDS", "1.5"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+
+# Request chat identik yang datang bersamaan berbagi satu retrieval dan satu stream LLM
+CHAT_COALESCING_ENABLED = os.getenv("CHAT_COALESCING_ENABLED", "true").lower() == "true"
+
+# Re-index blue/green: VECTOR_COLLECTION_NAME adalah alias ke koleksi berversi
+REINDEX_WORKERS = int(os.getenv("REINDEX_WORKERS", "2"))
+REINDEX_MAX_POINTS_PER_SECOND = float(os.getenv("REINDEX_MAX_POINTS_PER_SECOND", "200"))
+
+# Simpan DoclingDocument hasil konversi di MinIO agar re-embed tidak mengonversi ulang
+DOCLING_ARTIFACT_CACHE_ENABLED = os.getenv("DOCLING_ARTIFACT_CACHE_ENABLED", "true").lower() == "true"
+
+# Batch upload: jumlah file per request dan upload MinIO yang berjalan bersamaan
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "500"))
+UPLOAD_BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "8"))
+
+# Batch search: jumlah query maksimum per request /api/search/batch
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "64"))
@@ -0,0 +1,17 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.chunk_store import text_key, compress_text, decompress_text, create_chunk_store
+
+def test_compress_round_trip_and_shrinks_repetitive_text():
+    text = "Anggaran dana desa untuk perbaikan jalan. " * 50
+    data = compress_text(text)
+    assert decompress_text(data) == text
+    assert len(data) < len(text.encode("utf-8")) / 5
+
+def test_text_key_is_content_based():
+    assert text_key("dana desa") == text_key("dana desa")
+    assert text_key("dana desa") != text_key("dana desa 2024")
+    assert len(text_key("dana desa")) == 64
+
+def test_qdrant_backend_keeps_text_in_payload():
+    assert create_chunk_store("qdrant") is None
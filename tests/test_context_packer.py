@@ -0,0 +1,60 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.context_packer import ContextPacker, strip_overlap, similarity
+
+def count_words(text):
+    return len(text.split())
+
+def make_packer(max_tokens=1000):
+    return ContextPacker(max_tokens=max_tokens, dedup_threshold=0.9, count_tokens=count_words)
+
+def test_similarity_identical_and_different():
+    assert similarity("dana desa dipakai untuk jalan", "Dana desa dipakai untuk jalan.") == 1.0
+    assert similarity("dana desa dipakai untuk jalan", "posyandu buka setiap senin pagi") == 0.0
+
+def test_strip_overlap_removes_repeated_heading_and_suffix():
+    existing = "Laporan Keuangan\nDana desa tahun ini dipakai untuk perbaikan jalan"
+    incoming = "Laporan Keuangan\nperbaikan jalan dan saluran irigasi"
+
+    assert strip_overlap(existing, incoming) == "dan saluran irigasi"
+
+def test_pack_drops_near_duplicates():
+    text = "Dana desa tahun 2024 dipakai untuk perbaikan jalan utama dan saluran irigasi desa"
+    documents = [
+        {"document": text, "filename": "a.pdf", "page_number": 1},
+        {"document": text + ".", "filename": "b.pdf", "page_number": 3},
+    ]
+
+    context, stats = make_packer().pack(documents)
+
+    assert stats["used"] == 1
+    assert stats["duplicate"] == 1
+    assert "b.pdf" not in context
+
+def test_pack_merges_same_page_under_one_header():
+    documents = [
+        {"document": "Bab 1\nPosyandu buka setiap senin", "filename": "a.pdf", "page_number": 2},
+        {"document": "Anggaran jalan desa sebesar 100 juta", "filename": "b.pdf", "page_number": 5},
+        {"document": "Bab 1\nsetiap senin dan kamis pagi", "filename": "a.pdf", "page_number": 2},
+    ]
+
+    context, stats = make_packer().pack(documents)
+
+    assert stats["merged"] == 1
+    assert context.count("[a.pdf - Page 2]") == 1
+    assert context.count("Bab 1") == 1
+    assert context.index("dan kamis pagi") < context.index("[b.pdf - Page 5]")
+
+def test_pack_respects_budget_in_relevance_order():
+    documents = [
+        {"document": "satu dua tiga empat lima", "filename": "a.pdf", "page_number": 1},
+        {"document": " ".join(["panjang"] * 50), "filename": "b.pdf", "page_number": 1},
+        {"document": "enam tujuh delapan", "filename": "c.pdf", "page_number": 1},
+    ]
+
+    context, stats = make_packer(max_tokens=20).pack(documents)
+
+    assert stats["over_budget"] == 1
+    assert stats["tokens"] <= 20
+    assert "b.pdf" not in context
+    assert context.index("a.pdf") < context.index("c.pdf")
@@ -0,0 +1,49 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from docling_core.types.doc import BoundingBox, DocItemLabel, DoclingDocument, ProvenanceItem, Size, TableData
+from core.document_merge import merge_documents, offset_pages
+
+
+def make_part(pages, texts, offset=0):
+    """Dokumen satu bagian PDF seperti hasil docling: halaman dimulai dari 1."""
+    doc = DoclingDocument(name="laporan")
+    for page_no in range(1, pages + 1):
+        doc.add_page(page_no=page_no, size=Size(width=600, height=800))
+    for page_no, text in texts:
+        doc.add_text(
+            label=DocItemLabel.TEXT,
+            text=text,
+            prov=ProvenanceItem(page_no=page_no, bbox=BoundingBox(l=0, t=0, r=10, b=10), charspan=(0, len(text)))
+        )
+    return offset_pages(doc, offset)
+
+
+def test_offset_pages_shifts_pages_and_provenance():
+    doc = make_part(2, [(1, "halaman tiga"), (2, "halaman empat")], offset=2)
+    assert sorted(doc.pages) == [3, 4]
+    assert [text.prov[0].page_no for text in doc.texts] == [3, 4]
+
+def test_merge_keeps_items_of_every_part():
+    first = make_part(2, [(1, "dana desa"), (2, "jalan desa")])
+    second = make_part(2, [(1, "posyandu"), (2, "irigasi")], offset=2)
+    second.add_table(data=TableData(num_rows=1, num_cols=1))
+
+    merged = merge_documents([first, second])
+
+    assert [text.text for text in merged.texts] == ["dana desa", "jalan desa", "posyandu", "irigasi"]
+    assert [text.prov[0].page_no for text in merged.texts] == [1, 2, 3, 4]
+    assert len(merged.tables) == 1
+    assert sorted(merged.pages) == [1, 2, 3, 4]
+
+def test_merge_keeps_original_page_numbers_around_failed_pages():
+    # Halaman 3-4 gagal dikonversi; bagian berikutnya tetap halaman 5-6
+    first = make_part(2, [(1, "a"), (2, "b")])
+    third = make_part(2, [(1, "e"), (2, "f")], offset=4)
+
+    merged = merge_documents([first, third])
+
+    assert sorted(merged.pages) == [1, 2, 5, 6]
+    assert [text.prov[0].page_no for text in merged.texts] == [1, 2, 5, 6]
+
+def test_merge_of_nothing_is_none():
+    assert merge_documents([]) is None
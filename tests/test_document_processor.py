@@ -0,0 +1,61 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from docling_core.transforms.chunker import HierarchicalChunker
+from core.document_processor import DocumentProcessor
+from test_document_merge import make_part
+
+
+class FakeEmbedding:
+    label = "fake"
+
+    def embed(self, docs):
+        return [[0.0] for _ in docs]
+
+    def embed_documents(self, docs):
+        return [[0.0] for _ in docs]
+
+
+def make_processor():
+    # Lewati __init__ agar model docling/fastembed tidak dimuat
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor._chunker = HierarchicalChunker()
+    processor._bm25_embbeding_model = FakeEmbedding()
+    processor._late_interaction_embedding_model = FakeEmbedding()
+    processor._dense_embedding_model = FakeEmbedding()
+    return processor
+
+
+def test_embed_document_includes_every_page_range():
+    processor = make_processor()
+    parts = [
+        make_part(2, [(1, "anggaran dana desa"), (2, "perbaikan jalan")]),
+        make_part(2, [(1, "jadwal posyandu"), (2, "saluran irigasi")], offset=2)
+    ]
+
+    processed = processor.embed_document(processor.merge_documents(parts), "laporan.pdf")
+
+    text = "\n".join(processed["docs"])
+    assert "jadwal posyandu" in text and "saluran irigasi" in text
+    pages = [chunk.meta.doc_items[0].prov[0].page_no for chunk in processed["chunks"]]
+    assert 3 in pages and 4 in pages
+
+def test_partial_conversion_keeps_converted_pages_and_retries_missing_ones():
+    processor = make_processor()
+    calls = []
+
+    def convert(file_path, filename, start_page, end_page, job):
+        calls.append((start_page, end_page))
+        if (start_page, end_page) == (0, 4):
+            # Timeout setelah halaman 0-1: halaman 2-3 hilang dari hasil
+            return make_part(2, [(1, "halaman satu"), (2, "halaman dua")]), [2, 3]
+        if (start_page, end_page) == (2, 4):
+            return make_part(1, [(1, "halaman tiga")], offset=2), [3]
+        return make_part(0, []), list(range(start_page, end_page))
+
+    processor._convert_single_range = convert
+    docs, failed_pages = processor.convert_ranges("laporan.pdf", "laporan.pdf", [(0, 4)])
+
+    assert calls == [(0, 4), (2, 4), (3, 4)]
+    assert failed_pages == [3]
+    merged = processor.merge_documents(docs)
+    assert [text.text for text in merged.texts] == ["halaman satu", "halaman dua", "halaman tiga"]
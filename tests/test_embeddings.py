@@ -0,0 +1,126 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.embeddings import DenseEmbedder, FastEmbedDenseEmbedder, GeminiDenseEmbedder, GEMINI_MAX_BATCH_SIZE
+
+
+class ConstantEmbedder(DenseEmbedder):
+    label = "constant"
+    vector_name = "constant"
+    size = 2
+
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [0.0, 1.0]
+
+
+class FakeTextEmbedding:
+    """Pengganti fastembed.TextEmbedding: vektor 4 dimensi, mencatat teks yang dikirim."""
+    calls = []
+
+    def __init__(self, model_name, cache_dir=None, threads=None):
+        self.model_name = model_name
+
+    @classmethod
+    def list_supported_models(cls):
+        return [{"model": "nomic-ai/nomic-embed-text-v1.5", "dim": 4}]
+
+    def embed(self, texts, batch_size=None):
+        FakeTextEmbedding.calls.append(list(texts))
+        for _ in texts:
+            yield np.array([3.0, 4.0, 12.0, 84.0])
+
+
+def make_fastembed(output_dimensionality=None):
+    FakeTextEmbedding.calls = []
+    with patch("fastembed.TextEmbedding", FakeTextEmbedding):
+        return FastEmbedDenseEmbedder(
+            model_name="nomic-ai/nomic-embed-text-v1.5",
+            batch_size=8,
+            threads=None,
+            output_dimensionality=output_dimensionality
+        )
+
+
+def fake_embed_content(content, model, task_type, **kwargs):
+    if isinstance(content, list):
+        return {"embedding": [[float(len(content))] for _ in content]}
+    return {"embedding": [1.0]}
+
+
+def test_dense_embedder_is_abstract():
+    with pytest.raises(TypeError):
+        DenseEmbedder()
+
+def test_backend_missing_embed_query_cannot_be_instantiated():
+    class DocumentsOnly(DenseEmbedder):
+        def embed_documents(self, texts):
+            return []
+
+    with pytest.raises(TypeError):
+        DocumentsOnly()
+
+def test_embed_queries_defaults_to_embed_query():
+    assert ConstantEmbedder().embed_queries(["a", "b"]) == [[0.0, 1.0], [0.0, 1.0]]
+
+def test_fastembed_truncates_and_renormalizes():
+    embedder = make_fastembed(output_dimensionality=2)
+
+    vector = embedder.embed_documents(["dana desa"])[0]
+
+    assert embedder.size == 2
+    assert len(vector) == 2
+    assert vector == pytest.approx([0.6, 0.8])
+    assert np.linalg.norm(vector) == pytest.approx(1.0)
+
+def test_fastembed_size_is_clamped_to_native_dimension():
+    embedder = make_fastembed(output_dimensionality=1024)
+
+    vector = embedder.embed_query("dana desa")
+
+    assert embedder.size == 4
+    assert vector == [3.0, 4.0, 12.0, 84.0]
+
+def test_fastembed_sends_task_prefixes_to_model():
+    embedder = make_fastembed()
+
+    embedder.embed_documents(["laporan"])
+    embedder.embed_query("berapa dana desa?")
+    embedder.embed_queries(["q1", "q2"])
+
+    assert FakeTextEmbedding.calls == [
+        ["search_document: laporan"],
+        ["search_query: berapa dana desa?"],
+        ["search_query: q1", "search_query: q2"]
+    ]
+
+@patch("google.generativeai.configure")
+@patch("google.generativeai.embed_content", side_effect=fake_embed_content)
+def test_gemini_embeds_documents_in_batches(mock_embed_content, mock_configure):
+    embedder = GeminiDenseEmbedder(output_dimensionality=None)
+
+    vectors = embedder.embed_documents([f"teks {i}" for i in range(250)])
+
+    batch_sizes = [len(call.kwargs["content"]) for call in mock_embed_content.call_args_list]
+    assert batch_sizes == [GEMINI_MAX_BATCH_SIZE, GEMINI_MAX_BATCH_SIZE, 50]
+    assert all(call.kwargs["task_type"] == "retrieval_document" for call in mock_embed_content.call_args_list)
+    assert "output_dimensionality" not in mock_embed_content.call_args.kwargs
+    assert len(vectors) == 250
+
+@patch("google.generativeai.configure")
+@patch("google.generativeai.embed_content", side_effect=fake_embed_content)
+def test_gemini_embeds_queries_in_batches(mock_embed_content, mock_configure):
+    embedder = GeminiDenseEmbedder(batch_size=500, output_dimensionality=256)
+
+    vectors = embedder.embed_queries([f"q{i}" for i in range(120)])
+
+    batch_sizes = [len(call.kwargs["content"]) for call in mock_embed_content.call_args_list]
+    assert batch_sizes == [GEMINI_MAX_BATCH_SIZE, 20]
+    assert all(call.kwargs["task_type"] == "retrieval_query" for call in mock_embed_content.call_args_list)
+    assert mock_embed_content.call_args.kwargs["output_dimensionality"] == 256
+    assert embedder.size == 256
+    assert len(vectors) == 120
@@ -0,0 +1,62 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+from repository.file_repo import encode_cursor, decode_cursor, update_files_by_job
+from service.catalog_writer import CatalogWriter
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 10, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, "abc-123")) == (created_at, "abc-123")
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("bukan-cursor")
+
+def test_updates_with_same_columns_share_one_statement():
+    connection = MagicMock()
+    update_files_by_job(connection, {
+        "job-1": {"status": "processing", "page_count": 10},
+        "job-2": {"page_count": 3, "status": "processing"},
+        "job-3": {"status": "failed"}
+    })
+
+    assert connection.execute.call_count == 2
+    params = sorted(len(call.args[1]) for call in connection.execute.call_args_list)
+    assert params == [1, 2]
+
+def test_catalog_writer_merges_updates_per_job():
+    writer = CatalogWriter("postgresql://test", flush_interval=60)
+    writer._ensure_thread = lambda: None
+    written = []
+    writer._write = written.append
+
+    writer.update("job-1", status="processing", page_count=4)
+    writer.update("job-1", status="indexed", chunk_count=12)
+    writer.update("job-2", status="failed")
+    writer.flush()
+
+    assert written == [{
+        "job-1": {"status": "indexed", "page_count": 4, "chunk_count": 12},
+        "job-2": {"status": "failed"}
+    }]
+
+def test_catalog_writer_is_disabled_without_database_url():
+    writer = CatalogWriter(None)
+    writer.update("job-1", status="processing")
+    assert writer._queue.empty()
+
+def test_files_upgrade_covers_catalog_columns_and_indexes():
+    from migrate import FILES_UPGRADE_STATEMENTS
+    from models.File import File
+
+    # Kolom yang sudah ada di tabel `files` sebelum katalog dokumen
+    original_columns = {"id", "file_name", "file_path", "file_size", "file_type", "created_at", "user_id"}
+    statements = " ".join(FILES_UPGRADE_STATEMENTS)
+    for column in File.__table__.columns:
+        if column.name not in original_columns:
+            assert f"ADD COLUMN IF NOT EXISTS {column.name} " in statements
+    for index in File.__table__.indexes:
+        if not set(index.columns.keys()) & original_columns or len(index.columns) > 1:
+            assert f"IF NOT EXISTS {index.name} " in statements
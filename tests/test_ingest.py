@@ -0,0 +1,28 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ingest import stable_object_name, find_local_files
+
+
+def test_stable_object_name_depends_only_on_content(tmp_path):
+    first = tmp_path / "laporan.pdf"
+    first.write_bytes(b"isi dokumen")
+    same = tmp_path / "salinan.pdf"
+    same.write_bytes(b"isi dokumen")
+
+    name = stable_object_name(str(first), "laporan.pdf")
+
+    assert stable_object_name(str(first), "laporan.pdf") == name
+    assert stable_object_name(str(same), "laporan.pdf") == name
+    first.write_bytes(b"isi dokumen revisi")
+    assert stable_object_name(str(first), "laporan.pdf") != name
+    assert name.endswith("_laporan.pdf")
+
+def test_find_local_files_uses_relative_path_names(tmp_path):
+    (tmp_path / "2024").mkdir()
+    (tmp_path / "2024" / "apbdes.pdf").write_bytes(b"a")
+    (tmp_path / "apbdes.pdf").write_bytes(b"b")
+    (tmp_path / "catatan.md").write_bytes(b"c")
+
+    names = [name for _, name in find_local_files(str(tmp_path))]
+
+    assert sorted(names) == ["2024_apbdes.pdf", "apbdes.pdf"]
@@ -0,0 +1,151 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import service.job_tracker as job_tracker_module
+
+@patch("service.job_tracker.redis")
+def test_get_parses_progress_and_durations(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.hgetall.return_value = {
+        "job_id": "abc",
+        "status": "running",
+        "stage": "convert",
+        "count:pages_converted": "20",
+        "duration:download": "0.51234"
+    }
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    job = tracker.get("abc")
+
+    mock_client.hgetall.assert_called_once_with("ingestion:job:abc")
+    assert job["status"] == "running"
+    assert job["stage"] == "convert"
+    assert job["progress"] == {"pages_converted": 20}
+    assert job["durations"] == {"download": 0.512}
+
+@patch("service.job_tracker.redis")
+def test_get_missing_job(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.hgetall.return_value = {}
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+
+    assert tracker.get("missing") is None
+
+@patch("service.job_tracker.redis")
+def test_stage_records_duration(mock_redis):
+    mock_client = MagicMock()
+    mock_pipe = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.pipeline.return_value = mock_pipe
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    job = tracker.job("abc")
+
+    with job.stage("chunk"):
+        pass
+
+    mock_pipe.hset.assert_any_call("ingestion:job:abc", mapping={"status": "running", "stage": "chunk"})
+    field, seconds = mock_pipe.hincrbyfloat.call_args[0][1:]
+    assert field == "duration:chunk"
+    assert seconds >= 0
+
+@patch("service.job_tracker.redis")
+def test_write_failure_does_not_raise(mock_redis):
+    mock_redis.Redis.from_url.side_effect = Exception("Redis down")
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+
+    # Status job tidak boleh menggagalkan ingestion
+    tracker.update("abc", status="running")
+
+def test_job_without_id_is_noop():
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    job = tracker.job(None)
+
+    assert isinstance(job, job_tracker_module.NullIngestionJob)
+    with job.stage("download"):
+        job.increment("pages_converted")
+    assert tracker._client is None
+
+@patch("service.job_tracker.redis")
+def test_create_batch_writes_jobs_and_batch_list_in_one_pipeline(mock_redis):
+    mock_client = MagicMock()
+    mock_pipe = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.pipeline.return_value = mock_pipe
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    tracker.create_batch("batch-1", {"job-a": "a.pdf", "job-b": "b.pdf"})
+
+    mock_client.pipeline.assert_called_once()
+    mapping = mock_pipe.hset.call_args_list[0].kwargs["mapping"]
+    assert mapping["batch_id"] == "batch-1"
+    assert mapping["status"] == "queued"
+    mock_pipe.rpush.assert_called_once_with("ingestion:batch:batch-1", "job-a", "job-b")
+    mock_pipe.execute.assert_called_once()
+
+@patch("service.job_tracker.redis")
+def test_get_batch_summarizes_job_statuses(mock_redis):
+    mock_client = MagicMock()
+    mock_pipe = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.pipeline.return_value = mock_pipe
+    mock_client.lrange.return_value = ["job-a", "job-b", "job-c"]
+    mock_pipe.execute.return_value = [
+        ["a.pdf", "success", "done", "ok"],
+        ["b.pdf", "running", "convert", None],
+        [None, None, None, None]
+    ]
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    batch = tracker.get_batch("batch-1")
+
+    assert batch["total"] == 3
+    assert batch["finished"] == 1
+    assert batch["status_counts"] == {"success": 1, "running": 1, "unknown": 1}
+    assert batch["jobs"][1] == {"job_id": "job-b", "file_name": "b.pdf", "status": "running", "stage": "convert", "message": None}
+
+@patch("service.job_tracker.redis")
+def test_get_missing_batch(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.lrange.return_value = []
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+
+    assert tracker.get_batch("missing") is None
+
+@patch("service.job_tracker.redis")
+def test_set_once_only_first_caller_wins(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.hsetnx.side_effect = [1, 0]
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+
+    assert tracker.set_once("abc", "completed_at", "2025-01-01T00:00:00") is True
+    assert tracker.set_once("abc", "completed_at", "2025-01-01T00:00:01") is False
+    mock_client.hsetnx.assert_called_with("ingestion:job:abc", "completed_at", "2025-01-01T00:00:01")
+
+@patch("service.job_tracker.redis")
+def test_clear_releases_set_once_marker(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    tracker.clear("abc", "completed_at")
+
+    mock_client.hdel.assert_called_once_with("ingestion:job:abc", "completed_at")
+
+@patch("service.job_tracker.redis")
+def test_clear_failure_does_not_raise(mock_redis):
+    mock_client = MagicMock()
+    mock_redis.Redis.from_url.return_value = mock_client
+    mock_client.hdel.side_effect = Exception("redis down")
+
+    tracker = job_tracker_module.JobTracker("redis://localhost:6379/0")
+    tracker.clear("abc", "completed_at")
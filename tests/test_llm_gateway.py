@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.llm_gateway import LLMGateway, LLMOverloadedError
+
+
+def make_gateway(**kwargs):
+    options = {
+        "model_name": "stub",
+        "max_concurrency": 2,
+        "max_queue": 2,
+        "queue_timeout": 1.0,
+        "backend": "stub",
+        "stub_options": {"ttft": 0.01, "token_interval": 0.001, "tokens": 3}
+    }
+    options.update(kwargs)
+    return LLMGateway(**options)
+
+
+def test_stream_returns_stub_tokens():
+    async def run():
+        gateway = make_gateway()
+        lease = await gateway.acquire()
+        try:
+            return [text async for text in gateway.stream("halo")]
+        finally:
+            lease.release()
+
+    assert asyncio.run(run()) == ["token0 ", "token1 ", "token2 "]
+
+
+def test_rejects_when_queue_full():
+    async def run():
+        gateway = make_gateway(max_concurrency=1, max_queue=1)
+        first = await gateway.acquire()
+        waiter = asyncio.create_task(gateway.acquire())
+        await asyncio.sleep(0)
+        assert gateway.waiting == 1
+
+        with pytest.raises(LLMOverloadedError):
+            await gateway.acquire()
+
+        first.release()
+        second = await waiter
+        second.release()
+        assert gateway.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_rejects_after_queue_deadline():
+    async def run():
+        gateway = make_gateway(max_concurrency=1, queue_timeout=0.05)
+        lease = await gateway.acquire()
+
+        with pytest.raises(LLMOverloadedError):
+            await gateway.acquire()
+        assert gateway.waiting == 0
+
+        lease.release()
+
+    asyncio.run(run())
+
+
+def test_capacity_is_restored_after_timeouts_and_cancellations():
+    async def run():
+        gateway = make_gateway(max_concurrency=2, max_queue=50, queue_timeout=0.01)
+        for _ in range(50):
+            held = [await gateway.acquire(), await gateway.acquire()]
+            waiters = [asyncio.create_task(gateway.acquire()) for _ in range(6)]
+            await asyncio.sleep(0)
+            # Slot diberikan ke waiter tepat saat sebagian waiter dibatalkan
+            for lease in held:
+                lease.release()
+            for waiter in waiters[:3]:
+                waiter.cancel()
+            for result in await asyncio.gather(*waiters, return_exceptions=True):
+                if not isinstance(result, BaseException):
+                    result.release()
+        await asyncio.sleep(0)
+
+        assert gateway.waiting == 0
+        assert gateway.in_flight == 0
+        # Kapasitas penuh kembali: dua slot bisa diambil tanpa menunggu
+        leases = [await asyncio.wait_for(gateway.acquire(), timeout=0.1) for _ in range(2)]
+        assert gateway._semaphore.locked()
+        for lease in leases:
+            lease.release()
+
+    asyncio.run(run())
+
+
+def test_waiters_are_served_in_order():
+    async def run():
+        gateway = make_gateway(max_concurrency=1, max_queue=5)
+        served = []
+        first = await gateway.acquire()
+
+        async def wait(name):
+            lease = await gateway.acquire()
+            served.append(name)
+            lease.release()
+
+        tasks = [asyncio.create_task(wait(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        first.release()
+        await asyncio.gather(*tasks)
+        return served
+
+    assert asyncio.run(run()) == [0, 1, 2]
+
+
+def test_release_is_idempotent():
+    async def run():
+        gateway = make_gateway(max_concurrency=1)
+        lease = await gateway.acquire()
+        lease.release()
+        lease.release()
+        assert gateway.in_flight == 0
+        # Slot hanya dikembalikan sekali
+        again = await gateway.acquire()
+        assert gateway._semaphore.locked()
+        again.release()
+
+    asyncio.run(run())
@@ -0,0 +1,38 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.page_planner import estimate_page_cost, plan_page_ranges, split_page_range, page_runs
+
+def test_estimate_page_cost_grows_with_images_and_text():
+    plain = estimate_page_cost(image_count=0, text_chars=0)
+    assert plain == 1.0
+    assert estimate_page_cost(image_count=4, text_chars=0) > plain
+    assert estimate_page_cost(image_count=0, text_chars=6000) > plain
+    # Jumlah gambar dibatasi agar satu halaman katalog tidak mendominasi
+    assert estimate_page_cost(image_count=100, text_chars=0) == estimate_page_cost(image_count=10, text_chars=0)
+
+def test_plan_page_ranges_respects_max_pages_for_simple_pages():
+    ranges = plan_page_ranges([1.0] * 25, max_cost=100, max_pages=10)
+    assert ranges == [(0, 10), (10, 20), (20, 25)]
+
+def test_plan_page_ranges_makes_heavy_pages_smaller_parts():
+    costs = [1.0, 1.0, 6.0, 6.0, 6.0, 1.0, 1.0]
+    ranges = plan_page_ranges(costs, max_cost=8, max_pages=10)
+    assert ranges == [(0, 3), (3, 4), (4, 7)]
+    # Semua halaman tercakup tepat satu kali
+    assert [page for start, end in ranges for page in range(start, end)] == list(range(len(costs)))
+
+def test_plan_page_ranges_page_above_budget_is_its_own_part():
+    assert plan_page_ranges([20.0, 1.0], max_cost=5, max_pages=10) == [(0, 1), (1, 2)]
+
+def test_plan_page_ranges_offset_and_empty():
+    assert plan_page_ranges([1.0, 1.0, 1.0], max_cost=2, max_pages=10, offset=40) == [(40, 42), (42, 43)]
+    assert plan_page_ranges([], max_cost=10, max_pages=10) == []
+
+def test_split_page_range_halves_until_single_page():
+    assert split_page_range(10, 20) == [(10, 15), (15, 20)]
+    assert split_page_range(4, 7) == [(4, 5), (5, 7)]
+    assert split_page_range(3, 4) == [(3, 4)]
+
+def test_page_runs_groups_consecutive_pages():
+    assert page_runs([7, 3, 4, 9, 8]) == [(3, 5), (7, 10)]
+    assert page_runs([]) == []
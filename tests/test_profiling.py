@@ -0,0 +1,72 @@
+import asyncio
+import time
+import threading
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.profiling import SamplingProfiler, activate, to_thread
+
+
+def _busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profiler_collects_folded_stacks():
+    with SamplingProfiler(interval=0.001) as profiler:
+        _busy_wait(0.1)
+
+    assert profiler.sample_count > 0
+    folded = profiler.to_folded()
+    assert "_busy_wait (test_profiling.py" in folded
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        if "_busy_wait" not in stack:
+            continue
+        # root ada di kiri, leaf di kanan
+        assert stack.index("test_profiler_collects_folded_stacks") < stack.index("_busy_wait")
+
+
+def test_profiler_samples_target_thread_only():
+    worker = threading.Thread(target=_busy_wait, args=(0.1,))
+    worker.start()
+    profiler = SamplingProfiler(thread_id=worker.ident, interval=0.001).start()
+    worker.join()
+    profiler.stop()
+
+    folded = profiler.to_folded()
+    assert "_busy_wait" in folded
+    assert "test_profiler_samples_target_thread_only" not in folded
+
+
+def _unrelated_loop_work(seconds):
+    _busy_wait(seconds)
+
+
+def test_profiler_follows_request_threads_but_not_other_loop_tasks():
+    async def request(profiler):
+        activate(profiler)
+        await to_thread(_busy_wait, 0.1)
+
+    async def unrelated():
+        await asyncio.sleep(0.01)
+        _unrelated_loop_work(0.05)
+
+    async def run():
+        profiler = SamplingProfiler(interval=0.001).start()
+        await asyncio.gather(request(profiler), unrelated())
+        profiler.stop()
+        return profiler.to_folded()
+
+    folded = asyncio.run(run())
+    # Retrieval di thread pekerja ikut tersampel, kerja request lain di event loop tidak
+    assert "_busy_wait" in folded
+    assert "_unrelated_loop_work" not in folded
+
+
+def test_profiler_not_started_has_no_samples():
+    profiler = SamplingProfiler()
+
+    assert profiler.sample_count == 0
+    assert profiler.to_folded() == ""
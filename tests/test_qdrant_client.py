@@ -177,4 +177,211 @@ def test_get_next_id_fail(mock_qdrant_client):
     assert result == 0
     mock_instance.get_collection.assert_called_once_with(collection_name="desa-maju-rag")
 
+@patch("service.qdrant_client.QDRANT_QUANTIZATION", "scalar")
+@patch("service.qdrant_client.QdrantClient")
+def test_create_collection_with_scalar_quantization(mock_qdrant_client):
+    mock_instance = MagicMock()
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    service._client = mock_instance
+
+    service._create_collection()
+
+    vectors_config = mock_instance.create_collection.call_args.kwargs["vectors_config"]
+    dense_params = vectors_config[service.dense_embedder.vector_name]
+    assert dense_params.size == service.dense_embedder.size
+    assert dense_params.quantization_config.scalar.type == "int8"
+    assert service.dense_search_params().quantization.rescore is True
+
+@patch("service.qdrant_client.QDRANT_QUANTIZATION", "none")
+@patch("service.qdrant_client.QdrantClient")
+def test_apply_collection_settings_disables_quantization(mock_qdrant_client):
+    mock_instance = MagicMock()
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    vector_name = service.dense_embedder.vector_name
+    mock_instance.get_collection.return_value.config.params.vectors = {
+        vector_name: MagicMock(size=service.dense_embedder.size)
+    }
+    service._client = mock_instance
+
+    service.apply_collection_settings()
+
+    kwargs = mock_instance.update_collection.call_args.kwargs
+    assert kwargs["vectors_config"][vector_name].quantization_config == qdrant_client_module.Disabled.DISABLED
+
+@patch("service.qdrant_client.QdrantClient")
+def test_apply_collection_settings_rejects_dimension_change(mock_qdrant_client):
+    mock_instance = MagicMock()
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    mock_instance.get_collection.return_value.config.params.vectors = {
+        service.dense_embedder.vector_name: MagicMock(size=service.dense_embedder.size * 2)
+    }
+    service._client = mock_instance
+
+    with pytest.raises(ValueError, match="re-index"):
+        service.apply_collection_settings()
+
+    mock_instance.update_collection.assert_not_called()
+
+@patch("service.qdrant_client.QdrantClient")
+def test_switch_alias_replaces_alias_in_one_call(mock_qdrant_client):
+    mock_instance = MagicMock()
+    mock_instance.get_aliases.return_value.aliases = [
+        MagicMock(alias_name="desa-maju-rag", collection_name="desa-maju-rag_20240101000000")
+    ]
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    service._client = mock_instance
+
+    previous = service.switch_alias("desa-maju-rag_20250101000000")
+
+    assert previous == "desa-maju-rag_20240101000000"
+    mock_instance.update_collection_aliases.assert_called_once()
+    operations = mock_instance.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert operations[0].delete_alias.alias_name == "desa-maju-rag"
+    assert operations[1].create_alias.collection_name == "desa-maju-rag_20250101000000"
+    mock_instance.delete_collection.assert_not_called()
+
+@patch("service.qdrant_client.QdrantClient")
+def test_switch_alias_refuses_to_replace_legacy_collection(mock_qdrant_client):
+    mock_instance = MagicMock()
+    mock_instance.get_aliases.return_value.aliases = []
+    mock_instance.collection_exists.return_value = True
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    service._client = mock_instance
+
+    with pytest.raises(ValueError, match="not an alias"):
+        service.switch_alias("desa-maju-rag_20250101000000")
+
+    mock_instance.delete_collection.assert_not_called()
+    mock_instance.update_collection_aliases.assert_not_called()
+
+@patch("service.qdrant_client.QdrantClient")
+def test_ensure_collection_creates_versioned_collection_behind_alias(mock_qdrant_client):
+    mock_instance = MagicMock()
+    mock_instance.collection_exists.return_value = False
+    mock_instance.get_aliases.return_value.aliases = []
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333")
+    service._client = mock_instance
+
+    service._ensure_collection()
+
+    created = mock_instance.create_collection.call_args.kwargs["collection_name"]
+    assert created.startswith("desa-maju-rag_")
+    operations = mock_instance.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert operations[-1].create_alias.alias_name == "desa-maju-rag"
+
+@patch("service.qdrant_client.QdrantClient")
+def test_hybrid_search_batch_sends_one_batch_request_per_branch(mock_qdrant_client):
+    import numpy as np
+    mock_instance = MagicMock()
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333", dense_embedder=MagicMock(vector_name="dense", label="test"))
+    service._client = mock_instance
+    service._dense_embedder.embed_queries.return_value = [[0.1, 0.2], [0.3, 0.4]]
+    service._bm25_model = MagicMock()
+    service._bm25_model.query_embed.return_value = [
+        MagicMock(indices=np.array([1]), values=np.array([0.5])),
+        MagicMock(indices=np.array([]), values=np.array([]))
+    ]
+    service._colbert_model = MagicMock()
+    service._colbert_model.query_embed.return_value = [np.ones((2, 3)), np.ones((2, 3))]
+
+    def hit(point_id, score):
+        return MagicMock(id=point_id, score=score)
+
+    def query_batch_points(collection_name, requests):
+        branch = requests[0].using
+        if branch == "dense":
+            return [MagicMock(points=[hit(1, 0.9), hit(2, 0.8)]), MagicMock(points=[hit(3, 0.7)])]
+        if branch == "bm25":
+            return [MagicMock(points=[hit(2, 10.0)])]
+        return [MagicMock(points=[]), MagicMock(points=[hit(4, 5.0)])]
+    mock_instance.query_batch_points.side_effect = query_batch_points
+
+    results = service.hybrid_search_batch(["dana desa", "dan"], limit=2)
+
+    assert mock_instance.query_batch_points.call_count == 3
+    # Query kedua tidak punya token BM25, jadi hanya satu request BM25 yang dikirim
+    bm25_call = [call for call in mock_instance.query_batch_points.call_args_list if call.kwargs["requests"][0].using == "bm25"][0]
+    assert len(bm25_call.kwargs["requests"]) == 1
+    assert [point.id for point in results[0]] == [2, 1]
+    assert [point.id for point in results[1]] == [4, 3]
+
+@patch("service.qdrant_client.QdrantClient")
+def test_create_points_moves_text_to_chunk_store(mock_qdrant_client):
+    bm25_vector = MagicMock()
+    bm25_vector.indices.tolist.return_value = [0]
+    bm25_vector.values.tolist.return_value = [0.5]
+    colbert_vector = [MagicMock()]
+    colbert_vector[0].tolist.return_value = [0.1, 0.2]
+    chunk = MagicMock()
+    chunk.meta.doc_items = []
+    chunk_store = MagicMock()
+
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333", chunk_store=chunk_store)
+    service._client = MagicMock()
+    points = service.create_points({
+        "bm25_vectors": [bm25_vector],
+        "colbert_vectors": [colbert_vector],
+        "dense_vectors": [[0.9, 0.8]],
+        "docs": ["Doc text"],
+        "chunks": [chunk],
+        "filename": "test.pdf"
+    }, start_id=0)
+
+    payload = points[0].payload
+    assert "document" not in payload
+    assert payload["text_key"] == qdrant_client_module.text_key("Doc text")
+    chunk_store.put_many.assert_called_once_with({payload["text_key"]: "Doc text"})
+
+@patch("service.qdrant_client.QdrantClient")
+def test_attach_payloads_fetches_text_in_one_bulk_read(mock_qdrant_client):
+    mock_instance = MagicMock()
+    chunk_store = MagicMock()
+    chunk_store.get_many.return_value = {"key-1": "teks satu"}
+    mock_instance.retrieve.return_value = [
+        MagicMock(id=1, payload={"text_key": "key-1", "filename": "a.pdf"}),
+        MagicMock(id=2, payload={"document": "teks lama", "filename": "b.pdf"})
+    ]
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333", chunk_store=chunk_store)
+    service._client = mock_instance
+    hits = [MagicMock(id=1, payload=None), MagicMock(id=2, payload=None)]
+
+    service._attach_payloads(hits)
+
+    mock_instance.retrieve.assert_called_once()
+    chunk_store.get_many.assert_called_once_with(["key-1"])
+    assert hits[0].payload["document"] == "teks satu"
+    assert hits[1].payload["document"] == "teks lama"
+
+@patch("service.qdrant_client.QdrantClient")
+def test_attach_payloads_survives_chunk_store_errors(mock_qdrant_client):
+    mock_instance = MagicMock()
+    chunk_store = MagicMock()
+    chunk_store.get_many.side_effect = Exception("relation chunk_texts does not exist")
+    mock_instance.retrieve.return_value = [
+        MagicMock(id=1, payload={"text_key": "key-1", "filename": "a.pdf"}),
+        MagicMock(id=2, payload={"document": "teks lama", "filename": "b.pdf"})
+    ]
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333", chunk_store=chunk_store)
+    service._client = mock_instance
+    hits = [MagicMock(id=1, payload=None), MagicMock(id=2, payload=None)]
+
+    service._attach_payloads(hits)
+
+    assert hits[0].payload == {"text_key": "key-1", "filename": "a.pdf"}
+    assert hits[1].payload["document"] == "teks lama"
+
+def test_point_id_is_deterministic_and_unique_per_chunk():
+    ids = {qdrant_client_module.point_id(filename, i) for filename in ("a.pdf", "b.pdf") for i in range(100)}
+    assert len(ids) == 200
+    assert qdrant_client_module.point_id("a.pdf", 3) == qdrant_client_module.point_id("a.pdf", 3)
+
+@patch("service.qdrant_client.QdrantClient")
+def test_attach_payloads_survives_retrieve_errors(mock_qdrant_client):
+    mock_instance = MagicMock()
+    mock_instance.retrieve.side_effect = Exception("qdrant timeout")
+    service = qdrant_client_module.QdrantClientService("http://localhost:6333", chunk_store=MagicMock())
+    service._client = mock_instance
+    hits = [MagicMock(id=1, payload=None), MagicMock(id=2, payload=None)]
 
+    assert service._attach_payloads(hits) is hits
+    assert [hit.payload for hit in hits] == [{}, {}]
@@ -1,5 +1,9 @@
 # tests/test_rabbitmq_consumer.py
 import pytest
+import json
+import queue
+import threading
+import time
 from unittest.mock import patch, MagicMock
 from pika import exceptions
 import sys, os
@@ -106,3 +110,116 @@ def test_close_no_connection():
     consumer._connection = None
 
     consumer.close()
+
+
+class FakeConnection:
+    """Pengganti BlockingConnection: callback threadsafe diantrikan dan dijalankan di process_data_events."""
+
+    def __init__(self):
+        self.is_open = True
+        self._callbacks = queue.Queue()
+
+    def add_callback_threadsafe(self, callback):
+        self._callbacks.put(callback)
+
+    def process_data_events(self, time_limit=0):
+        try:
+            callback = self._callbacks.get(timeout=time_limit)
+        except queue.Empty:
+            return
+        callback()
+        while not self._callbacks.empty():
+            self._callbacks.get_nowait()()
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeChannel:
+    def __init__(self):
+        self.is_open = True
+        self.acked = []
+        self.nacked = []
+        self.settled_on = set()
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+        self.settled_on.add(threading.get_ident())
+
+    def basic_nack(self, delivery_tag, requeue=False):
+        self.nacked.append(delivery_tag)
+        self.settled_on.add(threading.get_ident())
+
+
+def make_concurrent_consumer(workers):
+    consumer = rabbitmq_consumer_module.RabbitmqConsumer(
+        "url", "queue", prefetch_count=workers, max_workers=workers, concurrent=True, drain_timeout=10
+    )
+    consumer._connection = FakeConnection()
+    consumer._channel = FakeChannel()
+    return consumer
+
+
+def deliver(consumer, delivery_tag, body):
+    method = MagicMock()
+    method.delivery_tag = delivery_tag
+    consumer._threaded_callback(consumer._channel, method, None, body)
+
+
+def test_threaded_callback_processes_messages_in_parallel():
+    workers, messages, work_seconds = 4, 8, 0.2
+    consumer = make_concurrent_consumer(workers)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_process(message):
+        with lock:
+            active.append(message["file_name"])
+            peak.append(len(active))
+        time.sleep(work_seconds)
+        with lock:
+            active.remove(message["file_name"])
+
+    started_at = time.perf_counter()
+    with patch.object(consumer, "process_message", side_effect=slow_process):
+        for tag in range(messages):
+            deliver(consumer, tag, json.dumps({"file_name": f"doc_{tag}.pdf"}).encode())
+        consumer._drain()
+    elapsed = time.perf_counter() - started_at
+
+    assert max(peak) == workers
+    assert sorted(consumer._channel.acked) == list(range(messages))
+    assert consumer.in_flight == 0
+    # Serial butuh messages * work_seconds; paralel sekitar (messages / workers) * work_seconds
+    assert elapsed < messages * work_seconds / 2
+    # Ack selalu dijalankan di thread koneksi, bukan di thread worker
+    assert consumer._channel.settled_on == {threading.get_ident()}
+
+
+def test_threaded_callback_nacks_failures_and_invalid_json():
+    consumer = make_concurrent_consumer(2)
+
+    with patch.object(consumer, "process_message", side_effect=Exception("boom")):
+        deliver(consumer, 1, b'{"file_name": "dummy.pdf"}')
+        deliver(consumer, 2, b'invalid-json')
+        consumer._drain()
+
+    assert sorted(consumer._channel.nacked) == [1, 2]
+    assert consumer._channel.acked == []
+
+
+@patch("service.rabbitmq_consumer.BlockingConnection")
+@patch("service.rabbitmq_consumer.URLParameters")
+def test_consume_sets_prefetch_and_drains_on_stop(mock_url_params, mock_blocking_conn):
+    mock_conn = MagicMock()
+    mock_channel = MagicMock()
+    mock_conn.channel.return_value = mock_channel
+    mock_blocking_conn.return_value = mock_conn
+
+    consumer = rabbitmq_consumer_module.RabbitmqConsumer("url", "queue", prefetch_count=5, max_workers=5, concurrent=True)
+    consumer.consume()
+
+    mock_channel.basic_qos.assert_called_once_with(prefetch_count=5)
+    assert mock_channel.basic_consume.call_args.kwargs["on_message_callback"] == consumer._threaded_callback
+    mock_conn.close.assert_called_once()
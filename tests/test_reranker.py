@@ -0,0 +1,79 @@
+import threading
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from types import SimpleNamespace
+from core.reranker import Reranker
+
+
+def make_hits(texts):
+    return [SimpleNamespace(id=i, payload={"document": text}) for i, text in enumerate(texts)]
+
+
+class CountingScorer:
+    """Skor = jumlah kata query yang muncul di teks."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query, texts):
+        self.calls.append(list(texts))
+        words = query.lower().split()
+        return [float(sum(word in text.lower() for word in words)) for text in texts]
+
+
+def test_rerank_orders_by_cross_encoder_score():
+    scorer = CountingScorer()
+    reranker = Reranker(model_name="test", score=scorer)
+    hits = make_hits(["jadwal posyandu", "anggaran dana desa jalan", "dana desa"])
+
+    result = reranker.rerank("dana desa jalan", hits, top_k=2)
+
+    assert [hit.id for hit in result] == [1, 2]
+    assert len(scorer.calls) == 1
+
+def test_rerank_uses_cache_for_known_candidates():
+    scorer = CountingScorer()
+    reranker = Reranker(model_name="test", score=scorer)
+    hits = make_hits(["dana desa", "posyandu"])
+
+    reranker.rerank("dana desa", hits, top_k=2)
+    extra = SimpleNamespace(id=9, payload={"document": "dana desa tahun ini"})
+    result = reranker.rerank("dana desa", hits + [extra], top_k=3)
+
+    # Hanya kandidat baru yang dinilai ulang
+    assert scorer.calls[1] == ["dana desa tahun ini"]
+    assert [hit.id for hit in result] == [0, 9, 1]
+
+def test_rerank_falls_back_to_fused_order_on_timeout():
+    release = threading.Event()
+
+    def slow_score(query, texts):
+        release.wait(5)
+        return [float(i) for i in range(len(texts))]
+
+    reranker = Reranker(model_name="test", timeout=0.05, score=slow_score)
+    hits = make_hits(["a", "b", "c"])
+
+    result = reranker.rerank("query", hits, top_k=2)
+    assert [hit.id for hit in result] == [0, 1]
+
+    # Skor yang selesai dihitung setelah timeout tetap masuk cache
+    release.set()
+    reranker._executor.shutdown(wait=True)
+    assert len(reranker._cache) == 3
+
+def test_rerank_falls_back_on_error_and_when_busy():
+    def broken_score(query, texts):
+        raise RuntimeError("model error")
+
+    reranker = Reranker(model_name="test", score=broken_score)
+    hits = make_hits(["a", "b", "c"])
+    assert [hit.id for hit in reranker.rerank("query", hits, top_k=2)] == [0, 1]
+
+    busy = Reranker(model_name="test", max_pending=0, score=CountingScorer())
+    assert [hit.id for hit in busy.rerank("query", hits, top_k=1)] == [0]
+
+def test_cache_is_bounded():
+    reranker = Reranker(model_name="test", cache_size=2, score=CountingScorer())
+    reranker.rerank("query", make_hits(["a", "b", "c"]), top_k=3)
+    assert len(reranker._cache) == 2
@@ -0,0 +1,96 @@
+import asyncio
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+from core.single_flight import SingleFlight, normalize_query
+
+
+def make_stream(calls, tokens=3, delay=0.01):
+    async def stream():
+        calls.append(1)
+        for i in range(tokens):
+            await asyncio.sleep(delay)
+            yield f"token{i} "
+    return stream
+
+
+async def collect(subscription):
+    return [chunk async for chunk in subscription]
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  Berapa  Dana DESA?\n") == normalize_query("berapa dana desa?")
+
+def test_identical_requests_share_one_stream():
+    async def run():
+        flights = SingleFlight("test")
+        calls = []
+        done = []
+        leader = flights.lead("q", make_stream(calls), on_done=lambda: done.append(1))
+        await asyncio.sleep(0.015)
+        # Follower yang datang di tengah stream tetap menerima jawaban lengkap
+        follower = flights.join("q")
+        results = await asyncio.gather(collect(leader), collect(follower))
+        return calls, done, results, flights.in_flight()
+
+    calls, done, results, in_flight = asyncio.run(run())
+    assert len(calls) == 1
+    assert done == [1]
+    assert results[0] == results[1] == ["token0 ", "token1 ", "token2 "]
+    assert in_flight == 0
+
+def test_finished_stream_is_not_reused():
+    async def run():
+        flights = SingleFlight("test")
+        calls = []
+        await collect(flights.lead("q", make_stream(calls)))
+        return flights.join("q"), calls
+
+    subscription, calls = asyncio.run(run())
+    assert subscription is None
+    assert len(calls) == 1
+
+def test_error_reaches_every_subscriber():
+    async def broken():
+        yield "token0 "
+        await asyncio.sleep(0.01)
+        raise RuntimeError("LLM error")
+
+    async def run():
+        flights = SingleFlight("test")
+        leader = flights.lead("q", broken)
+        follower = flights.join("q")
+        return await asyncio.gather(collect(leader), collect(follower), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_stream_is_cancelled_when_all_subscribers_leave():
+    async def run():
+        flights = SingleFlight("test")
+        calls = []
+        done = []
+        leader = flights.lead("q", make_stream(calls, tokens=100), on_done=lambda: done.append(1))
+        follower = flights.join("q")
+        leader.close()
+        await asyncio.sleep(0.02)
+        assert not done
+        follower.close()
+        await asyncio.sleep(0.01)
+        return done, flights.in_flight()
+
+    done, in_flight = asyncio.run(run())
+    assert done == [1]
+    assert in_flight == 0
+
+def test_lead_rejects_running_key():
+    async def run():
+        flights = SingleFlight("test")
+        subscription = flights.lead("q", make_stream([]))
+        try:
+            with pytest.raises(RuntimeError):
+                flights.lead("q", make_stream([]))
+        finally:
+            subscription.close()
+
+    asyncio.run(run())
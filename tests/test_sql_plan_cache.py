@@ -0,0 +1,99 @@
+import pytest
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.sql_plan_cache import (
+    SQLPlanCache,
+    UnsafeSQLError,
+    normalize_query,
+    ensure_read_only,
+    bind_names
+)
+
+def test_normalize_query_extracts_product_name():
+    template, params = normalize_query("Berapa prediksi revenue produk Kopi Bubuk?")
+
+    assert template == "berapa prediksi revenue produk :product"
+    assert params == {"product": "%kopi bubuk%"}
+
+def test_normalize_query_same_shape_same_template():
+    first, _ = normalize_query("prediksi penjualan produk teh manis untuk tahun depan")
+    second, _ = normalize_query("Prediksi  penjualan produk Gula Aren untuk tahun depan")
+
+    assert first == second
+
+def test_normalize_query_without_product():
+    template, params = normalize_query("Forecast revenue bulan ini?")
+
+    assert template == "forecast revenue bulan ini"
+    assert params == {}
+
+def test_ensure_read_only_accepts_select():
+    sql = ensure_read_only("SELECT name, prediction_revenue FROM predictive_analis WHERE name ILIKE :product;")
+
+    assert sql == "SELECT name, prediction_revenue FROM predictive_analis WHERE name ILIKE :product"
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM predictive_analis",
+    "SELECT * FROM users",
+    "SELECT * FROM predictive_analis; DROP TABLE predictive_analis",
+    "WITH x AS (DELETE FROM predictive_analis RETURNING *) SELECT * FROM x",
+    ""
+])
+def test_ensure_read_only_rejects_unsafe_sql(sql):
+    with pytest.raises(UnsafeSQLError):
+        ensure_read_only(sql)
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM predictive_analis, users",
+    "SELECT * FROM (SELECT * FROM predictive_analis) AS p, users",
+    "SELECT * FROM predictive_analis p JOIN predictive_analis q ON p.name = q.name, users",
+    'SELECT * FROM "users"',
+    "SELECT pg_read_file('/etc/passwd') FROM predictive_analis",
+    "SELECT * FROM predictive_analis WHERE name IN (SELECT * FROM dblink('host=x', 'SELECT 1'))",
+    "SELECT pg_catalog.pg_sleep(10) FROM predictive_analis"
+])
+def test_ensure_read_only_rejects_comma_joins_and_unlisted_functions(sql):
+    with pytest.raises(UnsafeSQLError):
+        ensure_read_only(sql)
+
+def test_ensure_read_only_accepts_common_aggregates_and_ctes():
+    sql = (
+        "WITH bulanan AS (SELECT name, extract(month FROM tanggal) AS bulan, sum(prediction_revenue) AS total "
+        "FROM predictive_analis WHERE name ILIKE :product GROUP BY name, bulan) "
+        "SELECT name, round(avg(total), 2) FROM bulanan GROUP BY name ORDER BY 2 DESC, 1"
+    )
+    assert ensure_read_only(sql) == sql
+
+def test_bind_names_ignores_casts():
+    assert bind_names("SELECT name::text FROM predictive_analis WHERE name ILIKE :product") == {"product"}
+
+def test_cache_hit_reports_saved_time():
+    cache = SQLPlanCache(max_size=2)
+    cache.record_generation(1.5)
+
+    assert cache.get("t") is None
+    assert cache.put("t", "SELECT * FROM predictive_analis WHERE name ILIKE :product", {"product": "%a%"})
+    assert cache.get("t") is not None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["saved_seconds"] == 1.5
+
+def test_cache_rejects_sql_with_inlined_parameter():
+    cache = SQLPlanCache()
+
+    assert not cache.put("t", "SELECT * FROM predictive_analis WHERE name ILIKE '%kopi%'", {"product": "%kopi%"})
+    assert cache.get("t") is None
+
+def test_cache_evicts_least_recently_used():
+    cache = SQLPlanCache(max_size=2)
+    cache.put("a", "SELECT 1 FROM predictive_analis", {})
+    cache.put("b", "SELECT 2 FROM predictive_analis", {})
+    cache.get("a")
+    cache.put("c", "SELECT 3 FROM predictive_analis", {})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
@@ -0,0 +1,54 @@
+import sys, os
+from decimal import Decimal
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.utils import (
+    classify_intent,
+    classify_intent_with_ambiguity,
+    format_db_rows,
+    summarize_numeric_columns
+)
+
+def test_format_db_rows_renders_header_once():
+    text, shown = format_db_rows(
+        ["name", "prediction_revenue"],
+        [("Kopi", 1200), ("Teh", None)],
+        max_tokens=1000
+    )
+
+    assert shown == 2
+    assert text == "name | prediction_revenue\nKopi | 1200\nTeh | "
+
+def test_format_db_rows_stops_at_token_budget():
+    rows = [(f"produk {i}", i) for i in range(100)]
+
+    text, shown = format_db_rows(["name", "revenue"], rows, max_tokens=10, count_tokens=lambda line: 1)
+
+    assert shown == 9
+    assert len(text.splitlines()) == 10
+
+def test_summarize_numeric_columns_skips_text_columns():
+    summary = summarize_numeric_columns(
+        ["name", "revenue"],
+        [("Kopi", Decimal("10.5")), ("Teh", Decimal("4.5")), ("Gula", None)]
+    )
+
+    assert summary == "revenue: min=4.5, max=10.5, total=15.0"
+
+def test_classify_intent_with_ambiguity_clear_db_question():
+    query = "Berapa prediksi revenue produk Kopi Bubuk?"
+
+    assert classify_intent(query) == "db"
+    assert classify_intent_with_ambiguity(query) == "db"
+
+def test_classify_intent_with_ambiguity_clear_document_question():
+    assert classify_intent_with_ambiguity("Apa isi peraturan desa tentang sampah?") == "document"
+
+def test_classify_intent_with_ambiguity_mixed_signals():
+    # Kata kunci DB muncul, tetapi pertanyaan merujuk ke laporan
+    assert classify_intent_with_ambiguity("Bagaimana analisis anggaran di laporan tahunan?") == "ambiguous"
+
+def test_classify_intent_with_ambiguity_quantitative_only():
+    query = "Berapa total dana yang diterima tahun lalu?"
+
+    assert classify_intent(query) == "document"
+    assert classify_intent_with_ambiguity(query) == "ambiguous"
@@ -1,7 +1,31 @@
 import logging
-from celery import Celery
-from settings import RABBITMQ_URL, REDIS_URL
-from core.document_processor import DocumentProcessor
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Tuple
+from celery import Celery, chord
+from celery.signals import worker_init, worker_process_shutdown
+from docling_core.types.doc import DoclingDocument
+from settings import (
+    RABBITMQ_URL,
+    REDIS_URL,
+    VECTOR_DB_URL,
+    DATABASE_URL,
+    LOCAL_STORAGE_PATH,
+    DOCUMENT_FANOUT_PAGE_THRESHOLD,
+    DOCUMENT_FANOUT_PAGES_PER_TASK,
+    JOB_STATUS_TTL_SECONDS,
+    WORKER_METRICS_PORT,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    CATALOG_FLUSH_INTERVAL_SECONDS
+)
+from core.document_processor import DocumentProcessor, file_sha256
+from core.minio import FileProcessor
+from core.profiling import SamplingProfiler
+from service.qdrant_client import QdrantClientService
+from service.job_tracker import JobTracker, IngestionJob
+from service.catalog_writer import CatalogWriter
+from core.metrics import start_metrics_server, mark_process_dead
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,6 +34,129 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Celery('tasks', broker=RABBITMQ_URL, backend=REDIS_URL)
+# Task ingestion berjalan lama; jangan biarkan satu worker menimbun banyak
+# subtask sementara worker lain menganggur.
+app.conf.worker_prefetch_multiplier = 1
+
+# Model (docling, BM25, ColBERT) dan koneksi Qdrant cukup dibuat sekali per proses worker
+_processor = None
+_qdrant_client = None
+_job_tracker = JobTracker(redis_url=REDIS_URL, ttl_seconds=JOB_STATUS_TTL_SECONDS)
+# Status di katalog Postgres (tabel `files`) ditulis per batch di luar jalur ingestion
+_catalog = CatalogWriter(DATABASE_URL or None, flush_interval=CATALOG_FLUSH_INTERVAL_SECONDS)
+
+
+def get_processor() -> DocumentProcessor:
+    global _processor
+    if _processor is None:
+        _processor = DocumentProcessor()
+    return _processor
+
+
+def get_qdrant_client() -> QdrantClientService:
+    global _qdrant_client
+    if _qdrant_client is None:
+        client = QdrantClientService(host=VECTOR_DB_URL, https=False)
+        if not client.connect():
+            raise Exception(f"Failed to connect to Qdrant at {VECTOR_DB_URL}")
+        _qdrant_client = client
+    return _qdrant_client
+
+
+def _page_ranges(total_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    return [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+
+def _index_processed_data(processed_data: dict, job: IngestionJob) -> int:
+    qdrant_client = get_qdrant_client()
+    with job.stage("upsert"):
+        # ID point diturunkan dari nama file; worker dan merge chord yang paralel tidak saling menimpa
+        points = qdrant_client.create_points(processed_data)
+        if points:
+            qdrant_client.insert_points(points)
+            logger.info(f"Processed and inserted {len(points)} points into Qdrant.")
+    job.set_progress(points_upserted=len(points))
+    return len(points)
+
+
+def _report_failed_pages(job: IngestionJob, failed_pages: List[int]) -> List[int]:
+    # Nomor halaman dilaporkan mulai dari 1, sama dengan yang dilihat pengguna di PDF
+    pages = [page + 1 for page in failed_pages]
+    if pages:
+        job.update(failed_pages=",".join(str(page) for page in pages))
+    return pages
+
+
+def _catalog_finished(doc_info: dict, **fields):
+    finished_at = datetime.now()
+    started_at = doc_info.get('started_at')
+    if started_at:
+        fields["processing_seconds"] = (finished_at - datetime.fromisoformat(started_at)).total_seconds()
+    _catalog.update(doc_info.get('job_id'), finished_at=finished_at, **fields)
+
+def _remove_local_file(local_path: str):
+    try:
+        os.remove(local_path)
+    except OSError:
+        pass
+
+
+@worker_init.connect
+def _start_worker_metrics(**kwargs):
+    # Dengan pool prefork, set PROMETHEUS_MULTIPROC_DIR agar metrik dari
+    # semua proses anak digabung oleh server di proses utama.
+    if WORKER_METRICS_PORT:
+        start_metrics_server(WORKER_METRICS_PORT)
+        logger.info(f"Worker metrics exposed on port {WORKER_METRICS_PORT}.")
+
+
+@worker_process_shutdown.connect
+def _mark_worker_process_dead(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+    _catalog.flush()
+
+
+def get_queue_backlog() -> float:
+    """Jumlah task ingestion yang masih menunggu di queue broker."""
+    try:
+        with app.connection_for_read() as connection:
+            queue = connection.default_channel.queue_declare(
+                queue=app.conf.task_default_queue,
+                passive=True
+            )
+            return queue.message_count
+    except Exception as e:
+        logger.warning(f"Failed to read ingestion queue backlog: {e}")
+        return float("nan")
+
+
+@contextmanager
+def _maybe_profile(doc_info: dict, name: str):
+    """
+    Profil satu eksekusi task jika upload meminta opsi `profile`. Artefak
+    disimpan di MinIO dan ID-nya dicatat di status job sebagai `profile:<name>`.
+    """
+    if not doc_info.get('profile'):
+        yield
+        return
+
+    profiler = SamplingProfiler(interval=PROFILE_SAMPLE_INTERVAL_MS / 1000).start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        job_id = doc_info.get('job_id')
+        profile_id = f"{job_id or datetime.now().strftime('%Y%m%d%H%M%S')}-{name}"
+        try:
+            FileProcessor().save_profile(profile_id, profiler.to_folded())
+            if job_id:
+                _job_tracker.update(job_id, **{f"profile:{name}": profile_id})
+        except Exception as e:
+            logger.error(f"Failed to save profile {profile_id}: {e}")
+
 
 @app.task
 def add(x, y):
@@ -17,11 +164,148 @@ def add(x, y):
 
 @app.task
 def document_processing_task(doc_info: dict):
+    with _maybe_profile(doc_info, "ingest"):
+        return _process_document(doc_info)
+
+def _process_document(doc_info: dict):
+    local_path = None
+    job = _job_tracker.job(doc_info.get('job_id'))
     try:
-        processor = DocumentProcessor()
-        local_path = processor.download_file_to_local(doc_info['file_name'])
-        processor.process(file_path=local_path, filename=doc_info['file_name'])
-        return {"status": "success", "message": "Document processed successfully."}
+        started_at = datetime.now()
+        job.update(started_at=started_at.isoformat())
+        processor = get_processor()
+        with job.stage("download"):
+            local_path = processor.download_file_to_local(doc_info['file_name'])
+        # Hash konten ikut dikirim ke subtask agar langkah merge bisa menyimpan artefak konversi
+        doc_info = {
+            **doc_info,
+            "content_sha256": file_sha256(local_path),
+            "started_at": started_at.isoformat()
+        }
+
+        try:
+            total_pages = processor.get_page_count(local_path)
+        except Exception as e:
+            # Format yang tidak bisa dibaca fitz (mis. .docx) diproses utuh dalam satu task
+            logger.warning(f"Could not count pages of {doc_info['file_name']}: {e}")
+            total_pages = 0
+        _catalog.update(
+            doc_info.get('job_id'),
+            status="processing",
+            started_at=started_at,
+            content_sha256=doc_info['content_sha256'],
+            page_count=total_pages or None
+        )
+
+        # Dokumen besar yang pernah dikonversi langsung ke chunking tanpa fan-out
+        # (`process` sendiri memeriksa cache artefak untuk dokumen kecil)
+        fan_out = total_pages > DOCUMENT_FANOUT_PAGE_THRESHOLD
+        full_doc = processor.load_artifact(doc_info['content_sha256']) if fan_out else None
+        if full_doc is not None:
+            logger.info(f"Document {doc_info['file_name']} loaded from artifact cache; skipping conversion.")
+            job.update(artifact="hit")
+            processed_data = processor.embed_document(full_doc, doc_info['file_name'], job=job)
+        elif fan_out:
+            page_ranges = _page_ranges(total_pages, DOCUMENT_FANOUT_PAGES_PER_TASK)
+            job.set_progress(pages_total=total_pages, parts_total=len(page_ranges))
+            chord([
+                convert_page_range_task.s(doc_info, start_page, end_page)
+                for start_page, end_page in page_ranges
+            ])(merge_and_index_task.s(doc_info))
+            logger.info(f"Document {doc_info['file_name']} ({total_pages} pages) split into {len(page_ranges)} subtasks.")
+            return {
+                "status": "fanned_out",
+                "message": f"Document split into {len(page_ranges)} page-range subtasks.",
+                "total_pages": total_pages
+            }
+        else:
+            processed_data = processor.process(
+                file_path=local_path,
+                filename=doc_info['file_name'],
+                job=job,
+                content_sha256=doc_info['content_sha256']
+            )
+        inserted = _index_processed_data(processed_data, job)
+        failed_pages = _report_failed_pages(job, processed_data.get("failed_pages", []))
+        job.finish("success", "Document processed successfully.")
+        _catalog_finished(doc_info, status="indexed", chunk_count=inserted, failed_page_count=len(failed_pages))
+        return {
+            "status": "success",
+            "message": "Document processed successfully.",
+            "points": inserted,
+            "failed_pages": failed_pages
+        }
     except Exception as e:
         logger.error(f"Failed to process document {doc_info['file_name']}: {e}")
+        job.finish("error", str(e))
+        _catalog_finished(doc_info, status="failed", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        if local_path:
+            _remove_local_file(local_path)
+
+@app.task
+def convert_page_range_task(doc_info: dict, start_page: int, end_page: int):
+    """
+    Konversi satu rentang halaman di worker mana pun. Hasilnya dikembalikan sebagai
+    dict DoclingDocument agar bisa dikirim lewat result backend ke langkah agregasi,
+    bersama halaman yang tetap gagal setelah dicoba ulang dalam rentang lebih kecil.
+    Kegagalan tidak menggagalkan chord; halaman tersebut dilaporkan di hasil merge.
+    """
+    with _maybe_profile(doc_info, f"pages_{start_page}_{end_page}"):
+        return _convert_page_range(doc_info, start_page, end_page)
+
+def _convert_page_range(doc_info: dict, start_page: int, end_page: int):
+    local_path = None
+    job = _job_tracker.job(doc_info.get('job_id'))
+    try:
+        processor = get_processor()
+        with job.stage("download"):
+            local_path = processor.download_file_to_local(
+                doc_info['file_name'],
+                local_path=f"{LOCAL_STORAGE_PATH}/documents/pages_{start_page}_{end_page}_{doc_info['file_name']}"
+            )
+        doc, failed_pages = processor.convert_page_range(local_path, doc_info['file_name'], start_page, end_page, job=job)
+        return {"document": doc.export_to_dict() if doc else None, "failed_pages": failed_pages}
+    except Exception as e:
+        logger.error(f"Failed to convert pages {start_page}-{end_page - 1} of {doc_info['file_name']}: {e}")
+        job.increment("parts_failed")
+        job.increment("pages_failed", end_page - start_page)
+        return {"document": None, "failed_pages": list(range(start_page, end_page))}
+    finally:
+        if local_path:
+            _remove_local_file(local_path)
+
+@app.task
+def merge_and_index_task(page_range_results: list, doc_info: dict):
+    with _maybe_profile(doc_info, "merge"):
+        return _merge_and_index(page_range_results, doc_info)
+
+def _merge_and_index(page_range_results: list, doc_info: dict):
+    job = _job_tracker.job(doc_info.get('job_id'))
+    try:
+        processor = get_processor()
+        docs = [
+            DoclingDocument.model_validate(result["document"])
+            for result in page_range_results if result and result.get("document")
+        ]
+        failed_pages = sorted(page for result in page_range_results for page in result.get("failed_pages", []))
+        full_doc = processor.merge_documents(docs)
+        if doc_info.get('content_sha256') and not failed_pages:
+            processor.save_artifact(doc_info['content_sha256'], full_doc)
+        processed_data = processor.embed_document(full_doc, doc_info['file_name'], job=job)
+        inserted = _index_processed_data(processed_data, job)
+        failed_pages = _report_failed_pages(job, failed_pages)
+        job.finish("success", "Document processed successfully.")
+        _catalog_finished(doc_info, status="indexed", chunk_count=inserted, failed_page_count=len(failed_pages))
+        return {
+            "status": "success",
+            "message": "Document processed successfully.",
+            "points": inserted,
+            "failed_pages": failed_pages
+        }
+    except Exception as e:
+        logger.error(f"Failed to merge and index document {doc_info['file_name']}: {e}")
+        job.finish("error", str(e))
+        _catalog_finished(doc_info, status="failed", error=str(e))
         return {"status": "error", "message": str(e)}